@@ -1,5 +1,6 @@
 import argparse
 import click
+import collections
 import cv2
 import logging
 import numpy as np
@@ -7,8 +8,36 @@ import os
 import sys
 import time
 
+from concurrent.futures import Future
 from flask import Flask, jsonify, request, Response
+from google.protobuf.message import DecodeError
 from . import analytic_pb2
+from .batch import BatchProcessor
+from .cache import ResultCache
+from .client import AnalyticClient
+from .fanout import FanoutEngine, parse_target
+from .frames import FrameEncoder, decode_frame, encode_frame, frame_to_proto, proto_to_frame
+from .masks import mask_to_proto, proto_to_mask
+from .motion import MotionGate
+from .metrics import Metrics, Profiler, serve_metrics
+from .overlay import Display, OverlayRenderer
+from .pipeline import Pipeline
+from .rois import add_detections, rois_to_arrays
+from .sampling import FrameSampler
+from .sources import LatestFrameGrabber, MultiSource, open_capture, read_capture
+from .sinks import JsonLinesWriter, ParquetWriter, ProtoWriter, VideoWriter, read_delimited, result_writer
+from .store import ResultStore
+from .tracking import Tracker
+from .server import StreamerServicer, create_grpc_server, serve_grpc
+from .shm import RingBuffers
+from .workers import WorkerError, WorkerPool
+
+def __getattr__(name):
+    # influxdb is slow to import, so InfluxExporter is only loaded once it's asked for
+    if name == "InfluxExporter":
+        from .influx import InfluxExporter
+        return InfluxExporter
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
 class Context:
     pass
@@ -25,6 +54,9 @@ class EndpointAction(object):
 def default_output_func(frame, req, resp):
     output = [req.frame_num]
     outstring = """Detections for frame_num: {!s}\n"""
+    if req.source_id:
+        output.insert(0, req.source_id)
+        outstring = """Detections for source: {!s} frame_num: {!s}\n"""
     for roi in resp.roi:
         # Assume bounding box for now
         # TODO check for bounding box vs pixel mask
@@ -36,17 +68,26 @@ def default_output_func(frame, req, resp):
         output.append(roi.confidence)
     print(outstring.format(*output))
 
+def log_results(req, results):
+    """ Log the number of detections each analytic returned for a fanned out frame """
+    counts = ["{!s}: {!s}".format(r.analytic.name, r.data.status.message if r.data.status.code else len(r.data.roi))
+              for r in results.results]
+    logging.info("Fanout results for frame_num {!s}: {!s}".format(req.frame_num, ", ".join(counts)))
+
+_renderer = OverlayRenderer()
+
 def render(frame, req, resp, window_name="Output"):
-    for roi in resp.roi:
-        if roi.HasField("box"):
-            box = roi.box
-            display_text = "{!s} - {!s}".format(roi.classification, roi.confidence)
-            cv2.rectangle(frame, (box.corner1.x, box.corner1.y), (box.corner2.x, box.corner2.y), (255, 0, 0), 2)
-            cv2.putText(frame, display_text, (box.corner1.x, box.corner1.y), cv2.FONT_HERSHEY_COMPLEX, 1, (255, 255, 0))
+    """ Draw the ROIs onto the frame and show it. This blocks the caller on the window; as an
+    output function prefer a Display, which shows frames on its own thread. """
+    frame = _renderer.draw(frame, resp, copy=False)
     cv2.imshow(window_name, frame)
     cv2.waitKey(1)
 
 class AnalyticServer:
+    """ A Flask server for the analytic. POST /process takes a serialized InputFrame as its body
+    and answers with a serialized CompositeFrame from `process_func(frame, req)`, which should
+    call the output function itself (as StreamerServicer.process does). """
+
     def __init__(self, name, host="::", port=50051):
         self.app = Flask(name)
         self.host = host
@@ -64,40 +105,121 @@ class AnalyticServer:
     def register_process_func(self, func):
         self.process_func = func
 
-    def register_output_func(self, output_func):
-        self.output_func = output_func
-
-    def process(self, req, resp):
-        frame = cv2.imdecode(np.fromstring(req.frame.img, dtype=np.uint8), 1)
-        self.process_func(frame, req, resp)
-        if self.output_func:
-            self.output_func(frame, req, resp)
+    def process(self):
+        try:
+            req = analytic_pb2.InputFrame.FromString(request.get_data())
+        except DecodeError:
+            return Response("Body is not a serialized InputFrame", status=400, mimetype="text/plain")
+        frame = decode_frame(req.frame)
+        if frame is None:
+            return Response("Could not decode frame {!s}".format(req.frame_num), status=400, mimetype="text/plain")
+        result = self.process_func(frame, req)
+        return Response(result.SerializeToString(), mimetype="application/x-protobuf")
 
 
 class Streamer:
-    def __init__(self, func=None, output_func="default"):
+    def __init__(self, func=None, output_func="default", pipelined=False, queue_size=8,
+                 batch_func=None, batch_size=16, max_wait_ms=50, workers=0, shared_memory=False,
+                 realtime=False, target_fps=None, max_latency_ms=None,
+                 stride=1, sample_fps=None, time_ranges=None,
+                 stats_interval=None, profile_frames=0, profile_path=None,
+                 cache_size=0, cache_mode="exact", cache_threshold=2.0,
+                 motion_threshold=None, motion_max_skip=30, motion_method="diff",
+                 track_interval=0, track_method="flow"):
+        """ `output_func` is called with each analyzed frame; "render" shows the frames with
+        their ROIs drawn in a window on a display thread and "headless" draws them off-screen.
+
+        Set `pipelined` to run capture/decode, the analytic and the output function on
+        separate threads joined by queues holding at most `queue_size` frames.
+
+        Register `batch_func(frames, reqs, resps)` instead of `func` to hand the analytic up to
+        `batch_size` frames at once; a partial batch is flushed after `max_wait_ms`.
+
+        Set `workers` to run the analytic in that many processes. Each worker runs the init
+        function once to load its own model; results are returned to the output function in
+        frame order. With `shared_memory` set, frames reach the workers through a shared-memory
+        ring buffer instead of being pickled.
+
+        Set `realtime` for live cameras: a background grabber keeps only the newest frame so the
+        analytic never falls behind the camera. Skipped frames are reported in
+        `FrameData.dropped_frames` and totalled in `self.dropped_frames`. `target_fps` caps the
+        analysis rate and frames older than `max_latency_ms` are skipped.
+
+        For offline video, `stride`, `sample_fps` and `time_ranges` (a list of (start, end)
+        seconds) analyze only a sample of the frames; the rest are skipped without being
+        converted to pixels. Sampled frames keep their true frame_num and use the media
+        timestamp in seconds.
+
+        The time spent in each stage (decode, analytic, wait, output, serialize) is kept in
+        `self.metrics` and returned by stats(); `stats_interval` logs a summary every that many
+        seconds. `profile_frames` runs the analytic under cProfile for that many frames and logs
+        the result, also saving it to `profile_path` if given.
+
+        Set `cache_size` to remember the ROIs of that many recent frames and reuse them for
+        duplicate frames instead of running the analytic again: identical frames with
+        `cache_mode="exact"`, or frames whose thumbnails differ by at most `cache_threshold`
+        gray levels with "perceptual". Hit counts are in `self.cache.stats()`. See ResultCache.
+
+        Set `motion_threshold` to only analyze a frame when more than that fraction of the scene
+        has changed (by frame differencing, or background subtraction with `motion_method=
+        "background"`) or `motion_max_skip` frames have been skipped. Other frames carry the
+        last results of their source forward, with `FrameData.carried_forward` set. See
+        MotionGate.
+
+        Set `track_interval` to K to run the analytic on every Kth frame of each source only and
+        track its ROIs through the frames in between, with optical flow (`track_method="flow"`)
+        or constant velocity ("iou"). Every ROI gets a `track_id` that stays the same while the
+        object is tracked, and tracked frames have `FrameData.tracked` set. The analytic also
+        runs when the tracker loses confidence. See Tracker. """
         self.analytic_func = func
         self.output_func = default_output_func
         if output_func == "render":
-            self.output_func = render
+            self.output_func = Display()
+        elif output_func == "headless":
+            self.output_func = Display(headless=True)
+        self.pipelined = pipelined
+        self.queue_size = queue_size
+        self.batch_func = batch_func
+        self.batch_size = batch_size
+        self.max_wait_ms = max_wait_ms
+        self.workers = workers
+        self.shared_memory = shared_memory
+        self.realtime = realtime
+        self.target_fps = target_fps
+        self.max_latency_ms = max_latency_ms
+        self.dropped_frames = 0
+        # Frames of the current stream read and handed to the output function; each is only
+        # written by one thread (the reader or the output loop)
+        self._frames_read = 0
+        self._frames_output = 0
+        self._buffers = RingBuffers()
+        self.stride = stride
+        self.sample_fps = sample_fps
+        self.time_ranges = time_ranges
+        self.metrics = Metrics(log_interval=stats_interval)
+        self.profiler = Profiler(profile_frames, path=profile_path) if profile_frames else None
+        self.cache = None
+        if cache_size:
+            self.cache = ResultCache(cache_size, mode=cache_mode, threshold=cache_threshold)
+        self.motion = None
+        if motion_threshold is not None:
+            self.motion = MotionGate(motion_threshold, max_skip=motion_max_skip, method=motion_method)
+        self.tracker = None
+        if track_interval:
+            self.tracker = Tracker(track_interval, method=track_method)
+        self.init_func = None
+        self._batcher = None
         
 
     def check_func(self):
-        if not self.analytic_func:
+        if not self.analytic_func and not self.batch_func:
             raise NotImplementedError
     
     def stream_camera(self, camera_id):
         """ Stream an attached camera to the analytic. """
         self.check_func()
         cap = cv2.VideoCapture(int(camera_id))
-        frame_num = 0
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                logging.info("No frame available")
-                break
-            self.process_frame(frame, timestamp=time.time(), frame_num=frame_num)
-            frame_num += 1
+        self.stream_capture(cap)
 
     def stream_image(self, imagefile):
         self.check_func()
@@ -107,34 +229,307 @@ class Streamer:
     def stream_video(self, videofile):
         self.check_func()
         cap = cv2.VideoCapture(videofile)
-        frame_num = 0
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                logging.info("No frame available")
-                break
-            self.process_frame(frame, timestamp=time.time(), frame_num=frame_num)
-            frame_num += 1
+        self.stream_capture(cap)
+
+    def stream_capture(self, cap):
+        """ Run every frame of an opened cv2.VideoCapture through the analytic and output function
+        (or only the newest frames in real-time mode). """
+        frames = self.read_frames(cap)
+        if self.realtime:
+            frames = LatestFrameGrabber(cap, target_fps=self.target_fps, max_latency_ms=self.max_latency_ms)
+        elif self.stride > 1 or self.sample_fps or self.time_ranges:
+            sampler = FrameSampler(stride=self.stride, sample_fps=self.sample_fps, time_ranges=self.time_ranges)
+            frames = sampler.read(cap)
+        try:
+            self.stream_frames(frames)
+        finally:
+            cap.release()
+
+    def stream_sources(self, sources):
+        """ Stream several cameras, video files or URLs through the one analytic at once. Frames
+        from all sources are interleaved as they are read and tagged with their source_id. """
+        self.check_func()
+        self.stream_frames(MultiSource(sources, queue_size=self.queue_size))
+
+    def stream_frames(self, frames):
+        """ Process an iterable of (frame, timestamp, frame_num[, source_id]) tuples, serially,
+        pipelined or batched depending on how the streamer was configured. """
+        frames = (item if len(item) == 4 else tuple(item) + (None,) for item in frames)
+        self._frames_read = self._frames_output = 0
+        frames = self._counted(self.metrics.timed("decode", frames))
+        # In real-time mode frames must not queue up ahead of the analytic
+        queue_size = 1 if self.realtime else self.queue_size
+        if self.pipelined and (self.workers or self.batch_func):
+            # Only decode gets its own thread; the pool/batcher already overlaps the analytic
+            frames = Pipeline([], queue_size=queue_size, name="capture").run(frames)
+        if self.workers:
+            if self.tracker is not None:
+                logging.warning("Each worker only sees some of the frames, so tracking will be unreliable")
+            pool = WorkerPool(self, self.workers, init_func=self.init_func, shared_memory=self.shared_memory,
+                              buffers=self._buffers)
+            results = pool.run(frames)
+        elif self.batch_func:
+            results = self._stream_batched(frames)
+        elif self.pipelined:
+            results = Pipeline([self._analyze_item], queue_size=queue_size, name="streamer").run(frames)
+        else:
+            results = (self._analyze_item(item) for item in frames)
+        last_frame_nums = {}
+        last_output = None
+        for frame, req, resp in self.metrics.timed("wait", results):
+            if self.realtime:
+                # Frame numbers count every frame captured, so gaps are frames that were skipped
+                last = last_frame_nums.get(req.source_id, -1)
+                resp.dropped_frames = max(0, req.frame_num - last - 1)
+                last_frame_nums[req.source_id] = req.frame_num
+                self.dropped_frames += resp.dropped_frames
+            self._frames_output += 1
+            if self.output_func:
+                with self.metrics.time("output"):
+                    self.output_func(frame, req, resp)
+            now = time.perf_counter_ns()
+            if last_output is not None:
+                self.metrics.record("frame", now - last_output)
+            last_output = now
+
+    def _counted(self, frames):
+        for item in frames:
+            self._frames_read += 1
+            yield item
+
+    def queue_depth(self):
+        """ The backlog of stream_frames(): frames read but not yet handed to the output function,
+        whether they wait in a pipeline queue, a batch or a worker. """
+        return max(0, self._frames_read - self._frames_output)
+
+    def _stream_batched(self, frames):
+        """ Submit frames to the batch processor without waiting on each one, yielding results
+        in submission order as their batches complete. Frames the tracker, motion gate or
+        result cache can answer for are never submitted.
+
+        The tracker works from the results of a source's last analyzed frame, so with it on a
+        frame first waits for the frames of its own source still in a batch; frames of other
+        sources keep filling the batches meanwhile. The motion gate only waits like that for
+        frames it skips, which carry those results forward. """
+        batcher = self.batcher()
+        pending = collections.deque()
+        ready = []
+
+        def wait(source_id):
+            # Finish everything up to the source's last frame still pending
+            last = [i for i, item in enumerate(pending) if item[4] == source_id]
+            for _ in range(last[-1] + 1 if last else 0):
+                ready.append(self._completed(pending.popleft()))
+
+        for frame, timestamp, frame_num, source_id in frames:
+            # Finished results go out (and into the cache) before the next frame is looked up
+            while pending and pending[0][3].done():
+                yield self._completed(pending.popleft())
+            req, resp = self.new_request(timestamp=timestamp, frame_num=frame_num, source_id=source_id)
+            if self.tracker is not None:
+                wait(req.source_id)
+            stage, key = self._shortcut(frame, req, resp, wait=wait)
+            for item in ready:
+                yield item
+            del ready[:]
+            if stage is None:
+                future = batcher.submit(frame, req, resp)
+            else:
+                future = Future()
+                future.set_result((req, resp))
+            pending.append((frame, stage, key, future, req.source_id))
+            while len(pending) >= 2 * self.batch_size:
+                yield self._completed(pending.popleft())
+        while pending:
+            yield self._completed(pending.popleft())
+
+    def _completed(self, item):
+        frame, stage, key, future, _ = item
+        req, resp = future.result()
+        self._remember(frame, req, resp, stage, key)
+        return frame, req, resp
+
+    def __getstate__(self):
+        # Worker processes get the configuration, not the parent's threads
+        state = self.__dict__.copy()
+        state["_batcher"] = None
+        return state
+
+    def batcher(self):
+        """ Returns the BatchProcessor feeding `batch_func`, starting it on first use. """
+        if self._batcher is None:
+            self._batcher = BatchProcessor(self.batch_func, batch_size=self.batch_size, max_wait_ms=self.max_wait_ms,
+                                           metrics=self.metrics)
+        return self._batcher
+
+    def read_frames(self, cap, source_id=None):
+        """ Yield (frame, timestamp, frame_num, source_id) for each frame read from an opened capture.
+        With shared-memory workers, frames are decoded straight into the ring the workers read. """
+        buffers = self._buffers if self.workers and self.shared_memory else None
+        return read_capture(cap, source_id=source_id, buffers=buffers)
 
     def register_output_func(self, output_func):
         self.output_func = output_func
 
-    def process_frame(self, frame, timestamp=None, frame_num=None):
-        """ Process a video frame with the registered analytic """
-        req = analytic_pb2.InputFrame(frame_num=frame_num, timestamp=timestamp)
+    def new_request(self, timestamp=None, frame_num=None, source_id=None):
+        """ Create the InputFrame/FrameData pair handed to the analytic for one frame """
+        req = analytic_pb2.InputFrame(frame_num=frame_num, timestamp=timestamp, source_id=source_id)
         resp = analytic_pb2.FrameData()
+        return req, resp
+
+    def analyze_frame(self, frame, timestamp=None, frame_num=None, req=None, source_id=None):
+        """ Run the registered analytic on a frame without calling the output function. An
+        InputFrame received from a client can be passed as `req` in place of timestamp/frame_num. """
+        if req is None:
+            req, resp = self.new_request(timestamp=timestamp, frame_num=frame_num, source_id=source_id)
+        else:
+            resp = analytic_pb2.FrameData()
+        stage, key = self._shortcut(frame, req, resp)
+        if stage is None:
+            req, resp = self._analyze(frame, req, resp)
+        self._remember(frame, req, resp, stage, key)
+        return req, resp
+
+    def _shortcut(self, frame, req, resp, wait=None):
+        """ Fill in `resp` without the analytic if the tracker, motion gate or result cache can.
+        Returns (stage, key): the stage that answered ("track", "motion" or "cache", or None to
+        run the analytic) and the cache key to store the analytic's results under. `wait` is
+        called with the source_id when the motion gate skips a frame while the results of the
+        source's last analyzed frame are still pending. """
+        answer, stage, key = None, None, None
+        if self.tracker is not None:
+            start = time.perf_counter_ns()
+            answer, stage = self.tracker.track(frame, req.source_id), "track"
+            self.metrics.record("track", time.perf_counter_ns() - start)
+        if answer is None and self.motion is not None:
+            start = time.perf_counter_ns()
+            skip = not self.motion.changed(frame, req.source_id)
+            self.metrics.record("motion", time.perf_counter_ns() - start)
+            if skip and wait is not None and self.motion.pending(req.source_id):
+                wait(req.source_id)
+            answer, stage = self.motion.carry(req.source_id) if skip else None, "motion"
+        if answer is None and self.cache is not None:
+            start = time.perf_counter_ns()
+            (key, answer), stage = self.cache.lookup(frame), "cache"
+            self.metrics.record("cache", time.perf_counter_ns() - start)
+        if answer is None:
+            return None, key
         resp.start_time_millis = int(round(time.time()*1000))
-        self.analytic_func(frame, req, resp)
+        resp.MergeFrom(answer)
+        resp.end_time_millis = resp.start_time_millis
+        return stage, key
+
+    def _remember(self, frame, req, resp, stage, key):
+        # Every stage that didn't answer for the frame learns its results
+        if stage is None and key is not None:
+            self.cache.add(key, resp)
+        if stage in (None, "cache") and self.motion is not None:
+            self.motion.update(req.source_id, resp)
+        if stage != "track" and self.tracker is not None:
+            self.tracker.update(frame, req.source_id, resp)
+
+    def _analyze(self, frame, req, resp):
+        if self.batch_func:
+            # Concurrent callers (e.g. server threads) share batches
+            return self.batcher().submit(frame, req, resp).result()
+        resp.start_time_millis = int(round(time.time()*1000))
+        start = time.perf_counter_ns()
+        if self.profiler:
+            self.profiler.call(self.analytic_func, frame, req, resp)
+        else:
+            self.analytic_func(frame, req, resp)
+        self.metrics.record("analytic", time.perf_counter_ns() - start)
         resp.end_time_millis = int(round(time.time()*1000))
-        if self.output_func:
-            self.output_func(frame, req, resp)
         return req, resp
+
+    def stats(self):
+        """ Latency of each stage so far: a dict of stage name to count and mean/p50/p95/p99/max
+        in milliseconds. See Metrics. """
+        return self.metrics.stats()
+
+    def _analyze_item(self, item):
+        frame, timestamp, frame_num, source_id = item
+        req, resp = self.analyze_frame(frame, timestamp=timestamp, frame_num=frame_num, source_id=source_id)
+        return frame, req, resp
+
+    def process_frame(self, frame, timestamp=None, frame_num=None, req=None):
+        """ Process a video frame with the registered analytic """
+        req, resp = self.analyze_frame(frame, timestamp=timestamp, frame_num=frame_num, req=req)
+        self._output(frame, req, resp)
+        return req, resp
+
+    def submit_frame(self, frame, req):
+        """ Start processing a frame (with an InputFrame `req`) without waiting for the analytic,
+        so that frames submitted one after another share batches of `batch_func`. Returns a
+        Future to pass to finish_frame(). Without `batch_func`, or with the tracker on (which
+        needs each frame's results before the next), the frame is analyzed right away. """
+        future = Future()
+        try:
+            if self.tracker is not None or not self.batch_func:
+                future.set_result(self.analyze_frame(frame, req=req))
+                return future
+            resp = analytic_pb2.FrameData()
+            stage, key = self._shortcut(frame, req, resp)
+            if stage is not None:
+                self._remember(frame, req, resp, stage, key)
+                future.set_result((req, resp))
+                return future
+        except Exception as e:
+            future.set_exception(e)
+            return future
+
+        def done(batched):
+            try:
+                req, resp = batched.result()
+                self._remember(frame, req, resp, stage, key)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result((req, resp))
+        self.batcher().submit(frame, req, resp).add_done_callback(done)
+        return future
+
+    def finish_frame(self, frame, future):
+        """ Wait for a frame from submit_frame() and call the output function, returning (req,
+        resp) as process_frame() does. Raises whatever the analytic raised. """
+        req, resp = future.result()
+        self._output(frame, req, resp)
+        return req, resp
+
+    def _output(self, frame, req, resp):
+        if self.output_func:
+            with self.metrics.time("output"):
+                self.output_func(frame, req, resp)
         
-    def serve(self, port=50051):
-        analytic_server = AnalyticServer(name=__name__, port=port)
-        analytic_server.register_process_func(self.process_frame)
-        analytic_server.register_output_func(self.output_func)
-        analytic_server.run()  
+    def serve(self, port=50051, transport="http", host="::", max_workers=10, window=8, metrics_port=None,
+              fanout=None, results_func=None, store=None):
+        """ Serve the analytic over the network. `transport="grpc"` runs the Analytic service
+        from analytic.proto on a pool of `max_workers` threads, keeping up to `window` frames of
+        each StreamVideoFrame call in flight; "http" runs the Flask server (see http_server()),
+        which also serves the stage latencies at /metrics. `metrics_port` serves /metrics on a port of its own.
+
+        `fanout` is a FanoutEngine (or a list of AnalyticData) that FanoutFrame calls are sent
+        on to; their CompositeResults go to `results_func(request, results)`, which by default
+        logs them. Results are kept in `store` (a ResultStore) for GetFrame, if given. """
+        if metrics_port:
+            serve_metrics(self.metrics, host=host, port=metrics_port)
+        if transport == "grpc":
+            if fanout is not None and not isinstance(fanout, FanoutEngine):
+                fanout = FanoutEngine(fanout)
+            serve_grpc(self, host=host, port=port, max_workers=max_workers, window=window,
+                       fanout=fanout, results_func=results_func or log_results, store=store)
+            return
+        self.http_server(host=host, port=port, store=store).run()
+
+    def http_server(self, host="::", port=50051, store=None):
+        """ The (not yet running) Flask AnalyticServer for serve(transport="http"): POST /process
+        answers a serialized InputFrame like ProcessVideoFrame does, and GET /metrics serves
+        the stage latencies. """
+        analytic_server = AnalyticServer(name=__name__, host=host, port=port)
+        analytic_server.register_process_func(StreamerServicer(self, store=store).process)
+        analytic_server.add_endpoint("/metrics", "metrics",
+                                     lambda: Response(self.metrics.prometheus(), mimetype="text/plain"))
+        return analytic_server
 
     def run(self, parameters=[], init_func=None):
         """ The run function starts a process to send image/video data to the analtyic. Arguments can
@@ -158,6 +553,11 @@ class StreamerParam:
         if self.name[:2] != "--":
             self.name = "--{!s}".format(name)
 
+def parse_time_range(text):
+    """ Parse "START-END" (seconds, END optional) into a (start, end) tuple """
+    start, _, end = text.partition("-")
+    return float(start or 0), float(end) if end else None
+
 class CLI:
     def __init__(self, streamer, options=[], init_func=None):
         """Creates a basic click CLI that can be extended with user options/arguments"""
@@ -167,22 +567,104 @@ class CLI:
             ctx.obj.streamer = streamer
             ctx.obj.streamer.params = kwargs
 
+        def init(streamer):
+            # Worker processes run the init function themselves, so the parent skips it
+            if self.init_func and not streamer.workers:
+                self.init_func(streamer)
+
+        def instrument(streamer, stats_interval, profile_frames, profile_path, cache_size, cache_mode, cache_threshold,
+                       motion_threshold, motion_max_skip, motion_method, track_interval, track_method):
+            # Applies the perf_opts shared by the streaming commands
+            if stats_interval:
+                streamer.metrics.log_interval = stats_interval
+            if profile_frames:
+                streamer.profiler = Profiler(profile_frames, path=profile_path)
+            if cache_size:
+                streamer.cache = ResultCache(cache_size, mode=cache_mode, threshold=cache_threshold)
+            if motion_threshold is not None:
+                streamer.motion = MotionGate(motion_threshold, max_skip=motion_max_skip, method=motion_method)
+            if track_interval:
+                streamer.tracker = Tracker(track_interval, method=track_method)
+
+        def stream_to(streamer, output, output_fps, results, stream):
+            # Save the annotated frames and/or results instead of calling the usual output function
+            sinks = []
+            if output:
+                sinks.append(VideoWriter(output, fps=output_fps))
+            if results:
+                sinks.append(result_writer(results))
+            if not sinks:
+                stream()
+                return
+            if len(sinks) == 1:
+                streamer.register_output_func(sinks[0])
+            else:
+                streamer.register_output_func(lambda frame, req, resp: [sink(frame, req, resp) for sink in sinks])
+            try:
+                stream()
+            finally:
+                for sink in sinks:
+                    sink.close()
+
         def image(ctx, imagefile):
             streamer = ctx.obj.streamer
-            self.init_func(streamer)
+            if self.init_func:
+                self.init_func(streamer)
             streamer.stream_image(imagefile)
 
-        def video(ctx, videofile):
+        def video(ctx, videofile, pipelined, workers, shared_memory, stride, sample_fps, time_range, output, output_fps, results,
+                  **perf):
+            streamer = ctx.obj.streamer
+            instrument(streamer, **perf)
+            streamer.stride = stride or streamer.stride
+            streamer.sample_fps = sample_fps or streamer.sample_fps
+            if time_range:
+                streamer.time_ranges = [parse_time_range(r) for r in time_range]
+            streamer.pipelined = streamer.pipelined or pipelined
+            streamer.workers = workers or streamer.workers
+            streamer.shared_memory = streamer.shared_memory or shared_memory
+            init(streamer)
+            stream_to(streamer, output, output_fps, results, lambda: streamer.stream_video(videofile))
+
+        def camera(ctx, camera_id, pipelined, realtime, target_fps, max_latency_ms, output, output_fps, results,
+                   **perf):
+            streamer = ctx.obj.streamer
+            instrument(streamer, **perf)
+            streamer.pipelined = streamer.pipelined or pipelined
+            streamer.realtime = streamer.realtime or realtime
+            streamer.target_fps = target_fps or streamer.target_fps
+            streamer.max_latency_ms = max_latency_ms or streamer.max_latency_ms
+            init(streamer)
+            stream_to(streamer, output, output_fps, results, lambda: streamer.stream_camera(camera_id))
+
+        def multi(ctx, sources, pipelined, workers, **perf):
             streamer = ctx.obj.streamer
-            self.init_func(streamer)
-            streamer.stream_video(videofile)
+            instrument(streamer, **perf)
+            streamer.pipelined = streamer.pipelined or pipelined
+            streamer.workers = workers or streamer.workers
+            if len(set(sources)) < len(sources):
+                raise click.BadParameter("each source may only be given once", param_hint="SOURCES")
+            init(streamer)
+            streamer.stream_sources(list(sources))
 
-        def camera(ctx, camera_id):
+        def serve(ctx, port, transport, max_workers, window, metrics_port, fanout, fanout_timeout,
+                  store_entries, store_mb, store_ttl, **perf):
             streamer = ctx.obj.streamer
-            self.init_func(streamer)
-            streamer.stream_camera(camera_id)
+            instrument(streamer, **perf)
+            if self.init_func:
+                self.init_func(streamer)
+            engine = None
+            if fanout:
+                engine = FanoutEngine([parse_target(t) for t in fanout], timeout=fanout_timeout)
+            store = None
+            if store_entries:
+                store = ResultStore(max_entries=store_entries, max_bytes=int(store_mb * 1024 * 1024), ttl=store_ttl)
+            streamer.serve(port=port, transport=transport, max_workers=max_workers, window=window,
+                           metrics_port=metrics_port, fanout=engine, store=store)
 
         initialize = click.pass_context(initialize)
+        serve = click.pass_context(serve)
+        multi = click.pass_context(multi)
         image = click.pass_context(image)
         video = click.pass_context(video)
         camera = click.pass_context(camera)
@@ -196,13 +678,89 @@ class CLI:
         img_cmd = click.Command(name="image", callback=image, params=[image_arg])
         self.main.add_command(img_cmd, name="image")
 
+        pipelined_opt = click.Option(param_decls=["--pipelined"], is_flag=True, default=False,
+                                     help="Run decode, analytic and output on separate threads")
+
+        perf_opts = [click.Option(param_decls=["--stats_interval"], default=None, type=float,
+                                  help="Log the latency of each stage every this many seconds"),
+                     click.Option(param_decls=["--profile_frames"], default=0, type=int,
+                                  help="Profile the analytic with cProfile for this many frames"),
+                     click.Option(param_decls=["--profile_path"], default=None, type=str,
+                                  help="Save the profile to this file (for pstats or snakeviz)"),
+                     click.Option(param_decls=["--cache_size"], default=0, type=int,
+                                  help="Reuse the results of this many recent frames for duplicate frames"),
+                     click.Option(param_decls=["--cache_mode"], default="exact", type=click.Choice(["exact", "perceptual"]),
+                                  help="Match identical frames, or frames that look the same"),
+                     click.Option(param_decls=["--cache_threshold"], default=2.0, type=float,
+                                  help="Largest mean difference in gray levels for a perceptual match"),
+                     click.Option(param_decls=["--motion_threshold"], default=None, type=float,
+                                  help="Only analyze frames where more than this fraction of the scene changed"),
+                     click.Option(param_decls=["--motion_max_skip"], default=30, type=int,
+                                  help="Analyze at least every this many frames while the scene is still"),
+                     click.Option(param_decls=["--motion_method"], default="diff", type=click.Choice(["diff", "background"]),
+                                  help="Detect changes by frame differencing or background subtraction"),
+                     click.Option(param_decls=["--track_interval"], default=0, type=int,
+                                  help="Run the analytic on every this many frames and track its ROIs in between"),
+                     click.Option(param_decls=["--track_method"], default="flow", type=click.Choice(["flow", "iou"]),
+                                  help="Track ROIs with optical flow or at constant velocity")]
+
+        output_opts = [click.Option(param_decls=["--output"], default=None, type=str,
+                                    help="Save the annotated frames to this video file"),
+                       click.Option(param_decls=["--output_fps"], default=30.0, type=float,
+                                    help="Frame rate of the saved video"),
+                       click.Option(param_decls=["--results"], default=None, type=str,
+                                    help="Save the results to a .jsonl, .pb (length-delimited CompositeFrames) or .parquet file")]
+
         video_arg = click.Argument(param_decls=["videofile"], type=str)
-        vid = click.Command(name="video", callback=video, params=[video_arg])
+        workers_opt = click.Option(param_decls=["--workers"], default=0, type=int,
+                                   help="Number of analytic worker processes (0 runs in-process)")
+        shm_opt = click.Option(param_decls=["--shared-memory", "shared_memory"], is_flag=True, default=False,
+                               help="Pass frames to worker processes through shared memory")
+        sample_opts = [click.Option(param_decls=["--stride"], default=None, type=int,
+                                    help="Analyze every Nth frame"),
+                       click.Option(param_decls=["--sample_fps"], default=None, type=float,
+                                    help="Analyze this many frames per second of video"),
+                       click.Option(param_decls=["--time_range"], multiple=True, type=str,
+                                    help="Only analyze START-END seconds of the video (repeatable)")]
+        vid = click.Command(name="video", callback=video,
+                            params=[video_arg, pipelined_opt, workers_opt, shm_opt] + sample_opts + output_opts + perf_opts)
         self.main.add_command(vid, name="video")
 
         camera_arg = click.Option(param_decls=["--camera_id"], default=0)
-        cam = click.Command(name="camera", callback=camera, params=[camera_arg])
+        realtime_opts = [click.Option(param_decls=["--realtime"], is_flag=True, default=False,
+                                      help="Always analyze the newest frame, dropping any the analytic can't keep up with"),
+                         click.Option(param_decls=["--target_fps"], default=None, type=float,
+                                      help="Maximum frames per second to analyze in real-time mode"),
+                         click.Option(param_decls=["--max_latency_ms"], default=None, type=float,
+                                      help="Skip frames older than this in real-time mode")]
+        cam = click.Command(name="camera", callback=camera, params=[camera_arg, pipelined_opt] + realtime_opts + output_opts + perf_opts)
         self.main.add_command(cam, name="camera")
+
+        sources_arg = click.Argument(param_decls=["sources"], nargs=-1, required=True, type=str)
+        mult = click.Command(name="multi", callback=multi, params=[sources_arg, pipelined_opt, workers_opt] + perf_opts,
+                             help="Process several camera IDs, video files or stream URLs with one analytic")
+        self.main.add_command(mult, name="multi")
+
+        serve_opts = [click.Option(param_decls=["--port"], default=50051, type=int),
+                      click.Option(param_decls=["--transport"], default="grpc", type=click.Choice(["grpc", "http"])),
+                      click.Option(param_decls=["--max_workers"], default=10, type=int,
+                                   help="Number of threads handling requests"),
+                      click.Option(param_decls=["--window"], default=8, type=int,
+                                   help="Frames in flight per streaming call"),
+                      click.Option(param_decls=["--metrics_port"], default=None, type=int,
+                                   help="Serve stage latencies for Prometheus at /metrics on this port"),
+                      click.Option(param_decls=["--fanout"], multiple=True, type=str,
+                                   help="NAME=ADDR of an analytic that FanoutFrame sends frames to (repeatable)"),
+                      click.Option(param_decls=["--fanout_timeout"], default=None, type=float,
+                                   help="Seconds to wait for each fanout analytic"),
+                      click.Option(param_decls=["--store_entries"], default=10000, type=int,
+                                   help="Results kept for GetFrame (0 disables GetFrame)"),
+                      click.Option(param_decls=["--store_mb"], default=64.0, type=float,
+                                   help="Memory cap for stored results in MiB"),
+                      click.Option(param_decls=["--store_ttl"], default=None, type=float,
+                                   help="Seconds to keep stored results")]
+        srv = click.Command(name="serve", callback=serve, params=serve_opts + perf_opts)
+        self.main.add_command(srv, name="serve")
     
     def run(self):
         self.main(obj=Context())
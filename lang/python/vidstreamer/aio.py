@@ -0,0 +1,168 @@
+import asyncio
+import collections
+import functools
+import logging
+import time
+
+import cv2
+import grpc
+from google.rpc import code_pb2
+
+from . import analytic_pb2, analytic_pb2_grpc, default_output_func, render
+from .frames import decode_frame
+from .server import bind_address, composite_frame, status_frame_data
+
+
+class AsyncStreamer:
+    """ An asyncio counterpart to Streamer for running many streams in one process.
+
+    The analytic and output functions may be coroutine functions, which are awaited on the event
+    loop, or plain functions, which run on `executor` (the loop's default executor if None) so
+    that blocking decode/inference never stalls the loop. Capture reads also run on the executor,
+    and the next frame of a stream is read while the current one is being analyzed. """
+
+    def __init__(self, func=None, output_func="default", executor=None):
+        self.analytic_func = func
+        self.output_func = default_output_func
+        if output_func == "render":
+            self.output_func = render
+        self.executor = executor
+
+    def register_output_func(self, output_func):
+        self.output_func = output_func
+
+    def check_func(self):
+        if not self.analytic_func:
+            raise NotImplementedError
+
+    async def _call(self, func, *args):
+        if asyncio.iscoroutinefunction(func):
+            return await func(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args))
+
+    async def analyze_frame(self, frame, timestamp=None, frame_num=None, req=None):
+        """ Run the registered analytic on a frame without calling the output function """
+        if req is None:
+            req = analytic_pb2.InputFrame(frame_num=frame_num, timestamp=timestamp)
+        resp = analytic_pb2.FrameData()
+        resp.start_time_millis = int(round(time.time()*1000))
+        await self._call(self.analytic_func, frame, req, resp)
+        resp.end_time_millis = int(round(time.time()*1000))
+        return req, resp
+
+    async def process_frame(self, frame, timestamp=None, frame_num=None, req=None):
+        """ Process a video frame with the registered analytic """
+        req, resp = await self.analyze_frame(frame, timestamp=timestamp, frame_num=frame_num, req=req)
+        if self.output_func:
+            await self._call(self.output_func, frame, req, resp)
+        return req, resp
+
+    async def stream_camera(self, camera_id):
+        """ Stream an attached camera to the analytic, yielding a CompositeFrame per frame. """
+        async for result in self._stream_source(int(camera_id)):
+            yield result
+
+    async def stream_video(self, videofile):
+        """ Stream a video file to the analytic, yielding a CompositeFrame per frame. """
+        async for result in self._stream_source(videofile):
+            yield result
+
+    async def _stream_source(self, source):
+        self.check_func()
+        loop = asyncio.get_running_loop()
+        cap = await loop.run_in_executor(self.executor, cv2.VideoCapture, source)
+        try:
+            async for result in self.stream_capture(cap):
+                yield result
+        finally:
+            await loop.run_in_executor(self.executor, cap.release)
+
+    async def stream_capture(self, cap):
+        """ Yield a CompositeFrame for each frame of an opened cv2.VideoCapture. """
+        loop = asyncio.get_running_loop()
+        frame_num = 0
+        read = loop.run_in_executor(self.executor, cap.read)
+        try:
+            while cap.isOpened():
+                ret, frame = await read
+                if not ret:
+                    logging.info("No frame available")
+                    break
+                timestamp = time.time()
+                read = loop.run_in_executor(self.executor, cap.read)
+                req, resp = await self.process_frame(frame, timestamp=timestamp, frame_num=frame_num)
+                yield analytic_pb2.CompositeFrame(frame=req, data=resp)
+                frame_num += 1
+        finally:
+            if not read.done():
+                await asyncio.wait([read])
+
+
+class AsyncStreamerServicer(analytic_pb2_grpc.AnalyticServicer):
+    """ Implements the Analytic service for grpc.aio on top of an AsyncStreamer. Each
+    StreamVideoFrame call analyzes up to `window` frames concurrently and returns results in
+    request order; it stops reading requests while the window is full. """
+
+    def __init__(self, streamer, name="vidstreamer", addr="", window=8):
+        self.streamer = streamer
+        self.analytic = analytic_pb2.AnalyticData(name=name, addr=addr)
+        self.window = window
+
+    async def ProcessVideoFrame(self, request, context):
+        frame = await self._decode(request)
+        if frame is None:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Could not decode frame {!s}".format(request.frame_num))
+        return await self.process(frame, request)
+
+    async def StreamVideoFrame(self, request_iterator, context):
+        pending = collections.deque()
+        try:
+            async for request in request_iterator:
+                pending.append(asyncio.ensure_future(self._process_request(request)))
+                if len(pending) >= self.window:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def CheckStatus(self, request, context):
+        return analytic_pb2.AnalyticStatus(status="SERVING")
+
+    async def _decode(self, request):
+        return await asyncio.get_running_loop().run_in_executor(self.streamer.executor, decode_frame, request.frame)
+
+    async def _process_request(self, request):
+        frame = await self._decode(request)
+        if frame is None:
+            resp = status_frame_data(code_pb2.INVALID_ARGUMENT, "Could not decode frame {!s}".format(request.frame_num))
+            return composite_frame(request, resp, self.analytic)
+        return await self.process(frame, request)
+
+    async def process(self, frame, request):
+        """ Run a decoded frame through the streamer and package the result as a CompositeFrame.
+        A failing analytic is reported in `data.status` rather than failing the call. """
+        try:
+            req, resp = await self.streamer.process_frame(frame, req=request)
+        except Exception as e:
+            logging.exception("Analytic failed on frame {!s}".format(request.frame_num))
+            resp = status_frame_data(code_pb2.INTERNAL, str(e))
+        return composite_frame(request, resp, self.analytic)
+
+
+def create_aio_server(streamer, host="::", port=50051, window=8):
+    """ Build (but don't start) a grpc.aio server for an AsyncStreamer. Returns the server and
+    the bound port. Must be called with an event loop running. """
+    server = grpc.aio.server()
+    analytic_pb2_grpc.add_AnalyticServicer_to_server(AsyncStreamerServicer(streamer, window=window), server)
+    bound = server.add_insecure_port(bind_address(host, port))
+    return server, bound
+
+
+async def serve_aio(streamer, host="::", port=50051, window=8):
+    """ Run the grpc.aio server until it is terminated. """
+    server, bound = create_aio_server(streamer, host=host, port=port, window=window)
+    await server.start()
+    logging.info("gRPC (asyncio) server running on {!s}:{!s}".format(host, bound))
+    await server.wait_for_termination()
@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+
+import grpc
+from vidstreamer import analytic_pb2, analytic_pb2_grpc
+from .aio import AsyncStreamer, create_aio_server
+from .server_test import FakeCapture, encoded_frame
+
+
+async def async_analytic(frame, req, resp):
+    await asyncio.sleep(0)
+    resp.roi.add().classification = str(int(frame.flat[0]))
+
+
+def sync_analytic(frame, req, resp):
+    resp.roi.add().classification = "{!s}x{!s}".format(frame.shape[0], frame.shape[1])
+
+
+class TestAsyncStreamer(unittest.IsolatedAsyncioTestCase):
+
+    async def test_stream_capture(self):
+        seen = []
+
+        async def output(frame, req, resp):
+            seen.append(req.frame_num)
+
+        streamer = AsyncStreamer(func=async_analytic)
+        streamer.register_output_func(output)
+        results = [r async for r in streamer.stream_capture(FakeCapture(10))]
+        self.assertEqual([r.frame.frame_num for r in results], list(range(10)))
+        self.assertEqual([r.data.roi[0].classification for r in results], [str(i) for i in range(10)])
+        self.assertEqual(seen, list(range(10)))
+
+    async def test_concurrent_streams(self):
+        streamer = AsyncStreamer(func=sync_analytic)
+        streamer.register_output_func(None)
+
+        async def collect(cap):
+            return [r.frame.frame_num async for r in streamer.stream_capture(cap)]
+
+        results = await asyncio.gather(*[collect(FakeCapture(5)) for _ in range(20)])
+        self.assertEqual(results, [list(range(5))] * 20)
+
+    async def test_aio_server(self):
+        streamer = AsyncStreamer(func=sync_analytic)
+        streamer.register_output_func(None)
+        server, port = create_aio_server(streamer, host="localhost", port=0, window=3)
+        await server.start()
+        try:
+            async with grpc.aio.insecure_channel("localhost:{!s}".format(port)) as channel:
+                stub = analytic_pb2_grpc.AnalyticStub(channel)
+                result = await stub.ProcessVideoFrame(encoded_frame(4))
+                self.assertEqual(result.data.roi[0].classification, "32x48")
+
+                frames = [encoded_frame(i) for i in range(8)]
+                frames.insert(3, analytic_pb2.InputFrame(frame_num=99))
+                results = [r async for r in stub.StreamVideoFrame(iter(frames))]
+                self.assertEqual([r.frame.frame_num for r in results], [0, 1, 2, 99, 3, 4, 5, 6, 7])
+                self.assertNotEqual(results[3].data.status.code, 0)
+        finally:
+            await server.stop(None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,10 @@
 # -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # source: vidstreamer/analytic.proto
-
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
 from google.protobuf import descriptor as _descriptor
-from google.protobuf import message as _message
-from google.protobuf import reflection as _reflection
+from google.protobuf import descriptor_pool as _descriptor_pool
 from google.protobuf import symbol_database as _symbol_database
 # @@protoc_insertion_point(imports)
 
@@ -14,775 +14,45 @@ _sym_db = _symbol_database.Default()
 from google.rpc import status_pb2 as google_dot_rpc_dot_status__pb2
 
 
-DESCRIPTOR = _descriptor.FileDescriptor(
-  name='vidstreamer/analytic.proto',
-  package='ace',
-  syntax='proto3',
-  serialized_options=None,
-  serialized_pb=b'\n\x1avidstreamer/analytic.proto\x12\x03\x61\x63\x65\x1a\x17google/rpc/status.proto\"\x1d\n\x05Point\x12\t\n\x01x\x18\x01 \x01(\x05\x12\t\n\x01y\x18\x02 \x01(\x05\"\xa3\x01\n\x10RegionOfInterest\x12\x1f\n\x03\x62ox\x18\x01 \x01(\x0b\x32\x10.ace.BoundingBoxH\x00\x12\x1e\n\x04mask\x18\x02 \x01(\x0b\x32\x0e.ace.PixelMaskH\x00\x12\x16\n\x0e\x63lassification\x18\x05 \x01(\t\x12\x12\n\nconfidence\x18\x03 \x01(\x02\x12\x12\n\nsupplement\x18\x04 \x01(\tB\x0e\n\x0clocalization\"&\n\tPixelMask\x12\x19\n\x05pixel\x18\x01 \x03(\x0b\x32\n.ace.Point\"G\n\x0b\x42oundingBox\x12\x1b\n\x07\x63orner1\x18\x01 \x01(\x0b\x32\n.ace.Point\x12\x1b\n\x07\x63orner2\x18\x02 \x01(\x0b\x32\n.ace.Point\"\x14\n\x05\x46rame\x12\x0b\n\x03img\x18\x01 \x01(\x0c\"r\n\nInputFrame\x12\x19\n\x05\x66rame\x18\x01 \x01(\x0b\x32\n.ace.Frame\x12\x11\n\tframe_num\x18\x02 \x01(\x03\x12\x11\n\ttimestamp\x18\x03 \x01(\x02\x12#\n\x08\x61nalytic\x18\x04 \x01(\x0b\x32\x11.ace.AnalyticData\"\x87\x01\n\tFrameData\x12\"\n\x03roi\x18\x01 \x03(\x0b\x32\x15.ace.RegionOfInterest\x12\x19\n\x11start_time_millis\x18\x03 \x01(\x03\x12\x17\n\x0f\x65nd_time_millis\x18\x04 \x01(\x03\x12\"\n\x06status\x18\x05 \x01(\x0b\x32\x12.google.rpc.Status\"4\n\x0c\x46rameRequest\x12$\n\tanalytics\x18\x01 \x03(\x0b\x32\x11.ace.AnalyticData\"\xb5\x01\n\x0c\x41nalyticData\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0c\n\x04\x61\x64\x64r\x18\x02 \x01(\t\x12\x14\n\x0crequires_gpu\x18\x03 \x01(\x08\x12\x12\n\noperations\x18\x04 \x03(\t\x12/\n\x07\x66ilters\x18\x05 \x03(\x0b\x32\x1e.ace.AnalyticData.FiltersEntry\x1a.\n\x0c\x46iltersEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"8\n\x10\x43ompositeResults\x12$\n\x07results\x18\x01 \x03(\x0b\x32\x13.ace.CompositeFrame\"s\n\x0e\x43ompositeFrame\x12\x1e\n\x05\x66rame\x18\x01 \x01(\x0b\x32\x0f.ace.InputFrame\x12\x1c\n\x04\x64\x61ta\x18\x02 \x01(\x0b\x32\x0e.ace.FrameData\x12#\n\x08\x61nalytic\x18\x03 \x01(\x0b\x32\x11.ace.AnalyticData\"\x07\n\x05\x45mpty\" \n\x0e\x41nalyticStatus\x12\x0e\n\x06status\x18\x01 \x01(\t2\x95\x02\n\x08\x41nalytic\x12<\n\x10StreamVideoFrame\x12\x0f.ace.InputFrame\x1a\x13.ace.CompositeFrame(\x01\x30\x01\x12\x39\n\x11ProcessVideoFrame\x12\x0f.ace.InputFrame\x1a\x13.ace.CompositeFrame\x12*\n\x0b\x46\x61noutFrame\x12\x0f.ace.InputFrame\x1a\n.ace.Empty\x12\x34\n\x08GetFrame\x12\x11.ace.FrameRequest\x1a\x15.ace.CompositeResults\x12.\n\x0b\x43heckStatus\x12\n.ace.Empty\x1a\x13.ace.AnalyticStatusb\x06proto3'
-  ,
-  dependencies=[google_dot_rpc_dot_status__pb2.DESCRIPTOR,])
-
-
-
-
-_POINT = _descriptor.Descriptor(
-  name='Point',
-  full_name='ace.Point',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='x', full_name='ace.Point.x', index=0,
-      number=1, type=5, cpp_type=1, label=1,
-      has_default_value=False, default_value=0,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='y', full_name='ace.Point.y', index=1,
-      number=2, type=5, cpp_type=1, label=1,
-      has_default_value=False, default_value=0,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=60,
-  serialized_end=89,
-)
-
-
-_REGIONOFINTEREST = _descriptor.Descriptor(
-  name='RegionOfInterest',
-  full_name='ace.RegionOfInterest',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='box', full_name='ace.RegionOfInterest.box', index=0,
-      number=1, type=11, cpp_type=10, label=1,
-      has_default_value=False, default_value=None,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='mask', full_name='ace.RegionOfInterest.mask', index=1,
-      number=2, type=11, cpp_type=10, label=1,
-      has_default_value=False, default_value=None,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='classification', full_name='ace.RegionOfInterest.classification', index=2,
-      number=5, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='confidence', full_name='ace.RegionOfInterest.confidence', index=3,
-      number=3, type=2, cpp_type=6, label=1,
-      has_default_value=False, default_value=float(0),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='supplement', full_name='ace.RegionOfInterest.supplement', index=4,
-      number=4, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-    _descriptor.OneofDescriptor(
-      name='localization', full_name='ace.RegionOfInterest.localization',
-      index=0, containing_type=None, fields=[]),
-  ],
-  serialized_start=92,
-  serialized_end=255,
-)
-
-
-_PIXELMASK = _descriptor.Descriptor(
-  name='PixelMask',
-  full_name='ace.PixelMask',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='pixel', full_name='ace.PixelMask.pixel', index=0,
-      number=1, type=11, cpp_type=10, label=3,
-      has_default_value=False, default_value=[],
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=257,
-  serialized_end=295,
-)
-
-
-_BOUNDINGBOX = _descriptor.Descriptor(
-  name='BoundingBox',
-  full_name='ace.BoundingBox',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='corner1', full_name='ace.BoundingBox.corner1', index=0,
-      number=1, type=11, cpp_type=10, label=1,
-      has_default_value=False, default_value=None,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='corner2', full_name='ace.BoundingBox.corner2', index=1,
-      number=2, type=11, cpp_type=10, label=1,
-      has_default_value=False, default_value=None,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=297,
-  serialized_end=368,
-)
-
-
-_FRAME = _descriptor.Descriptor(
-  name='Frame',
-  full_name='ace.Frame',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='img', full_name='ace.Frame.img', index=0,
-      number=1, type=12, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"",
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=370,
-  serialized_end=390,
-)
-
-
-_INPUTFRAME = _descriptor.Descriptor(
-  name='InputFrame',
-  full_name='ace.InputFrame',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='frame', full_name='ace.InputFrame.frame', index=0,
-      number=1, type=11, cpp_type=10, label=1,
-      has_default_value=False, default_value=None,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='frame_num', full_name='ace.InputFrame.frame_num', index=1,
-      number=2, type=3, cpp_type=2, label=1,
-      has_default_value=False, default_value=0,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='timestamp', full_name='ace.InputFrame.timestamp', index=2,
-      number=3, type=2, cpp_type=6, label=1,
-      has_default_value=False, default_value=float(0),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='analytic', full_name='ace.InputFrame.analytic', index=3,
-      number=4, type=11, cpp_type=10, label=1,
-      has_default_value=False, default_value=None,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=392,
-  serialized_end=506,
-)
-
-
-_FRAMEDATA = _descriptor.Descriptor(
-  name='FrameData',
-  full_name='ace.FrameData',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='roi', full_name='ace.FrameData.roi', index=0,
-      number=1, type=11, cpp_type=10, label=3,
-      has_default_value=False, default_value=[],
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='start_time_millis', full_name='ace.FrameData.start_time_millis', index=1,
-      number=3, type=3, cpp_type=2, label=1,
-      has_default_value=False, default_value=0,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='end_time_millis', full_name='ace.FrameData.end_time_millis', index=2,
-      number=4, type=3, cpp_type=2, label=1,
-      has_default_value=False, default_value=0,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='status', full_name='ace.FrameData.status', index=3,
-      number=5, type=11, cpp_type=10, label=1,
-      has_default_value=False, default_value=None,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=509,
-  serialized_end=644,
-)
-
-
-_FRAMEREQUEST = _descriptor.Descriptor(
-  name='FrameRequest',
-  full_name='ace.FrameRequest',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='analytics', full_name='ace.FrameRequest.analytics', index=0,
-      number=1, type=11, cpp_type=10, label=3,
-      has_default_value=False, default_value=[],
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=646,
-  serialized_end=698,
-)
-
-
-_ANALYTICDATA_FILTERSENTRY = _descriptor.Descriptor(
-  name='FiltersEntry',
-  full_name='ace.AnalyticData.FiltersEntry',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='key', full_name='ace.AnalyticData.FiltersEntry.key', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='value', full_name='ace.AnalyticData.FiltersEntry.value', index=1,
-      number=2, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=b'8\001',
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=836,
-  serialized_end=882,
-)
-
-_ANALYTICDATA = _descriptor.Descriptor(
-  name='AnalyticData',
-  full_name='ace.AnalyticData',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='name', full_name='ace.AnalyticData.name', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='addr', full_name='ace.AnalyticData.addr', index=1,
-      number=2, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='requires_gpu', full_name='ace.AnalyticData.requires_gpu', index=2,
-      number=3, type=8, cpp_type=7, label=1,
-      has_default_value=False, default_value=False,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='operations', full_name='ace.AnalyticData.operations', index=3,
-      number=4, type=9, cpp_type=9, label=3,
-      has_default_value=False, default_value=[],
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='filters', full_name='ace.AnalyticData.filters', index=4,
-      number=5, type=11, cpp_type=10, label=3,
-      has_default_value=False, default_value=[],
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[_ANALYTICDATA_FILTERSENTRY, ],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=701,
-  serialized_end=882,
-)
-
-
-_COMPOSITERESULTS = _descriptor.Descriptor(
-  name='CompositeResults',
-  full_name='ace.CompositeResults',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='results', full_name='ace.CompositeResults.results', index=0,
-      number=1, type=11, cpp_type=10, label=3,
-      has_default_value=False, default_value=[],
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=884,
-  serialized_end=940,
-)
-
-
-_COMPOSITEFRAME = _descriptor.Descriptor(
-  name='CompositeFrame',
-  full_name='ace.CompositeFrame',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='frame', full_name='ace.CompositeFrame.frame', index=0,
-      number=1, type=11, cpp_type=10, label=1,
-      has_default_value=False, default_value=None,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='data', full_name='ace.CompositeFrame.data', index=1,
-      number=2, type=11, cpp_type=10, label=1,
-      has_default_value=False, default_value=None,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='analytic', full_name='ace.CompositeFrame.analytic', index=2,
-      number=3, type=11, cpp_type=10, label=1,
-      has_default_value=False, default_value=None,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=942,
-  serialized_end=1057,
-)
-
-
-_EMPTY = _descriptor.Descriptor(
-  name='Empty',
-  full_name='ace.Empty',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=1059,
-  serialized_end=1066,
-)
-
-
-_ANALYTICSTATUS = _descriptor.Descriptor(
-  name='AnalyticStatus',
-  full_name='ace.AnalyticStatus',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='status', full_name='ace.AnalyticStatus.status', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=1068,
-  serialized_end=1100,
-)
-
-_REGIONOFINTEREST.fields_by_name['box'].message_type = _BOUNDINGBOX
-_REGIONOFINTEREST.fields_by_name['mask'].message_type = _PIXELMASK
-_REGIONOFINTEREST.oneofs_by_name['localization'].fields.append(
-  _REGIONOFINTEREST.fields_by_name['box'])
-_REGIONOFINTEREST.fields_by_name['box'].containing_oneof = _REGIONOFINTEREST.oneofs_by_name['localization']
-_REGIONOFINTEREST.oneofs_by_name['localization'].fields.append(
-  _REGIONOFINTEREST.fields_by_name['mask'])
-_REGIONOFINTEREST.fields_by_name['mask'].containing_oneof = _REGIONOFINTEREST.oneofs_by_name['localization']
-_PIXELMASK.fields_by_name['pixel'].message_type = _POINT
-_BOUNDINGBOX.fields_by_name['corner1'].message_type = _POINT
-_BOUNDINGBOX.fields_by_name['corner2'].message_type = _POINT
-_INPUTFRAME.fields_by_name['frame'].message_type = _FRAME
-_INPUTFRAME.fields_by_name['analytic'].message_type = _ANALYTICDATA
-_FRAMEDATA.fields_by_name['roi'].message_type = _REGIONOFINTEREST
-_FRAMEDATA.fields_by_name['status'].message_type = google_dot_rpc_dot_status__pb2._STATUS
-_FRAMEREQUEST.fields_by_name['analytics'].message_type = _ANALYTICDATA
-_ANALYTICDATA_FILTERSENTRY.containing_type = _ANALYTICDATA
-_ANALYTICDATA.fields_by_name['filters'].message_type = _ANALYTICDATA_FILTERSENTRY
-_COMPOSITERESULTS.fields_by_name['results'].message_type = _COMPOSITEFRAME
-_COMPOSITEFRAME.fields_by_name['frame'].message_type = _INPUTFRAME
-_COMPOSITEFRAME.fields_by_name['data'].message_type = _FRAMEDATA
-_COMPOSITEFRAME.fields_by_name['analytic'].message_type = _ANALYTICDATA
-DESCRIPTOR.message_types_by_name['Point'] = _POINT
-DESCRIPTOR.message_types_by_name['RegionOfInterest'] = _REGIONOFINTEREST
-DESCRIPTOR.message_types_by_name['PixelMask'] = _PIXELMASK
-DESCRIPTOR.message_types_by_name['BoundingBox'] = _BOUNDINGBOX
-DESCRIPTOR.message_types_by_name['Frame'] = _FRAME
-DESCRIPTOR.message_types_by_name['InputFrame'] = _INPUTFRAME
-DESCRIPTOR.message_types_by_name['FrameData'] = _FRAMEDATA
-DESCRIPTOR.message_types_by_name['FrameRequest'] = _FRAMEREQUEST
-DESCRIPTOR.message_types_by_name['AnalyticData'] = _ANALYTICDATA
-DESCRIPTOR.message_types_by_name['CompositeResults'] = _COMPOSITERESULTS
-DESCRIPTOR.message_types_by_name['CompositeFrame'] = _COMPOSITEFRAME
-DESCRIPTOR.message_types_by_name['Empty'] = _EMPTY
-DESCRIPTOR.message_types_by_name['AnalyticStatus'] = _ANALYTICSTATUS
-_sym_db.RegisterFileDescriptor(DESCRIPTOR)
-
-Point = _reflection.GeneratedProtocolMessageType('Point', (_message.Message,), {
-  'DESCRIPTOR' : _POINT,
-  '__module__' : 'vidstreamer.analytic_pb2'
-  # @@protoc_insertion_point(class_scope:ace.Point)
-  })
-_sym_db.RegisterMessage(Point)
-
-RegionOfInterest = _reflection.GeneratedProtocolMessageType('RegionOfInterest', (_message.Message,), {
-  'DESCRIPTOR' : _REGIONOFINTEREST,
-  '__module__' : 'vidstreamer.analytic_pb2'
-  # @@protoc_insertion_point(class_scope:ace.RegionOfInterest)
-  })
-_sym_db.RegisterMessage(RegionOfInterest)
-
-PixelMask = _reflection.GeneratedProtocolMessageType('PixelMask', (_message.Message,), {
-  'DESCRIPTOR' : _PIXELMASK,
-  '__module__' : 'vidstreamer.analytic_pb2'
-  # @@protoc_insertion_point(class_scope:ace.PixelMask)
-  })
-_sym_db.RegisterMessage(PixelMask)
-
-BoundingBox = _reflection.GeneratedProtocolMessageType('BoundingBox', (_message.Message,), {
-  'DESCRIPTOR' : _BOUNDINGBOX,
-  '__module__' : 'vidstreamer.analytic_pb2'
-  # @@protoc_insertion_point(class_scope:ace.BoundingBox)
-  })
-_sym_db.RegisterMessage(BoundingBox)
-
-Frame = _reflection.GeneratedProtocolMessageType('Frame', (_message.Message,), {
-  'DESCRIPTOR' : _FRAME,
-  '__module__' : 'vidstreamer.analytic_pb2'
-  # @@protoc_insertion_point(class_scope:ace.Frame)
-  })
-_sym_db.RegisterMessage(Frame)
-
-InputFrame = _reflection.GeneratedProtocolMessageType('InputFrame', (_message.Message,), {
-  'DESCRIPTOR' : _INPUTFRAME,
-  '__module__' : 'vidstreamer.analytic_pb2'
-  # @@protoc_insertion_point(class_scope:ace.InputFrame)
-  })
-_sym_db.RegisterMessage(InputFrame)
-
-FrameData = _reflection.GeneratedProtocolMessageType('FrameData', (_message.Message,), {
-  'DESCRIPTOR' : _FRAMEDATA,
-  '__module__' : 'vidstreamer.analytic_pb2'
-  # @@protoc_insertion_point(class_scope:ace.FrameData)
-  })
-_sym_db.RegisterMessage(FrameData)
-
-FrameRequest = _reflection.GeneratedProtocolMessageType('FrameRequest', (_message.Message,), {
-  'DESCRIPTOR' : _FRAMEREQUEST,
-  '__module__' : 'vidstreamer.analytic_pb2'
-  # @@protoc_insertion_point(class_scope:ace.FrameRequest)
-  })
-_sym_db.RegisterMessage(FrameRequest)
-
-AnalyticData = _reflection.GeneratedProtocolMessageType('AnalyticData', (_message.Message,), {
-
-  'FiltersEntry' : _reflection.GeneratedProtocolMessageType('FiltersEntry', (_message.Message,), {
-    'DESCRIPTOR' : _ANALYTICDATA_FILTERSENTRY,
-    '__module__' : 'vidstreamer.analytic_pb2'
-    # @@protoc_insertion_point(class_scope:ace.AnalyticData.FiltersEntry)
-    })
-  ,
-  'DESCRIPTOR' : _ANALYTICDATA,
-  '__module__' : 'vidstreamer.analytic_pb2'
-  # @@protoc_insertion_point(class_scope:ace.AnalyticData)
-  })
-_sym_db.RegisterMessage(AnalyticData)
-_sym_db.RegisterMessage(AnalyticData.FiltersEntry)
-
-CompositeResults = _reflection.GeneratedProtocolMessageType('CompositeResults', (_message.Message,), {
-  'DESCRIPTOR' : _COMPOSITERESULTS,
-  '__module__' : 'vidstreamer.analytic_pb2'
-  # @@protoc_insertion_point(class_scope:ace.CompositeResults)
-  })
-_sym_db.RegisterMessage(CompositeResults)
-
-CompositeFrame = _reflection.GeneratedProtocolMessageType('CompositeFrame', (_message.Message,), {
-  'DESCRIPTOR' : _COMPOSITEFRAME,
-  '__module__' : 'vidstreamer.analytic_pb2'
-  # @@protoc_insertion_point(class_scope:ace.CompositeFrame)
-  })
-_sym_db.RegisterMessage(CompositeFrame)
-
-Empty = _reflection.GeneratedProtocolMessageType('Empty', (_message.Message,), {
-  'DESCRIPTOR' : _EMPTY,
-  '__module__' : 'vidstreamer.analytic_pb2'
-  # @@protoc_insertion_point(class_scope:ace.Empty)
-  })
-_sym_db.RegisterMessage(Empty)
-
-AnalyticStatus = _reflection.GeneratedProtocolMessageType('AnalyticStatus', (_message.Message,), {
-  'DESCRIPTOR' : _ANALYTICSTATUS,
-  '__module__' : 'vidstreamer.analytic_pb2'
-  # @@protoc_insertion_point(class_scope:ace.AnalyticStatus)
-  })
-_sym_db.RegisterMessage(AnalyticStatus)
-
-
-_ANALYTICDATA_FILTERSENTRY._options = None
-
-_ANALYTIC = _descriptor.ServiceDescriptor(
-  name='Analytic',
-  full_name='ace.Analytic',
-  file=DESCRIPTOR,
-  index=0,
-  serialized_options=None,
-  serialized_start=1103,
-  serialized_end=1380,
-  methods=[
-  _descriptor.MethodDescriptor(
-    name='StreamVideoFrame',
-    full_name='ace.Analytic.StreamVideoFrame',
-    index=0,
-    containing_service=None,
-    input_type=_INPUTFRAME,
-    output_type=_COMPOSITEFRAME,
-    serialized_options=None,
-  ),
-  _descriptor.MethodDescriptor(
-    name='ProcessVideoFrame',
-    full_name='ace.Analytic.ProcessVideoFrame',
-    index=1,
-    containing_service=None,
-    input_type=_INPUTFRAME,
-    output_type=_COMPOSITEFRAME,
-    serialized_options=None,
-  ),
-  _descriptor.MethodDescriptor(
-    name='FanoutFrame',
-    full_name='ace.Analytic.FanoutFrame',
-    index=2,
-    containing_service=None,
-    input_type=_INPUTFRAME,
-    output_type=_EMPTY,
-    serialized_options=None,
-  ),
-  _descriptor.MethodDescriptor(
-    name='GetFrame',
-    full_name='ace.Analytic.GetFrame',
-    index=3,
-    containing_service=None,
-    input_type=_FRAMEREQUEST,
-    output_type=_COMPOSITERESULTS,
-    serialized_options=None,
-  ),
-  _descriptor.MethodDescriptor(
-    name='CheckStatus',
-    full_name='ace.Analytic.CheckStatus',
-    index=4,
-    containing_service=None,
-    input_type=_EMPTY,
-    output_type=_ANALYTICSTATUS,
-    serialized_options=None,
-  ),
-])
-_sym_db.RegisterServiceDescriptor(_ANALYTIC)
-
-DESCRIPTOR.services_by_name['Analytic'] = _ANALYTIC
-
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1avidstreamer/analytic.proto\x12\x0bvidstreamer\x1a\x17google/rpc/status.proto\"\x1d\n\x05Point\x12\t\n\x01x\x18\x01 \x01(\x05\x12\t\n\x01y\x18\x02 \x01(\x05\"\xc5\x01\n\x10RegionOfInterest\x12\'\n\x03\x62ox\x18\x01 \x01(\x0b\x32\x18.vidstreamer.BoundingBoxH\x00\x12&\n\x04mask\x18\x02 \x01(\x0b\x32\x16.vidstreamer.PixelMaskH\x00\x12\x16\n\x0e\x63lassification\x18\x05 \x01(\t\x12\x12\n\nconfidence\x18\x03 \x01(\x02\x12\x12\n\nsupplement\x18\x04 \x01(\t\x12\x10\n\x08track_id\x18\x06 \x01(\x03\x42\x0e\n\x0clocalization\"\x83\x01\n\tPixelMask\x12!\n\x05pixel\x18\x01 \x03(\x0b\x32\x12.vidstreamer.Point\x12\t\n\x01x\x18\x02 \x01(\x05\x12\t\n\x01y\x18\x03 \x01(\x05\x12\r\n\x05width\x18\x04 \x01(\x05\x12\x0e\n\x06height\x18\x05 \x01(\x05\x12\x0e\n\x06\x63ounts\x18\x06 \x03(\r\x12\x0e\n\x06\x62itmap\x18\x07 \x01(\x0c\"W\n\x0b\x42oundingBox\x12#\n\x07\x63orner1\x18\x01 \x01(\x0b\x32\x12.vidstreamer.Point\x12#\n\x07\x63orner2\x18\x02 \x01(\x0b\x32\x12.vidstreamer.Point\"\xc8\x01\n\x05\x46rame\x12\x0b\n\x03img\x18\x01 \x01(\x0c\x12-\n\x08\x65ncoding\x18\x02 \x01(\x0e\x32\x1b.vidstreamer.Frame.Encoding\x12\x0e\n\x06height\x18\x03 \x01(\x05\x12\r\n\x05width\x18\x04 \x01(\x05\x12\x10\n\x08\x63hannels\x18\x05 \x01(\x05\x12\r\n\x05\x64type\x18\x06 \x01(\t\x12\x0e\n\x06stride\x18\x07 \x01(\x05\"3\n\x08\x45ncoding\x12\x0b\n\x07\x45NCODED\x10\x00\x12\x07\n\x03RAW\x10\x01\x12\x08\n\x04JPEG\x10\x02\x12\x07\n\x03PNG\x10\x03\"\x95\x01\n\nInputFrame\x12!\n\x05\x66rame\x18\x01 \x01(\x0b\x32\x12.vidstreamer.Frame\x12\x11\n\tframe_num\x18\x02 \x01(\x03\x12\x11\n\ttimestamp\x18\x03 \x01(\x02\x12+\n\x08\x61nalytic\x18\x04 \x01(\x0b\x32\x19.vidstreamer.AnalyticData\x12\x11\n\tsource_id\x18\x05 \x01(\t\"\xd1\x01\n\tFrameData\x12*\n\x03roi\x18\x01 \x03(\x0b\x32\x1d.vidstreamer.RegionOfInterest\x12\x19\n\x11start_time_millis\x18\x03 \x01(\x03\x12\x17\n\x0f\x65nd_time_millis\x18\x04 \x01(\x03\x12\"\n\x06status\x18\x05 \x01(\x0b\x32\x12.google.rpc.Status\x12\x16\n\x0e\x64ropped_frames\x18\x06 \x01(\x03\x12\x17\n\x0f\x63\x61rried_forward\x18\x07 \x01(\x08\x12\x0f\n\x07tracked\x18\x08 \x01(\x08\"b\n\x0c\x46rameRequest\x12,\n\tanalytics\x18\x01 \x03(\x0b\x32\x19.vidstreamer.AnalyticData\x12\x11\n\tsource_id\x18\x02 \x01(\t\x12\x11\n\tframe_num\x18\x03 \x03(\x03\"\xbd\x01\n\x0c\x41nalyticData\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0c\n\x04\x61\x64\x64r\x18\x02 \x01(\t\x12\x14\n\x0crequires_gpu\x18\x03 \x01(\x08\x12\x12\n\noperations\x18\x04 \x03(\t\x12\x37\n\x07\x66ilters\x18\x05 \x03(\x0b\x32&.vidstreamer.AnalyticData.FiltersEntry\x1a.\n\x0c\x46iltersEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"@\n\x10\x43ompositeResults\x12,\n\x07results\x18\x01 \x03(\x0b\x32\x1b.vidstreamer.CompositeFrame\"\x8b\x01\n\x0e\x43ompositeFrame\x12&\n\x05\x66rame\x18\x01 \x01(\x0b\x32\x17.vidstreamer.InputFrame\x12$\n\x04\x64\x61ta\x18\x02 \x01(\x0b\x32\x16.vidstreamer.FrameData\x12+\n\x08\x61nalytic\x18\x03 \x01(\x0b\x32\x19.vidstreamer.AnalyticData\"\x07\n\x05\x45mpty\" \n\x0e\x41nalyticStatus\x12\x0e\n\x06status\x18\x01 \x01(\t2\xe5\x02\n\x08\x41nalytic\x12L\n\x10StreamVideoFrame\x12\x17.vidstreamer.InputFrame\x1a\x1b.vidstreamer.CompositeFrame(\x01\x30\x01\x12I\n\x11ProcessVideoFrame\x12\x17.vidstreamer.InputFrame\x1a\x1b.vidstreamer.CompositeFrame\x12:\n\x0b\x46\x61noutFrame\x12\x17.vidstreamer.InputFrame\x1a\x12.vidstreamer.Empty\x12\x44\n\x08GetFrame\x12\x19.vidstreamer.FrameRequest\x1a\x1d.vidstreamer.CompositeResults\x12>\n\x0b\x43heckStatus\x12\x12.vidstreamer.Empty\x1a\x1b.vidstreamer.AnalyticStatusb\x06proto3')
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'vidstreamer.analytic_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+  DESCRIPTOR._options = None
+  _ANALYTICDATA_FILTERSENTRY._options = None
+  _ANALYTICDATA_FILTERSENTRY._serialized_options = b'8\001'
+  _POINT._serialized_start=68
+  _POINT._serialized_end=97
+  _REGIONOFINTEREST._serialized_start=100
+  _REGIONOFINTEREST._serialized_end=297
+  _PIXELMASK._serialized_start=300
+  _PIXELMASK._serialized_end=431
+  _BOUNDINGBOX._serialized_start=433
+  _BOUNDINGBOX._serialized_end=520
+  _FRAME._serialized_start=523
+  _FRAME._serialized_end=723
+  _FRAME_ENCODING._serialized_start=672
+  _FRAME_ENCODING._serialized_end=723
+  _INPUTFRAME._serialized_start=726
+  _INPUTFRAME._serialized_end=875
+  _FRAMEDATA._serialized_start=878
+  _FRAMEDATA._serialized_end=1087
+  _FRAMEREQUEST._serialized_start=1089
+  _FRAMEREQUEST._serialized_end=1187
+  _ANALYTICDATA._serialized_start=1190
+  _ANALYTICDATA._serialized_end=1379
+  _ANALYTICDATA_FILTERSENTRY._serialized_start=1333
+  _ANALYTICDATA_FILTERSENTRY._serialized_end=1379
+  _COMPOSITERESULTS._serialized_start=1381
+  _COMPOSITERESULTS._serialized_end=1445
+  _COMPOSITEFRAME._serialized_start=1448
+  _COMPOSITEFRAME._serialized_end=1587
+  _EMPTY._serialized_start=1589
+  _EMPTY._serialized_end=1596
+  _ANALYTICSTATUS._serialized_start=1598
+  _ANALYTICSTATUS._serialized_end=1630
+  _ANALYTIC._serialized_start=1633
+  _ANALYTIC._serialized_end=1990
 # @@protoc_insertion_point(module_scope)
@@ -0,0 +1,94 @@
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
+from concurrent.futures import Future
+
+
+class BatchProcessor:
+    """ Collects frames submitted from any thread and hands them to a batched analytic.
+
+    `batch_func(frames, reqs, resps)` receives the frames stacked into a single NumPy array
+    (N x H x W [x C]) along with parallel lists of the InputFrame and FrameData messages, and
+    fills in `resps[i]` for frame `i`. A batch is flushed once it holds `batch_size` frames,
+    once `max_wait_ms` have passed since its first frame arrived, or when a frame with a
+    different shape arrives (frames of different shapes cannot be stacked). The time each
+    batch takes is recorded as the "analytic" stage of `metrics`, if given. """
+
+    def __init__(self, batch_func, batch_size=16, max_wait_ms=50, metrics=None):
+        self.batch_func = batch_func
+        self.metrics = metrics
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._carry = None
+        self._thread = threading.Thread(target=self._loop, name="batch-processor", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, req, resp):
+        """ Queue a frame for the next batch. The returned Future resolves to (req, resp). """
+        future = Future()
+        self._queue.put((frame, req, resp, future))
+        return future
+
+    def close(self):
+        """ Flush any queued frames and stop the batching thread. """
+        self._queue.put(None)
+        self._thread.join()
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            self._run(batch)
+
+    def _collect(self):
+        first = self._carry
+        self._carry = None
+        if first is None:
+            first = self._queue.get()
+            if first is None:
+                return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            if item[0].shape != first[0].shape:
+                self._carry = item
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self, batch):
+        frames = np.stack([item[0] for item in batch])
+        reqs = [item[1] for item in batch]
+        resps = [item[2] for item in batch]
+        start = int(round(time.time()*1000))
+        for resp in resps:
+            resp.start_time_millis = start
+        begin = time.perf_counter_ns()
+        try:
+            self.batch_func(frames, reqs, resps)
+        except Exception as e:
+            logging.exception("Batch analytic failed on {!s} frames".format(len(batch)))
+            for item in batch:
+                item[3].set_exception(e)
+            return
+        if self.metrics is not None:
+            self.metrics.record("analytic", time.perf_counter_ns() - begin)
+        end = int(round(time.time()*1000))
+        for frame, req, resp, future in batch:
+            resp.end_time_millis = end
+            future.set_result((req, resp))
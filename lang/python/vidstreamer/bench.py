@@ -0,0 +1,367 @@
+""" Benchmarks for the vidstreamer hot path.
+
+Run with `python -m vidstreamer.bench`. Everything runs on synthetic frames and video generated
+locally, at each of the chosen resolutions and detection counts, and the results are printed
+(or saved with --output) as JSON. Each suite runs in a fresh process for every resolution and
+detection count, so the peak memory it reports is its own. Pass a previous run as --baseline to fail when any
+benchmark's throughput drops by more than --tolerance. """
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+import click
+import cv2
+import google.protobuf
+import numpy as np
+
+from . import Streamer, analytic_pb2, default_output_func
+from .client import AnalyticClient
+from .frames import FrameEncoder, frame_to_proto, proto_to_frame
+from .overlay import OverlayRenderer
+from .rois import add_detections
+from .server import create_grpc_server
+from .sinks import JsonLinesWriter
+
+RESOLUTIONS = {
+    "480p": (480, 640),
+    "720p": (720, 1280),
+    "1080p": (1080, 1920),
+    "4k": (2160, 3840),
+}
+
+LABELS = ["person", "car", "bicycle", "dog", "truck"]
+
+
+def synthetic_frame(height, width, seed=0):
+    """ A BGR frame with smooth gradients and some noise, so compression ratios are realistic """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[:, :, 0] = (x * 255 // max(width - 1, 1)).astype(np.uint8)
+    frame[:, :, 1] = (y * 255 // max(height - 1, 1)).astype(np.uint8)
+    frame[:, :, 2] = rng.integers(0, 32, size=(height, width), dtype=np.uint8)
+    return frame
+
+
+def synthetic_video(path, count, height, width, fps=30):
+    """ Write `count` synthetic frames to an MJPG video, shifting the pattern every frame """
+    frame = synthetic_frame(height, width)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    for i in range(count):
+        writer.write(np.roll(frame, 4 * i, axis=1))
+    writer.release()
+    return path
+
+
+def detection_analytic(count, height, width, seed=0):
+    """ An analytic returning the same `count` random boxes for every frame, as a detector would """
+    rng = np.random.default_rng(seed)
+    corners = rng.random((count, 2)) * [width * 0.9, height * 0.9]
+    sizes = rng.random((count, 2)) * [width * 0.1, height * 0.1] + 4
+    boxes = np.hstack([corners, corners + sizes])
+    scores = rng.random(count).astype(np.float32)
+    class_ids = rng.integers(0, len(LABELS), count)
+
+    def analytic(frame, req, resp):
+        add_detections(resp, boxes, scores, class_ids, LABELS)
+    return analytic
+
+
+def detections(count, height, width):
+    """ A FrameData holding `count` detections """
+    resp = analytic_pb2.FrameData()
+    detection_analytic(count, height, width)(None, None, resp)
+    return resp
+
+
+def peak_rss_mb():
+    """ Peak resident set size of this process so far, in MiB. run() gives every suite a process
+    of its own, so this covers the case and those run before it in the same suite only. """
+    # On Linux ru_maxrss survives exec, so a spawned process would report its parent's peak;
+    # VmHWM belongs to the process' own memory map
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except (IOError, OSError):
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0
+
+
+def summarize(times_ms):
+    times = np.asarray(times_ms, dtype=np.float64)
+    return {
+        "mean_ms": float(times.mean()),
+        "p50_ms": float(np.percentile(times, 50)),
+        "p95_ms": float(np.percentile(times, 95)),
+        "p99_ms": float(np.percentile(times, 99)),
+        "fps": float(1000.0 / times.mean()) if times.mean() > 0 else float("inf"),
+    }
+
+
+def timeit(func, repeat=50, warmup=3):
+    """ Time `func()` and summarize the per-call latency in milliseconds """
+    for _ in range(warmup):
+        func()
+    times = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        times[i] = time.perf_counter() - start
+    return summarize(times * 1000.0)
+
+
+def result(benchmark, case, resolution, count, **values):
+    values.update({"benchmark": benchmark, "case": case, "resolution": resolution,
+                   "detections": count, "peak_rss_mb": peak_rss_mb()})
+    return values
+
+
+def bench_frames(resolution, count, repeat=50):
+    """ Ways of getting a frame into an InputFrame and back out on the other side, including
+    protobuf serialization as it happens on the wire. """
+    frame = synthetic_frame(*RESOLUTIONS[resolution])
+    encoder = FrameEncoder("raw")
+
+    def legacy_encode():
+        ok, img = cv2.imencode(".jpg", frame)
+        return analytic_pb2.InputFrame(frame=analytic_pb2.Frame(img=img.tobytes())).SerializeToString()
+
+    def legacy_decode(data):
+        req = analytic_pb2.InputFrame.FromString(data)
+        # What np.fromstring did: copy the bytes before decoding
+        return cv2.imdecode(np.frombuffer(req.frame.img, dtype=np.uint8).copy(), 1)
+
+    def decode(data):
+        return proto_to_frame(analytic_pb2.InputFrame.FromString(data))
+
+    cases = {
+        "legacy_jpeg": (legacy_encode, legacy_decode),
+        "jpeg": (lambda: frame_to_proto(frame, encoding="jpeg").SerializeToString(), decode),
+        "raw": (lambda: frame_to_proto(frame, encoding="raw").SerializeToString(), decode),
+        "raw_reused": (lambda: encoder.encode(frame, frame_num=0).SerializeToString(), decode),
+    }
+    results = []
+    for case, (encode, decode) in cases.items():
+        data = encode()
+        results.append(result("frames", case, resolution, None, bytes=len(data),
+                              encode=timeit(encode, repeat), decode=timeit(lambda: decode(data), repeat)))
+    return results
+
+
+def bench_process_frame(resolution, count, repeat=50):
+    """ Streamer.process_frame with an analytic that fills in `count` detections """
+    height, width = RESOLUTIONS[resolution]
+    frame = synthetic_frame(height, width)
+    streamer = Streamer(func=detection_analytic(count, height, width))
+    streamer.register_output_func(None)
+    stats = timeit(lambda: streamer.process_frame(frame, timestamp=0.0, frame_num=0), repeat)
+    return [result("process_frame", "serial", resolution, count, latency=stats)]
+
+
+def bench_stream_video(resolution, count, repeat=50):
+    """ Streamer.stream_video over a synthetic video of `repeat` frames, serially and pipelined.
+    Throughput is frames over wall time; latencies come from the streamer's stage metrics. """
+    height, width = RESOLUTIONS[resolution]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = synthetic_video(os.path.join(tmp, "bench.avi"), repeat, height, width)
+        for case, pipelined in [("serial", False), ("pipelined", True)]:
+            streamer = Streamer(func=detection_analytic(count, height, width), pipelined=pipelined)
+            streamer.register_output_func(None)
+            start = time.perf_counter()
+            streamer.stream_video(path)
+            elapsed = time.perf_counter() - start
+            stats = streamer.stats()
+            frames = stats.get("decode", {}).get("count", 0)
+            results.append(result("stream_video", case, resolution, count, frames=frames,
+                                  fps=frames / elapsed if elapsed else 0.0, stages=stats))
+    return results
+
+
+def bench_output(resolution, count, repeat=50):
+    """ Cost per frame of the output functions as seen by the stream: printing, drawing the
+    overlay and queueing results for a JSON Lines file. """
+    height, width = RESOLUTIONS[resolution]
+    frame = synthetic_frame(height, width)
+    req = analytic_pb2.InputFrame(frame_num=0, timestamp=0.0)
+    resp = detections(count, height, width)
+    renderer = OverlayRenderer()
+    results = []
+
+    def printed():
+        with contextlib.redirect_stdout(io.StringIO()):
+            default_output_func(frame, req, resp)
+
+    results.append(result("output", "default_output_func", resolution, count, latency=timeit(printed, repeat)))
+    results.append(result("output", "overlay", resolution, count,
+                          latency=timeit(lambda: renderer.draw(frame, resp), repeat)))
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = JsonLinesWriter(os.path.join(tmp, "results.jsonl"), queue_size=repeat + 10)
+        results.append(result("output", "jsonl", resolution, count,
+                              latency=timeit(lambda: writer(frame, req, resp), repeat, warmup=0)))
+        writer.close()
+    return results
+
+
+def bench_serialize(resolution, count, repeat=50):
+    """ Serializing and parsing a CompositeFrame carrying `count` detections (and no pixels) """
+    height, width = RESOLUTIONS[resolution]
+    msg = analytic_pb2.CompositeFrame(data=detections(count, height, width))
+    msg.frame.frame_num = 1
+    data = msg.SerializeToString()
+    return [result("serialize", "composite_frame", resolution, count, bytes=len(data),
+                   serialize=timeit(msg.SerializeToString, repeat),
+                   parse=timeit(lambda: analytic_pb2.CompositeFrame.FromString(data), repeat))]
+
+
+class _FrameSource:
+    """ A capture-like source repeating one frame `count` times """
+
+    def __init__(self, frame, count):
+        self.frame = frame
+        self.count = count
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.count <= 0:
+            return False, None
+        self.count -= 1
+        return True, self.frame
+
+
+def bench_server(resolution, count, repeat=50):
+    """ Round trips to a local gRPC server: unary ProcessVideoFrame calls one at a time, and a
+    StreamVideoFrame stream of `repeat` frames. Frames are sent raw. """
+    height, width = RESOLUTIONS[resolution]
+    frame = synthetic_frame(height, width)
+    streamer = Streamer(func=detection_analytic(count, height, width))
+    streamer.register_output_func(None)
+    server, port = create_grpc_server(streamer, host="127.0.0.1", port=0)
+    server.start()
+    client = AnalyticClient("127.0.0.1:{!s}".format(port))
+    try:
+        unary = timeit(lambda: client.process(frame, encoding="raw"), repeat)
+        start = time.perf_counter()
+        received = sum(1 for _ in client.stream_capture(_FrameSource(frame, repeat), encoding="raw"))
+        elapsed = time.perf_counter() - start
+    finally:
+        client.close()
+        server.stop(None)
+    return [result("server", "unary", resolution, count, latency=unary),
+            result("server", "stream", resolution, count, frames=received, fps=received / elapsed)]
+
+
+SUITES = {
+    "frames": bench_frames,
+    "process_frame": bench_process_frame,
+    "stream_video": bench_stream_video,
+    "output": bench_output,
+    "serialize": bench_serialize,
+    "server": bench_server,
+}
+
+
+def _run_suite(name, resolution, count, repeat):
+    return SUITES[name](resolution, count, repeat=repeat)
+
+
+def run(suites=None, resolutions=("720p",), counts=(10, 100), repeat=50, isolate=True):
+    """ Run the chosen benchmarks (all of SUITES by default) and return the report as a dict.
+    With `isolate` each suite runs in a freshly spawned process per resolution and detection
+    count, so that peak_rss_mb is not inflated by whatever ran earlier. """
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for name in suites or sorted(SUITES):
+        # The frame codecs don't depend on the number of detections
+        for count in (counts[:1] if name == "frames" else counts):
+            for resolution in resolutions:
+                if isolate:
+                    with ctx.Pool(1) as pool:
+                        results.extend(pool.apply(_run_suite, (name, resolution, count, repeat)))
+                else:
+                    results.extend(_run_suite(name, resolution, count, repeat))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "protobuf": google.protobuf.__version__,
+            "repeat": repeat,
+            "isolated": isolate,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+
+
+def throughput(entry):
+    """ The headline frames per second of a result, whichever measurement it carries """
+    for key in ["fps", "latency", "encode", "serialize"]:
+        value = entry.get(key)
+        if isinstance(value, dict):
+            return value["fps"]
+        if value is not None:
+            return value
+    return None
+
+
+def compare(baseline, report, tolerance=0.1):
+    """ Results whose throughput dropped by more than `tolerance` (a fraction) from the
+    baseline report, as a list of (key, baseline fps, current fps). """
+    def key(entry):
+        return entry["benchmark"], entry["case"], entry["resolution"], entry["detections"]
+    before = dict((key(entry), throughput(entry)) for entry in baseline["results"])
+    regressions = []
+    for entry in report["results"]:
+        old, new = before.get(key(entry)), throughput(entry)
+        if old and new is not None and new < old * (1 - tolerance):
+            regressions.append((key(entry), old, new))
+    return regressions
+
+
+@click.command()
+@click.option("--suite", "suites", multiple=True, type=click.Choice(sorted(SUITES)),
+              help="Benchmarks to run (repeatable, default all)")
+@click.option("--resolution", "resolutions", multiple=True, type=click.Choice(sorted(RESOLUTIONS)),
+              default=["720p"], help="Frame sizes to benchmark (repeatable)")
+@click.option("--detections", "counts", multiple=True, type=int, default=[10, 100],
+              help="Detections per frame (repeatable)")
+@click.option("--repeat", default=50, type=int, help="Timed iterations (or video frames) per case")
+@click.option("--isolate/--no-isolate", default=True,
+              help="Run every suite in a fresh process so peak memory is measured per suite")
+@click.option("--output", default=None, type=str, help="Write the JSON report to this file")
+@click.option("--baseline", default=None, type=str, help="A previous report to check for regressions")
+@click.option("--tolerance", default=0.1, type=float, help="Allowed fractional drop in fps against the baseline")
+def main(suites, resolutions, counts, repeat, isolate, output, baseline, tolerance):
+    report = run(suites, resolutions=resolutions, counts=counts, repeat=repeat, isolate=isolate)
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text)
+    else:
+        click.echo(text)
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare(json.load(f), report, tolerance=tolerance)
+        for key, old, new in regressions:
+            click.echo("Regression in {!s}: {:.1f} -> {:.1f} fps".format("/".join(str(k) for k in key), old, new), err=True)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
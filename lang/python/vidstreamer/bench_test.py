@@ -0,0 +1,33 @@
+import copy
+import unittest
+
+import numpy as np
+
+from .bench import compare, peak_rss_mb, run, throughput
+
+
+class TestBench(unittest.TestCase):
+
+    def test_run_and_compare(self):
+        ballast = np.ones(200 * 1024 * 1024, dtype=np.uint8)  # raises this process' peak only
+        report = run(["serialize", "process_frame", "stream_video"], resolutions=["480p"], counts=[3], repeat=4)
+        results = dict((entry["benchmark"] + "/" + entry["case"], entry) for entry in report["results"])
+        self.assertEqual(sorted(results), ["process_frame/serial", "serialize/composite_frame",
+                                           "stream_video/pipelined", "stream_video/serial"])
+        self.assertEqual(results["stream_video/serial"]["frames"], 4)
+        self.assertEqual(results["stream_video/serial"]["stages"]["analytic"]["count"], 4)
+        self.assertGreater(results["serialize/composite_frame"]["peak_rss_mb"], 0)
+        self.assertLess(results["serialize/composite_frame"]["peak_rss_mb"], peak_rss_mb() - ballast.nbytes / 2 ** 21)
+        self.assertEqual(compare(report, report), [])
+
+        slower = copy.deepcopy(report)
+        for entry in slower["results"]:
+            if entry["benchmark"] == "process_frame":
+                entry["latency"]["fps"] = throughput(entry) / 2
+        regressions = compare(report, slower)
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual(regressions[0][0], ("process_frame", "serial", "480p", 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
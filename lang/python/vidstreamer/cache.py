@@ -0,0 +1,148 @@
+import collections
+import hashlib
+import threading
+
+import cv2
+import numpy as np
+
+from . import analytic_pb2
+
+BLOCK_WORDS = 4096
+
+
+class ResultCache:
+    """ Remembers the ROIs an analytic found for a frame so identical (or, in "perceptual" mode,
+    nearly identical) frames skip the analytic. Holds at most `max_entries` results and evicts
+    the least recently used.
+
+    "exact" mode keys frames by a hash of every pixel: each 8-byte word is multiplied by a
+    random 64-bit weight and summed per block (a vectorized universal hash, far cheaper than a
+    cryptographic digest of the frame), and the block sums are then digested with blake2b.
+
+    "perceptual" mode keys frames by a `hash_size` x `hash_size` grayscale thumbnail, made from
+    a strided sample of the frame so it costs about the same at any resolution. A frame hits
+    when the mean absolute difference between its thumbnail and a cached one, in gray levels,
+    is at most `threshold`; this absorbs sensor noise and compression artifacts on a static
+    scene. Frames of different shapes never match.
+
+    Only use the cache with analytics whose results depend on the pixels alone. Results with
+    a non-OK status are not cached. """
+
+    def __init__(self, max_entries=1024, mode="exact", hash_size=16, threshold=2.0):
+        if mode not in ("exact", "perceptual"):
+            raise ValueError("Unknown cache mode {!s}".format(mode))
+        self.max_entries = max_entries
+        self.mode = mode
+        self.hash_size = hash_size
+        self.threshold = threshold
+        self._init_state()
+
+    def _init_state(self):
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()  # key -> FrameData holding the ROIs
+        self._lock = threading.Lock()
+        if self.mode == "exact":
+            rng = np.random.default_rng()
+            self._weights = rng.integers(0, 2 ** 64, BLOCK_WORDS, dtype=np.uint64, endpoint=False) | np.uint64(1)
+        else:
+            # Perceptual entries are keyed by a slot in these arrays
+            self._thumbs = np.zeros((self.max_entries, self.hash_size * self.hash_size), dtype=np.float32)
+            self._shapes = np.zeros(self.max_entries, dtype=np.int64)
+
+    def __getstate__(self):
+        # Worker processes start with an empty cache of their own
+        return {"max_entries": self.max_entries, "mode": self.mode, "hash_size": self.hash_size,
+                "threshold": self.threshold}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_state()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def lookup(self, frame):
+        """ Returns (key, cached) for a frame, where `cached` is a FrameData holding the ROIs of
+        a matching frame, or None on a miss. Pass the key to add() after analyzing a miss. """
+        key = self._digest(frame) if self.mode == "exact" else self._thumbnail(frame)
+        with self._lock:
+            cached = self._find(key)
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return key, cached
+
+    def add(self, key, resp):
+        """ Cache the ROIs of an analyzed frame's FrameData under the key from lookup() """
+        if resp.status.code:
+            return
+        cached = analytic_pb2.FrameData(roi=resp.roi)
+        with self._lock:
+            if self.mode == "exact":
+                self._entries[key] = cached
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                return
+            if len(self._entries) < self.max_entries:
+                slot = len(self._entries)
+            else:
+                slot, _ = self._entries.popitem(last=False)
+            thumb, shape = key
+            self._thumbs[slot] = thumb
+            self._shapes[slot] = shape
+            self._entries[slot] = cached
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """ A dict of hits, misses, hit_rate and entries """
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                    "entries": len(self._entries)}
+
+    def _find(self, key):
+        if self.mode == "exact":
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+            return cached
+        count = len(self._entries)
+        if not count:
+            return None
+        thumb, shape = key
+        diffs = np.abs(self._thumbs[:count] - thumb).mean(axis=1)
+        diffs[self._shapes[:count] != shape] = np.inf
+        slot = int(np.argmin(diffs))
+        if diffs[slot] > self.threshold:
+            return None
+        self._entries.move_to_end(slot)
+        return self._entries[slot]
+
+    def _digest(self, frame):
+        data = np.ascontiguousarray(frame).reshape(-1).view(np.uint8)
+        words = data[:data.size // 8 * 8].view(np.uint64)
+        full = words.size // BLOCK_WORDS * BLOCK_WORDS
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str((frame.shape, frame.dtype.str)).encode())
+        digest.update((words[:full].reshape(-1, BLOCK_WORDS) @ self._weights).tobytes())
+        digest.update((words[full:] @ self._weights[:words.size - full]).tobytes())
+        digest.update(data[words.size * 8:].tobytes())
+        return digest.digest()
+
+    def _thumbnail(self, frame):
+        step = max(1, min(frame.shape[:2]) // (self.hash_size * 4))
+        sample = np.ascontiguousarray(frame[::step, ::step])
+        if sample.ndim == 3 and sample.shape[2] == 3:
+            sample = cv2.cvtColor(sample, cv2.COLOR_BGR2GRAY)
+        elif sample.ndim == 3:
+            sample = sample.mean(axis=2).astype(np.float32)
+        thumb = cv2.resize(sample, (self.hash_size, self.hash_size), interpolation=cv2.INTER_AREA)
+        return thumb.reshape(-1).astype(np.float32), hash(frame.shape)
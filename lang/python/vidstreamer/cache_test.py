@@ -0,0 +1,143 @@
+import pickle
+import time
+import unittest
+
+import numpy as np
+from google.rpc import code_pb2
+from vidstreamer import analytic_pb2
+from .__init__ import Streamer
+from .cache import ResultCache
+
+
+def frame_data(label, code=code_pb2.OK):
+    resp = analytic_pb2.FrameData()
+    resp.roi.add(classification=label, confidence=0.5)
+    resp.status.code = code
+    return resp
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.frame = self.rng.integers(0, 256, (120, 161, 3), dtype=np.uint8)
+
+    def test_exact(self):
+        cache = ResultCache(max_entries=2)
+        key, cached = cache.lookup(self.frame)
+        self.assertIsNone(cached)
+        cache.add(key, frame_data("a"))
+        key, cached = cache.lookup(self.frame.copy())
+        self.assertEqual(cached.roi[0].classification, "a")
+
+        changed = self.frame.copy()
+        changed[-1, -1, -1] ^= 1  # in the bytes after the last whole word
+        self.assertIsNone(cache.lookup(changed)[1])
+        self.assertIsNone(cache.lookup(self.frame[:, :160])[1])
+        self.assertIsNone(cache.lookup(self.frame.reshape(161, 120, 3))[1])
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 4, "hit_rate": 0.2, "entries": 1})
+
+    def test_lru(self):
+        cache = ResultCache(max_entries=2)
+        frames = [np.full((8, 8), i, dtype=np.uint8) for i in range(3)]
+        for i, frame in enumerate(frames[:2]):
+            cache.add(cache.lookup(frame)[0], frame_data(str(i)))
+        cache.lookup(frames[0])
+        cache.add(cache.lookup(frames[2])[0], frame_data("2"))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.lookup(frames[1])[1])
+        self.assertEqual(cache.lookup(frames[0])[1].roi[0].classification, "0")
+
+    def test_perceptual(self):
+        cache = ResultCache(max_entries=2, mode="perceptual", threshold=2.0)
+        scene = np.tile(np.linspace(0, 255, 640, dtype=np.uint8), (480, 1))[..., None].repeat(3, axis=2)
+        cache.add(cache.lookup(scene)[0], frame_data("scene"))
+        noise = self.rng.integers(-3, 4, scene.shape)
+        noisy = np.clip(scene.astype(int) + noise, 0, 255).astype(np.uint8)
+        self.assertEqual(cache.lookup(noisy)[1].roi[0].classification, "scene")
+        self.assertIsNone(cache.lookup(scene[::-1, ::-1])[1])
+        self.assertIsNone(cache.lookup(scene[:, :320])[1])
+        for i in range(3):
+            frame = np.full((480, 640, 3), i * 80, dtype=np.uint8)
+            cache.add(cache.lookup(frame)[0], frame_data(str(i)))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.lookup(scene)[1])
+        self.assertEqual(cache.lookup(np.full((480, 640, 3), 161, dtype=np.uint8))[1].roi[0].classification, "2")
+
+    def test_errors_not_cached(self):
+        cache = ResultCache()
+        key, _ = cache.lookup(self.frame)
+        cache.add(key, frame_data("a", code=code_pb2.INTERNAL))
+        self.assertIsNone(cache.lookup(self.frame)[1])
+        with self.assertRaises(ValueError):
+            ResultCache(mode="fuzzy")
+
+    def test_pickle(self):
+        cache = ResultCache(mode="perceptual", threshold=1.0)
+        cache.add(cache.lookup(self.frame)[0], frame_data("a"))
+        copy = pickle.loads(pickle.dumps(cache))
+        self.assertEqual((len(copy), copy.mode, copy.threshold), (0, "perceptual", 1.0))
+
+
+class TestStreamerCache(unittest.TestCase):
+
+    def test_analytic_skipped_for_duplicates(self):
+        calls = []
+
+        def analytic(frame, req, resp):
+            calls.append(req.frame_num)
+            resp.roi.add(classification="x", confidence=float(frame.flat[0]))
+
+        streamer = Streamer(func=analytic, cache_size=8)
+        streamer.register_output_func(None)
+        frames = [np.full((16, 16, 3), v, dtype=np.uint8) for v in (1, 1, 2, 1)]
+        resps = [streamer.process_frame(frame, frame_num=i)[1] for i, frame in enumerate(frames)]
+        self.assertEqual(calls, [0, 2])
+        self.assertEqual([r.roi[0].confidence for r in resps], [1.0, 1.0, 2.0, 1.0])
+        self.assertEqual(streamer.cache.stats()["hits"], 2)
+        self.assertEqual(streamer.stats()["cache"]["count"], 4)
+
+    def test_batched(self):
+        calls = []
+
+        def batch_analytic(frames, reqs, resps):
+            calls.append(len(frames))
+            for resp in resps:
+                resp.roi.add(classification="x")
+
+        streamer = Streamer(batch_func=batch_analytic, batch_size=1, cache_size=8)
+        streamer.register_output_func(None)
+        frame = np.zeros((16, 16, 3), dtype=np.uint8)
+        for i in range(3):
+            req, resp = streamer.process_frame(frame, frame_num=i)
+            self.assertEqual(len(resp.roi), 1)
+        self.assertEqual(calls, [1])
+
+    def test_batched_stream(self):
+        calls = []
+
+        def batch_analytic(frames, reqs, resps):
+            calls.append(len(frames))
+            for frame, resp in zip(frames, resps):
+                resp.roi.add(classification="x", confidence=float(frame.flat[0]))
+
+        streamer = Streamer(batch_func=batch_analytic, batch_size=4, cache_size=8)
+        resps = []
+        streamer.register_output_func(lambda frame, req, resp: resps.append(resp))
+        values = [1, 2, 3, 4] + [1, 2, 3, 4] * 3
+
+        def frames():
+            for i, v in enumerate(values):
+                if i == 4:
+                    time.sleep(0.2)  # let the first batch finish
+                yield np.full((16, 16, 3), v, dtype=np.uint8), 0.0, i
+
+        streamer.stream_frames(frames())
+        self.assertEqual([r.roi[0].confidence for r in resps], values)
+        self.assertEqual(sum(calls), 4)
+        self.assertEqual(streamer.cache.stats()["hits"], 12)
+        self.assertEqual(streamer.stats()["cache"]["count"], 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
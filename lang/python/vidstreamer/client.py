@@ -0,0 +1,59 @@
+import logging
+import threading
+import time
+
+import grpc
+
+from . import analytic_pb2, analytic_pb2_grpc
+from .frames import frame_to_proto
+
+
+class AnalyticClient:
+    """ Client for a remote Analytic gRPC service. """
+
+    def __init__(self, addr, channel=None):
+        self.addr = addr
+        self.channel = channel or grpc.insecure_channel(addr)
+        self.stub = analytic_pb2_grpc.AnalyticStub(self.channel)
+
+    def close(self):
+        self.channel.close()
+
+    def check_status(self, timeout=None):
+        return self.stub.CheckStatus(analytic_pb2.Empty(), timeout=timeout).status
+
+    def process(self, frame, frame_num=0, timestamp=None, encoding="jpeg", timeout=None):
+        """ Send one frame with a unary ProcessVideoFrame call and return the CompositeFrame.
+        `encoding` is "jpeg", "png" or "raw" (uncompressed pixels). """
+        req = frame_to_proto(frame, frame_num=frame_num, timestamp=time.time() if timestamp is None else timestamp,
+                             encoding=encoding)
+        return self.stub.ProcessVideoFrame(req, timeout=timeout)
+
+    def stream_capture(self, cap, window=8, encoding="jpeg"):
+        """ Push every frame of an opened cv2.VideoCapture through StreamVideoFrame and yield the
+        CompositeFrames as they come back. No more than `window` frames are sent ahead of the
+        results, so a slow analytic throttles reading from the capture. """
+        in_flight = threading.Semaphore(window)
+        finished = threading.Event()
+
+        def requests():
+            frame_num = 0
+            while cap.isOpened():
+                while not in_flight.acquire(timeout=0.1):
+                    if finished.is_set():
+                        return
+                ret, frame = cap.read()
+                if not ret:
+                    logging.info("No frame available")
+                    return
+                yield frame_to_proto(frame, frame_num=frame_num, timestamp=time.time(), encoding=encoding)
+                frame_num += 1
+
+        responses = self.stub.StreamVideoFrame(requests())
+        try:
+            for result in responses:
+                in_flight.release()
+                yield result
+        finally:
+            finished.set()
+            responses.cancel()
@@ -0,0 +1,95 @@
+import logging
+import threading
+
+import grpc
+from google.rpc import code_pb2
+
+from . import analytic_pb2
+from .server import ANALYTIC_SERVICE, composite_frame, status_frame_data
+
+
+class FanoutEngine:
+    """ Sends one InputFrame to several remote analytics at once and gathers their results.
+
+    Analytics are registered as AnalyticData messages (name and addr), each with an optional
+    timeout in seconds (`timeout` is the default). One channel is kept open per address and
+    shared by every analytic served there. A frame is serialized once and the same bytes are
+    sent to every target with asynchronous ProcessVideoFrame calls, so the slowest analytic
+    sets the latency instead of the sum of them all. """
+
+    def __init__(self, analytics=None, timeout=None):
+        self.timeout = timeout
+        self._targets = {}
+        self._channels = {}
+        self._lock = threading.Lock()
+        for analytic in analytics or []:
+            self.register(analytic)
+
+    def register(self, analytic, timeout=None):
+        """ Add (or replace) an analytic, given as AnalyticData or a (name, addr) pair. """
+        if not isinstance(analytic, analytic_pb2.AnalyticData):
+            name, addr = analytic
+            analytic = analytic_pb2.AnalyticData(name=name, addr=addr)
+        if not analytic.addr:
+            raise ValueError("Analytic {!s} has no address".format(analytic.name))
+        with self._lock:
+            channel = self._channels.get(analytic.addr)
+            if channel is None:
+                channel = self._channels[analytic.addr] = grpc.insecure_channel(analytic.addr)
+            # Requests go out already serialized, so there is no request serializer
+            call = channel.unary_unary("/{!s}/ProcessVideoFrame".format(ANALYTIC_SERVICE),
+                                       response_deserializer=analytic_pb2.CompositeFrame.FromString)
+            self._targets[analytic.name] = (analytic, call, timeout)
+
+    def unregister(self, name):
+        with self._lock:
+            self._targets.pop(name, None)
+
+    @property
+    def analytics(self):
+        """ The registered AnalyticData messages """
+        with self._lock:
+            return [target[0] for target in self._targets.values()]
+
+    def fanout(self, request, names=None):
+        """ Send an InputFrame to every registered analytic (or only those in `names`) and
+        return a CompositeResults with one CompositeFrame per analytic, in registration order.
+        An analytic that fails or times out gets a result whose `data.status` holds the error. """
+        with self._lock:
+            targets = [t for name, t in self._targets.items() if names is None or name in names]
+        data = request.SerializeToString()
+        calls = []
+        for analytic, call, timeout in targets:
+            timeout = self.timeout if timeout is None else timeout
+            calls.append((analytic, call.future(data, timeout=timeout)))
+        results = analytic_pb2.CompositeResults()
+        for analytic, future in calls:
+            try:
+                result = future.result()
+            except grpc.RpcError as e:
+                logging.warning("Analytic {!s} at {!s} failed: {!s}".format(analytic.name, analytic.addr, e.code()))
+                resp = status_frame_data(e.code().value[0], e.details() or str(e.code()))
+                result = composite_frame(request, resp)
+            except Exception as e:
+                logging.exception("Analytic {!s} at {!s} failed".format(analytic.name, analytic.addr))
+                result = composite_frame(request, status_frame_data(code_pb2.UNKNOWN, str(e)))
+            result.analytic.CopyFrom(analytic)
+            results.results.append(result)
+        return results
+
+    def close(self):
+        with self._lock:
+            channels = list(self._channels.values())
+            self._channels = {}
+            self._targets = {}
+        for channel in channels:
+            channel.close()
+
+
+def parse_target(text):
+    """ Parse a NAME=ADDR command line argument into AnalyticData. Without a name the address
+    is used as the name. """
+    name, sep, addr = text.partition("=")
+    if not sep:
+        name, addr = text, text
+    return analytic_pb2.AnalyticData(name=name, addr=addr)
@@ -0,0 +1,74 @@
+import time
+import unittest
+
+import numpy as np
+from google.rpc import code_pb2
+from vidstreamer import analytic_pb2
+from .fanout import FanoutEngine, parse_target
+from .frames import frame_to_proto
+from .server_test import connect, serve
+
+
+def labelled(label, delay=0.0):
+    def analytic(frame, req, resp):
+        time.sleep(delay)
+        resp.roi.add(classification=label, confidence=float(frame.flat[0]))
+    return analytic
+
+
+class TestFanout(unittest.TestCase):
+
+    def request(self, value=7):
+        return frame_to_proto(np.full((8, 8), value, dtype=np.uint8), frame_num=3)
+
+    def test_fanout_concurrently(self):
+        slow_a = serve(self, labelled("a", delay=0.3))
+        slow_b = serve(self, labelled("b", delay=0.3))
+        engine = FanoutEngine([("a", slow_a), ("b", slow_b), ("a-again", slow_a)])
+        self.addCleanup(engine.close)
+        self.assertEqual(len(engine._channels), 2)
+        engine.fanout(self.request())  # connect
+        start = time.monotonic()
+        results = engine.fanout(self.request())
+        self.assertLess(time.monotonic() - start, 0.55)
+        self.assertEqual([r.analytic.name for r in results.results], ["a", "b", "a-again"])
+        self.assertEqual([r.data.roi[0].classification for r in results.results], ["a", "b", "a"])
+        self.assertEqual(results.results[1].frame.frame_num, 3)
+        self.assertEqual(results.results[1].data.roi[0].confidence, 7.0)
+        only_b = engine.fanout(self.request(), names=["b"])
+        self.assertEqual([r.analytic.name for r in only_b.results], ["b"])
+
+    def test_timeouts_and_failures(self):
+        fast = serve(self, labelled("fast"))
+        slow = serve(self, labelled("slow", delay=1.0))
+        engine = FanoutEngine(timeout=5)
+        self.addCleanup(engine.close)
+        engine.register(parse_target("fast=" + fast))
+        engine.register(parse_target("slow=" + slow), timeout=0.2)
+        engine.register(parse_target("localhost:1"), timeout=1)
+        results = engine.fanout(self.request())
+        statuses = [r.data.status.code for r in results.results]
+        self.assertEqual(statuses[:2], [code_pb2.OK, code_pb2.DEADLINE_EXCEEDED])
+        self.assertIn(statuses[2], (code_pb2.UNAVAILABLE, code_pb2.DEADLINE_EXCEEDED))
+        self.assertEqual(results.results[2].analytic.name, "localhost:1")
+        self.assertEqual(results.results[1].frame.frame_num, 3)
+        with self.assertRaises(ValueError):
+            engine.register(("nowhere", ""))
+
+    def test_fanout_frame_rpc(self):
+        engine = FanoutEngine([("a", serve(self, labelled("a")))])
+        self.addCleanup(engine.close)
+        received = []
+        front = serve(self, labelled("front"), fanout=engine, results_func=lambda req, results: received.append(results))
+        client = connect(self, front)
+        self.assertEqual(client.stub.FanoutFrame(self.request()), analytic_pb2.Empty())
+        self.assertEqual(received[0].results[0].data.roi[0].classification, "a")
+
+        plain = connect(self, serve(self, labelled("plain")))
+        with self.assertRaises(Exception) as raised:
+            plain.stub.FanoutFrame(self.request())
+        self.assertEqual(raised.exception.code().name, "UNIMPLEMENTED")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import cv2
+import numpy as np
+
+from . import analytic_pb2
+
+ENCODINGS = {
+    "raw": analytic_pb2.Frame.RAW,
+    "jpeg": analytic_pb2.Frame.JPEG,
+    "jpg": analytic_pb2.Frame.JPEG,
+    "png": analytic_pb2.Frame.PNG,
+}
+
+_EXTENSIONS = {
+    analytic_pb2.Frame.JPEG: ".jpg",
+    analytic_pb2.Frame.PNG: ".png",
+}
+
+
+def frame_encoding(encoding):
+    """ Accepts a Frame.Encoding value or one of the names in ENCODINGS """
+    if isinstance(encoding, str):
+        try:
+            return ENCODINGS[encoding.lower().lstrip(".")]
+        except KeyError:
+            raise ValueError("Unknown frame encoding {!s}".format(encoding))
+    return encoding
+
+
+def encode_frame(frame, encoding="jpeg"):
+    """ Build a Frame message from an image. JPEG and PNG compress the image with cv2.imencode;
+    RAW sends the pixels as they are along with their shape and dtype, which on a fast link is
+    cheaper than compressing them. """
+    msg = analytic_pb2.Frame()
+    fill_frame(msg, frame, encoding)
+    return msg
+
+
+def fill_frame(msg, frame, encoding="jpeg"):
+    """ Write an image into an existing Frame message. RAW frames that aren't contiguous in
+    memory (e.g. crops) are gathered by tobytes() in the same copy that fills the message. """
+    encoding = frame_encoding(encoding)
+    frame = np.asarray(frame)
+    msg.encoding = encoding
+    msg.height = frame.shape[0]
+    msg.width = frame.shape[1]
+    msg.channels = frame.shape[2] if frame.ndim == 3 else 0
+    if encoding == analytic_pb2.Frame.RAW:
+        msg.dtype = frame.dtype.str
+        # tobytes() writes the rows back to back, whatever the frame's own strides
+        msg.stride = frame[0].nbytes
+        # Let go of the previous frame's bytes first, so the allocator can reuse their pages
+        msg.ClearField("img")
+        msg.img = frame.tobytes()
+        return msg
+    msg.ClearField("dtype")
+    msg.ClearField("stride")
+    ext = _EXTENSIONS.get(encoding)
+    if ext is None:
+        raise ValueError("Can't encode frames as {!s}".format(analytic_pb2.Frame.Encoding.Name(encoding)))
+    ok, img = cv2.imencode(ext, frame)
+    if not ok:
+        raise ValueError("Could not encode frame as {!s}".format(ext))
+    msg.img = img.tobytes()
+    return msg
+
+
+def frame_to_proto(frame, msg=None, frame_num=None, timestamp=None, source_id=None, encoding="raw"):
+    """ Put a NumPy frame into an InputFrame. Pass a previously built InputFrame as `msg` to
+    reuse it (and its Frame) instead of allocating new messages for every frame. """
+    if msg is None:
+        msg = analytic_pb2.InputFrame()
+    fill_frame(msg.frame, frame, encoding)
+    if frame_num is not None:
+        msg.frame_num = frame_num
+    if timestamp is not None:
+        msg.timestamp = timestamp
+    if source_id is not None:
+        msg.source_id = source_id
+    return msg
+
+
+def proto_to_frame(msg):
+    """ The image held in an InputFrame (or a bare Frame), or None if it can't be read. RAW
+    frames are returned as a read-only view onto the message's bytes; see decode_frame. """
+    if isinstance(msg, analytic_pb2.InputFrame):
+        msg = msg.frame
+    return decode_frame(msg)
+
+
+class FrameEncoder:
+    """ Encodes a sequence of frames into one reused InputFrame. The returned message is
+    overwritten by the next call, so serialize or send it before encoding the next frame. """
+
+    def __init__(self, encoding="raw"):
+        self.encoding = frame_encoding(encoding)
+        self.msg = analytic_pb2.InputFrame()
+
+    def encode(self, frame, frame_num=None, timestamp=None, source_id=None):
+        return frame_to_proto(frame, msg=self.msg, frame_num=frame_num, timestamp=timestamp,
+                              source_id=source_id, encoding=self.encoding)
+
+
+def decode_frame(frame_msg):
+    """ Rebuild the image held in a Frame message, or return None if it can't be read.
+
+    RAW frames come back as a read-only view onto the message's bytes (no copy is made), so
+    copy the array before drawing on it or otherwise modifying it. """
+    if not frame_msg.img:
+        return None
+    if frame_msg.encoding == analytic_pb2.Frame.RAW:
+        return raw_frame(frame_msg)
+    # Legacy ENCODED frames carry no shape and have always been decoded as BGR
+    flags = cv2.IMREAD_COLOR
+    if frame_msg.encoding != analytic_pb2.Frame.ENCODED:
+        if frame_msg.channels <= 1:
+            flags = cv2.IMREAD_GRAYSCALE
+        elif frame_msg.channels == 4:
+            flags = cv2.IMREAD_UNCHANGED
+    return cv2.imdecode(np.frombuffer(frame_msg.img, dtype=np.uint8), flags)
+
+
+def raw_frame(frame_msg):
+    """ A zero-copy view of a RAW Frame's pixels, or None if the buffer doesn't match its shape """
+    img = frame_msg.img
+    try:
+        dtype = np.dtype(frame_msg.dtype or np.uint8)
+    except TypeError:
+        return None
+    height, width, channels = frame_msg.height, frame_msg.width, frame_msg.channels
+    pixel = dtype.itemsize * max(channels, 1)
+    stride = frame_msg.stride or width * pixel
+    if height <= 0 or width <= 0 or stride < width * pixel:
+        return None
+    if len(img) < stride * (height - 1) + width * pixel:
+        return None
+    shape = (height, width, channels) if channels else (height, width)
+    strides = (stride, pixel, dtype.itemsize) if channels else (stride, pixel)
+    return np.ndarray(shape, dtype=dtype, buffer=img, strides=strides)
@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+from vidstreamer import analytic_pb2
+from .frames import FrameEncoder, decode_frame, encode_frame, frame_to_proto, proto_to_frame
+
+
+class TestFrames(unittest.TestCase):
+
+    def test_raw_round_trip(self):
+        for frame in [np.arange(6 * 8 * 3, dtype=np.uint8).reshape(6, 8, 3),
+                      np.arange(6 * 8, dtype=np.uint16).reshape(6, 8),
+                      np.random.rand(5, 7, 4).astype(np.float32)]:
+            msg = encode_frame(frame, "raw")
+            self.assertEqual(msg.encoding, analytic_pb2.Frame.RAW)
+            decoded = decode_frame(analytic_pb2.Frame.FromString(msg.SerializeToString()))
+            self.assertEqual(decoded.dtype, frame.dtype)
+            np.testing.assert_array_equal(decoded, frame)
+
+    def test_raw_padded_rows(self):
+        padded = np.arange(4 * 16, dtype=np.uint8).reshape(4, 16)
+        msg = analytic_pb2.Frame(img=padded.tobytes(), encoding=analytic_pb2.Frame.RAW,
+                                 height=4, width=10, stride=16)
+        np.testing.assert_array_equal(decode_frame(msg), padded[:, :10])
+
+    def test_raw_invalid(self):
+        msg = analytic_pb2.Frame(img=b"\x00" * 10, encoding=analytic_pb2.Frame.RAW, height=4, width=4)
+        self.assertIsNone(decode_frame(msg))
+        msg = analytic_pb2.Frame(img=b"\x00" * 16, encoding=analytic_pb2.Frame.RAW, height=4, width=4, dtype="nope")
+        self.assertIsNone(decode_frame(msg))
+
+    def test_compressed(self):
+        frame = np.zeros((16, 16, 3), dtype=np.uint8)
+        frame[4:8] = 200
+        np.testing.assert_array_equal(decode_frame(encode_frame(frame, "png")), frame)
+        self.assertEqual(decode_frame(encode_frame(frame, "jpeg")).shape, (16, 16, 3))
+        legacy = analytic_pb2.Frame(img=encode_frame(frame, "png").img)
+        np.testing.assert_array_equal(decode_frame(legacy), frame)
+        gray = frame[:, :, 0]
+        np.testing.assert_array_equal(decode_frame(encode_frame(gray, "png")), gray)
+        with self.assertRaises(ValueError):
+            encode_frame(frame, "gif")
+
+    def test_frame_to_proto(self):
+        frame = np.arange(6 * 8 * 3, dtype=np.uint8).reshape(6, 8, 3)
+        msg = frame_to_proto(frame, frame_num=3, timestamp=1.5, source_id="cam")
+        msg = analytic_pb2.InputFrame.FromString(msg.SerializeToString())
+        self.assertEqual((msg.frame_num, msg.timestamp, msg.source_id), (3, 1.5, "cam"))
+        decoded = proto_to_frame(msg)
+        self.assertFalse(decoded.flags.writeable)
+        np.testing.assert_array_equal(decoded, frame)
+
+    def test_frame_encoder_reuse(self):
+        encoder = FrameEncoder()
+        frame = np.arange(10 * 12 * 3, dtype=np.uint8).reshape(10, 12, 3)
+        crop = frame[2:8, 3:9]
+        msg = encoder.encode(crop, frame_num=0)
+        np.testing.assert_array_equal(proto_to_frame(msg), crop)
+        self.assertEqual(msg.frame.stride, 6 * 3)
+        self.assertIs(encoder.encode(frame[1:7, 2:8], frame_num=1), msg)
+        np.testing.assert_array_equal(proto_to_frame(msg), frame[1:7, 2:8])
+        self.assertEqual(msg.frame_num, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import collections
+import logging
+import time
+
+from influxdb import InfluxDBClient
+
+from .sinks import _QueuedSink
+
+
+def _escape_key(value):
+    """ Escape a measurement name, tag key or tag value for line protocol """
+    return str(value).replace("\\", "\\\\").replace(",", "\\,").replace("=", "\\=").replace(" ", "\\ ")
+
+
+def _field(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return "{:d}i".format(value)
+    return repr(float(value))
+
+
+def line(measurement, tags, fields, timestamp_ms):
+    """ One point in InfluxDB line protocol with a timestamp in milliseconds. Tags with empty
+    values are left out. """
+    key = _escape_key(measurement)
+    for name, value in sorted(tags.items()):
+        if value != "" and value is not None:
+            key += ",{!s}={!s}".format(_escape_key(name), _escape_key(value))
+    values = ",".join("{!s}={!s}".format(_escape_key(name), _field(value)) for name, value in fields.items())
+    return "{!s} {!s} {:d}".format(key, values, timestamp_ms)
+
+
+class InfluxExporter(_QueuedSink):
+    """ An output function that reports per-frame performance and detections to InfluxDB.
+
+    For each frame a point is written to `measurement` (tagged with the source_id) with the
+    analytic's latency_ms (end_time_millis - start_time_millis), the output fps of that source,
+    dropped_frames, the number of detections and exporter_backlog, the number of frames waiting
+    in this exporter when the frame was output. Given the `streamer` whose output function
+    this is, queue_depth reports its Streamer.queue_depth(): the frames read by the stream but
+    not yet output. A point per classification is written to "<measurement>_detections" with
+    its count in the frame.
+
+    Points are converted to line protocol and sent on a background thread in batches of
+    `batch_size` frames or every `flush_seconds`. At most `queue_size` frames are buffered;
+    beyond that frames are dropped (and counted in `dropped`) rather than slowing the stream.
+    A failed write is logged and its points discarded, counted in `failed`. Pass an existing
+    InfluxDBClient as `client`, or the keyword arguments to create one. """
+
+    thread_name = "influx-exporter"
+
+    def __init__(self, database="vidstreamer", measurement="vidstreamer", batch_size=500,
+                 flush_seconds=1.0, queue_size=10000, client=None, tags=None, streamer=None, **client_kwargs):
+        super().__init__(queue_size, block=False)
+        self.streamer = streamer
+        self.database = database
+        self.measurement = measurement
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.tags = tags or {}
+        self.client = client or InfluxDBClient(database=database, **client_kwargs)
+        self.written = 0
+        self.failed = 0
+        self._last_output = {}
+        self._fps = {}
+
+    def __call__(self, frame, req, resp):
+        now = time.monotonic()
+        source_id = req.source_id
+        last = self._last_output.get(source_id)
+        self._last_output[source_id] = now
+        if last is not None and now > last:
+            # Smooth the rate so one slow frame doesn't swing the graph
+            fps = 1.0 / (now - last)
+            self._fps[source_id] = fps if source_id not in self._fps else 0.9 * self._fps[source_id] + 0.1 * fps
+        # Both depths as they are now; by the time the consumer formats the point it has already
+        # taken this frame and possibly the rest of its batch off the queue
+        depths = (self.streamer.queue_depth() if self.streamer is not None else None, self._queue.qsize())
+        self._put((source_id, resp, self._fps.get(source_id, 0.0), depths, int(time.time() * 1000)))
+
+    def points(self, source_id, resp, fps, depths, timestamp_ms):
+        """ The line protocol points for one frame. `depths` is (queue_depth, exporter_backlog)
+        with queue_depth None when there is no streamer to ask. """
+        tags = dict(self.tags, source_id=source_id)
+        latency = resp.end_time_millis - resp.start_time_millis if resp.start_time_millis else 0
+        fields = collections.OrderedDict([
+            ("latency_ms", latency),
+            ("fps", fps),
+            ("dropped_frames", resp.dropped_frames),
+            ("detections", len(resp.roi)),
+            ("exporter_backlog", depths[1]),
+        ])
+        if depths[0] is not None:
+            fields["queue_depth"] = depths[0]
+        timestamp_ms = resp.end_time_millis or timestamp_ms
+        lines = [line(self.measurement, tags, fields, timestamp_ms)]
+        counts = collections.Counter(roi.classification for roi in resp.roi)
+        detections = self.measurement + "_detections"
+        for classification, count in sorted(counts.items()):
+            lines.append(line(detections, dict(tags, classification=classification), {"count": count}, timestamp_ms))
+        return lines
+
+    def _consume(self):
+        for batch in self._batches(self.batch_size, self.flush_seconds):
+            lines = []
+            for item in batch:
+                lines.extend(self.points(*item))
+            try:
+                self.client.write(lines, params={"db": self.database, "precision": "ms"}, protocol="line")
+                self.written += len(batch)
+            except Exception:
+                logging.exception("Writing {!s} points to InfluxDB failed".format(len(lines)))
+                self.failed += len(batch)
@@ -0,0 +1,98 @@
+import http.server
+import threading
+import unittest
+from urllib.parse import parse_qs, urlparse
+
+from vidstreamer import analytic_pb2
+from .influx import InfluxExporter, line
+
+
+class StubInflux(http.server.BaseHTTPRequestHandler):
+    """ Accepts /write requests like InfluxDB 1.x and records them """
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.writes.append((urlparse(self.path).path, parse_qs(urlparse(self.path).query), body.decode()))
+        self.send_response(self.server.status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestInflux(unittest.TestCase):
+
+    def setUp(self):
+        self.server = http.server.HTTPServer(("127.0.0.1", 0), StubInflux)
+        self.server.writes = []
+        self.server.status = 204
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def exporter(self, **kwargs):
+        return InfluxExporter(host="127.0.0.1", port=self.server.server_port, database="test", retries=1, **kwargs)
+
+    def frame(self, frame_num, classes):
+        req = analytic_pb2.InputFrame(frame_num=frame_num, source_id="cam 1")
+        resp = analytic_pb2.FrameData(start_time_millis=1000 + frame_num, end_time_millis=1025 + frame_num)
+        for name in classes:
+            resp.roi.add(classification=name)
+        return None, req, resp
+
+    def test_line(self):
+        self.assertEqual(line("m", {"a": "x,y", "b": ""}, {"n": 3, "f": 0.5, "ok": True}, 12),
+                         "m,a=x\\,y n=3i,f=0.5,ok=true 12")
+
+    def test_batched_writes(self):
+        exporter = self.exporter(batch_size=3)
+        for i in range(5):
+            exporter(*self.frame(i, ["person", "car", "person"][:i % 4]))
+        exporter.close()
+        self.assertEqual(exporter.written, 5)
+        self.assertEqual(len(self.server.writes), 2)
+        path, params, body = self.server.writes[0]
+        self.assertEqual(path, "/write")
+        self.assertEqual((params["db"], params["precision"]), (["test"], ["ms"]))
+        lines = "".join(w[2] for w in self.server.writes).splitlines()
+        frames = [l for l in lines if l.startswith("vidstreamer,")]
+        self.assertEqual(len(frames), 5)
+        self.assertTrue(frames[2].startswith("vidstreamer,source_id=cam\\ 1 latency_ms=25i,"))
+        self.assertIn("detections=2i", frames[2])
+        self.assertTrue(frames[2].endswith(" 1027"))
+        self.assertIn("vidstreamer_detections,classification=person,source_id=cam\\ 1 count=2i 1028", lines)
+
+    def test_failed_writes_are_dropped(self):
+        self.server.status = 500
+        exporter = self.exporter(batch_size=2)
+        for i in range(2):
+            exporter(*self.frame(i, []))
+        exporter.close()
+        self.assertEqual((exporter.written, exporter.failed), (0, 2))
+
+    def test_backpressure_drops(self):
+        exporter = self.exporter(queue_size=2, flush_seconds=0.01)
+        # Stand in a consumer that never runs, so the buffer fills up
+        exporter._thread = threading.Thread(target=lambda: None)
+        for i in range(5):
+            exporter(*self.frame(i, []))
+        self.assertEqual(exporter.dropped, 3)
+        points = [exporter.points(*item)[0] for item in exporter._queue.queue]
+        self.assertEqual([p.split(",exporter_backlog=")[1].split(" ")[0] for p in points], ["0i", "1i"])
+        self.assertNotIn("queue_depth", points[0])
+
+    def test_stream_queue_depth(self):
+        class Stream:
+            def queue_depth(self):
+                return 6
+        exporter = self.exporter(streamer=Stream())
+        exporter(*self.frame(0, []))
+        exporter.close()
+        self.assertIn(",queue_depth=6i ", self.server.writes[0][2])
+
+
+if __name__ == "__main__":
+    unittest.main()
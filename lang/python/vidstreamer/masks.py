@@ -0,0 +1,98 @@
+import numpy as np
+
+from . import analytic_pb2
+
+MASK_ENCODINGS = ("rle", "bitmap")
+
+
+def rle_encode(mask):
+    """ Run lengths of a boolean array in row-major order, alternating unset and set pixels and
+    starting with unset, so the first count is 0 if the first pixel is set. """
+    flat = np.asarray(mask, dtype=bool).ravel()
+    if flat.size == 0:
+        return np.zeros(0, dtype=np.uint32)
+    edges = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    bounds = np.concatenate(([0], edges, [flat.size]))
+    counts = np.diff(bounds).astype(np.uint32)
+    if flat[0]:
+        counts = np.concatenate(([0], counts)).astype(np.uint32)
+    return counts
+
+
+def rle_decode(counts, shape):
+    """ The boolean array of `shape` described by run lengths from rle_encode """
+    counts = np.asarray(counts, dtype=np.int64)
+    size = int(np.prod(shape))
+    if counts.sum() != size:
+        raise ValueError("Run lengths cover {!s} pixels, expected {!s}".format(counts.sum(), size))
+    values = (np.arange(counts.size) % 2).astype(bool)
+    return np.repeat(values, counts).reshape(shape)
+
+
+def mask_to_proto(mask, msg=None, encoding="rle", crop=True):
+    """ Store a 2D boolean (or 0/nonzero) mask in a PixelMask. With `crop` the mask is cut down
+    to the bounding box of its set pixels and the offset recorded in x and y. `encoding` is
+    "rle", which is best for blob-like masks, or "bitmap", which has a fixed cost of one bit
+    per pixel and suits noisy ones. """
+    if encoding not in MASK_ENCODINGS:
+        raise ValueError("Unknown mask encoding {!s}".format(encoding))
+    mask = np.asarray(mask)
+    if mask.ndim != 2:
+        raise ValueError("Masks must be 2D, got shape {!s}".format(mask.shape))
+    mask = mask.astype(bool, copy=False)
+    if msg is None:
+        msg = analytic_pb2.PixelMask()
+    else:
+        msg.Clear()
+    y, x = 0, 0
+    if crop:
+        rows = np.flatnonzero(mask.any(axis=1))
+        if rows.size == 0:
+            return msg
+        cols = np.flatnonzero(mask.any(axis=0))
+        y, x = int(rows[0]), int(cols[0])
+        mask = mask[y:rows[-1] + 1, x:cols[-1] + 1]
+    msg.x, msg.y = x, y
+    msg.height, msg.width = mask.shape
+    if encoding == "rle":
+        msg.counts.extend(rle_encode(mask).tolist())
+    else:
+        msg.bitmap = np.packbits(mask, axis=None).tobytes()
+    return msg
+
+
+def proto_to_mask(msg, shape=None):
+    """ Rebuild a boolean mask from a PixelMask. With `shape` (the frame's height and width) the
+    mask is placed at its offset in an array of that shape; otherwise only the mask's window
+    is returned. Masks made of the legacy list of Points are also read, in which case `shape`
+    defaults to just fit the points. """
+    if msg.pixel and not (msg.counts or msg.bitmap):
+        return _points_to_mask(msg.pixel, shape)
+    window = (msg.height, msg.width)
+    if msg.counts:
+        mask = rle_decode(msg.counts, window)
+    elif msg.bitmap:
+        size = msg.height * msg.width
+        bits = np.unpackbits(np.frombuffer(msg.bitmap, dtype=np.uint8), count=size)
+        if bits.size != size:
+            raise ValueError("Bitmap holds {!s} pixels, expected {!s}".format(bits.size, size))
+        mask = bits.reshape(window).astype(bool)
+    else:
+        mask = np.zeros(window, dtype=bool)
+    if shape is None:
+        return mask
+    full = np.zeros(shape[:2], dtype=bool)
+    target = full[msg.y:msg.y + msg.height, msg.x:msg.x + msg.width]
+    target |= mask[:target.shape[0], :target.shape[1]]
+    return full
+
+
+def _points_to_mask(points, shape=None):
+    xs = np.fromiter((p.x for p in points), dtype=np.int64, count=len(points))
+    ys = np.fromiter((p.y for p in points), dtype=np.int64, count=len(points))
+    if shape is None:
+        shape = (int(ys.max()) + 1, int(xs.max()) + 1)
+    mask = np.zeros(shape[:2], dtype=bool)
+    inside = (xs >= 0) & (ys >= 0) & (xs < mask.shape[1]) & (ys < mask.shape[0])
+    mask[ys[inside], xs[inside]] = True
+    return mask
@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+from vidstreamer import analytic_pb2
+from .masks import mask_to_proto, proto_to_mask, rle_decode, rle_encode
+
+
+class TestMasks(unittest.TestCase):
+
+    def setUp(self):
+        self.mask = np.zeros((40, 60), dtype=bool)
+        self.mask[10:30, 20:45] = True
+        self.mask[12, 21] = False
+
+    def test_rle(self):
+        for mask in [self.mask, ~self.mask, np.zeros((3, 3), bool), np.ones((3, 3), bool)]:
+            counts = rle_encode(mask)
+            np.testing.assert_array_equal(rle_decode(counts, mask.shape), mask)
+        self.assertEqual(rle_encode(np.array([True, True, False])).tolist(), [0, 2, 1])
+        with self.assertRaises(ValueError):
+            rle_decode([1, 2], (2, 2))
+
+    def test_round_trip(self):
+        for encoding in ["rle", "bitmap"]:
+            msg = mask_to_proto(self.mask, encoding=encoding)
+            self.assertEqual((msg.x, msg.y, msg.width, msg.height), (20, 10, 25, 20))
+            msg = analytic_pb2.PixelMask.FromString(msg.SerializeToString())
+            np.testing.assert_array_equal(proto_to_mask(msg, self.mask.shape), self.mask)
+            np.testing.assert_array_equal(proto_to_mask(msg), self.mask[10:30, 20:45])
+
+    def test_uncropped_and_empty(self):
+        msg = mask_to_proto(self.mask, crop=False)
+        self.assertEqual((msg.x, msg.y, msg.width, msg.height), (0, 0, 60, 40))
+        np.testing.assert_array_equal(proto_to_mask(msg), self.mask)
+        empty = mask_to_proto(np.zeros((5, 5)), msg=msg)
+        self.assertEqual(len(empty.counts), 0)
+        self.assertFalse(proto_to_mask(empty, (5, 5)).any())
+
+    def test_legacy_points(self):
+        msg = analytic_pb2.PixelMask(pixel=[analytic_pb2.Point(x=1, y=2), analytic_pb2.Point(x=3, y=0)])
+        mask = proto_to_mask(msg)
+        self.assertEqual(mask.shape, (3, 4))
+        self.assertEqual(mask.sum(), 2)
+        self.assertTrue(mask[2, 1] and mask[0, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,236 @@
+import cProfile
+import contextlib
+import http.server
+import io
+import logging
+import pstats
+import socket
+import threading
+import time
+
+import numpy as np
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """ Latency samples in nanoseconds for one stage. The latest `window` samples are kept for
+    percentiles; the count, total and maximum cover every sample since the last reset. """
+
+    def __init__(self, window=4096):
+        self._samples = np.zeros(window, dtype=np.int64)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns):
+        self._samples[self.count % self._samples.size] = ns
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentiles(self, quantiles=QUANTILES):
+        """ The given quantiles (0-1) of the recent samples, in nanoseconds """
+        samples = self._samples[:min(self.count, self._samples.size)]
+        if not samples.size:
+            return [0.0] * len(quantiles)
+        return np.percentile(samples, [q * 100 for q in quantiles]).tolist()
+
+    def stats(self):
+        """ A dict of count and mean/p50/p95/p99/max latency in milliseconds """
+        p50, p95, p99 = self.percentiles()
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count / 1e6 if self.count else 0.0,
+            "p50_ms": p50 / 1e6,
+            "p95_ms": p95 / 1e6,
+            "p99_ms": p99 / 1e6,
+            "max_ms": self.max / 1e6,
+        }
+
+
+class Metrics:
+    """ Per-stage latency histograms for a Streamer, timed with time.perf_counter_ns.
+
+    The stages recorded by vidstreamer are:
+      decode     reading and decoding a frame from its source (or from a request, when serving)
+      track      moving the ROIs of the last keyframe to a frame, when tracking is on
+      motion     checking a frame for motion, when motion gating is on
+      cache      looking a frame up in the result cache, when there is one
+      analytic   the analytic function (per frame; per batch for batch_func)
+      wait       the output loop waiting for the next analyzed frame, i.e. queue wait
+      output     the output function
+      serialize  serializing a result for a client
+      frame      the interval between frames reaching the output, i.e. 1 / throughput
+    Any other name can be recorded too. With `log_interval` set, a summary is logged at most
+    that often (in seconds) as frames are recorded. """
+
+    def __init__(self, window=4096, log_interval=None):
+        self.window = window
+        self.log_interval = log_interval
+        self._init_state()
+
+    def _init_state(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._next_log = time.monotonic() + (self.log_interval or 0)
+
+    def __getstate__(self):
+        # Worker processes start with empty histograms of their own
+        return {"window": self.window, "log_interval": self.log_interval}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_state()
+
+    def record(self, stage, ns):
+        """ Add a duration in nanoseconds to a stage's histogram """
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self.window)
+            histogram.record(ns)
+        if self.log_interval and time.monotonic() >= self._next_log:
+            self._next_log = time.monotonic() + self.log_interval
+            logging.info(self.summary())
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        """ Record how long the body of a `with` block takes """
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter_ns() - start)
+
+    def timed(self, stage, iterable):
+        """ Yield from an iterable, recording how long each item takes to produce """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter_ns()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.record(stage, time.perf_counter_ns() - start)
+            yield item
+
+    def stats(self):
+        """ A dict mapping each stage to its count and mean/p50/p95/p99/max in milliseconds """
+        with self._lock:
+            return dict((stage, histogram.stats()) for stage, histogram in sorted(self._histograms.items()))
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+    def summary(self):
+        """ One line per stage, for logging """
+        lines = ["Stage latency (ms):"]
+        for stage, s in self.stats().items():
+            lines.append("  {:<10} n={:<8d} mean={:8.3f} p50={:8.3f} p95={:8.3f} p99={:8.3f} max={:8.3f}".format(
+                stage, s["count"], s["mean_ms"], s["p50_ms"], s["p95_ms"], s["p99_ms"], s["max_ms"]))
+        return "\n".join(lines)
+
+    def prometheus(self, name="vidstreamer_stage_seconds"):
+        """ The histograms in the Prometheus text exposition format, as summaries in seconds """
+        lines = ["# HELP {!s} Latency of each vidstreamer stage".format(name),
+                 "# TYPE {!s} summary".format(name)]
+        with self._lock:
+            histograms = sorted((stage, h.percentiles(), h.count, h.total) for stage, h in self._histograms.items())
+        for stage, percentiles, count, total in histograms:
+            for q, value in zip(QUANTILES, percentiles):
+                lines.append('{!s}{{stage="{!s}",quantile="{!s}"}} {!r}'.format(name, stage, q, value / 1e9))
+            lines.append('{!s}_sum{{stage="{!s}"}} {!r}'.format(name, stage, total / 1e9))
+            lines.append('{!s}_count{{stage="{!s}"}} {:d}'.format(name, stage, count))
+        return "\n".join(lines) + "\n"
+
+
+class _HTTPServerV6(http.server.ThreadingHTTPServer):
+    address_family = socket.AF_INET6
+
+
+def serve_metrics(metrics, host="::", port=9100):
+    """ Serve `metrics.prometheus()` at /metrics from a daemon thread. Returns the HTTP server;
+    its `server_port` is the bound port when `port` is 0. """
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server_class = _HTTPServerV6 if ":" in host else http.server.ThreadingHTTPServer
+    server = server_class((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logging.info("Metrics available at http://{!s}:{!s}/metrics".format(host, server.server_port))
+    return server
+
+
+class Profiler:
+    """ Runs the analytic under cProfile for its first `frames` calls, then writes the stats to
+    `path` (if given) and logs the `top` entries sorted by `sort`.
+
+    cProfile can only follow one thread at a time, so calls made while another call is being
+    profiled (e.g. by concurrent server threads) run unprofiled and don't count. For sampling
+    across all threads use an external profiler such as py-spy instead. """
+
+    def __init__(self, frames=100, path=None, sort="cumulative", top=25):
+        self.frames = frames
+        self.path = path
+        self.sort = sort
+        self.top = top
+        self._init_state()
+
+    def _init_state(self):
+        self.profiled = 0
+        self._profile = cProfile.Profile()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"frames": self.frames, "path": self.path, "sort": self.sort, "top": self.top}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_state()
+
+    @property
+    def done(self):
+        return self.profiled >= self.frames
+
+    def call(self, func, *args):
+        """ Call func(*args), profiling it if more frames are wanted """
+        if self.done or not self._lock.acquire(blocking=False):
+            return func(*args)
+        try:
+            if self.done:
+                return func(*args)
+            self._profile.enable()
+            try:
+                return func(*args)
+            finally:
+                self._profile.disable()
+                self.profiled += 1
+                if self.done:
+                    self.report()
+        finally:
+            self._lock.release()
+
+    def report(self):
+        """ Write and log the collected stats """
+        if self.path:
+            self._profile.dump_stats(self.path)
+            logging.info("Wrote profile of {!s} frames to {!s}".format(self.profiled, self.path))
+        out = io.StringIO()
+        pstats.Stats(self._profile, stream=out).sort_stats(self.sort).print_stats(self.top)
+        logging.info("Profile of the analytic over {!s} frames:\n{!s}".format(self.profiled, out.getvalue()))
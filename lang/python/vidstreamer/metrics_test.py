@@ -0,0 +1,84 @@
+import os
+import pickle
+import pstats
+import tempfile
+import unittest
+import urllib.request
+
+import numpy as np
+from .__init__ import Streamer
+from .metrics import Histogram, Metrics, Profiler, serve_metrics
+
+
+def analytic(frame, req, resp):
+    resp.roi.add(classification=str(int(frame.flat[0])))
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram(self):
+        histogram = Histogram(window=100)
+        for ms in range(1, 201):
+            histogram.record(ms * 1000000)
+        stats = histogram.stats()
+        self.assertEqual(stats["count"], 200)
+        self.assertAlmostEqual(stats["mean_ms"], 100.5)
+        self.assertEqual(stats["max_ms"], 200.0)
+        # Percentiles cover the latest `window` samples
+        self.assertAlmostEqual(stats["p50_ms"], 150.5)
+        self.assertAlmostEqual(stats["p99_ms"], 199.01)
+
+    def test_metrics(self):
+        metrics = Metrics()
+        with metrics.time("work"):
+            pass
+        self.assertEqual(list(metrics.timed("read", [1, 2, 3])), [1, 2, 3])
+        self.assertEqual(metrics.stats()["read"]["count"], 3)
+        self.assertIn("work", metrics.summary())
+        text = metrics.prometheus()
+        self.assertIn('vidstreamer_stage_seconds{stage="read",quantile="0.95"}', text)
+        self.assertIn('vidstreamer_stage_seconds_count{stage="work"} 1', text)
+        copy = pickle.loads(pickle.dumps(metrics))
+        self.assertEqual(copy.stats(), {})
+        metrics.reset()
+        self.assertEqual(metrics.stats(), {})
+
+    def test_serve_metrics(self):
+        metrics = Metrics()
+        metrics.record("analytic", 2000000)
+        server = serve_metrics(metrics, host="127.0.0.1", port=0)
+        try:
+            url = "http://127.0.0.1:{!s}/metrics".format(server.server_port)
+            body = urllib.request.urlopen(url, timeout=5).read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertIn('vidstreamer_stage_seconds_sum{stage="analytic"} 0.002', body)
+
+    def test_streamer_stages(self):
+        for pipelined in [False, True]:
+            streamer = Streamer(func=analytic, pipelined=pipelined)
+            streamer.register_output_func(lambda frame, req, resp: None)
+            streamer.stream_frames((np.full((4, 4), i, np.uint8), 0.0, i) for i in range(10))
+            stats = streamer.stats()
+            for stage in ["decode", "analytic", "wait", "output"]:
+                self.assertEqual(stats[stage]["count"], 10, stage)
+            self.assertEqual(stats["frame"]["count"], 9)
+
+    def test_profiler(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "analytic.prof")
+            streamer = Streamer(func=analytic, profile_frames=3, profile_path=path)
+            streamer.register_output_func(None)
+            streamer.stream_frames((np.full((4, 4), i, np.uint8), 0.0, i) for i in range(5))
+            self.assertEqual(streamer.profiler.profiled, 3)
+            self.assertTrue(os.path.exists(path))
+            names = [key[2] for key in pstats.Stats(path).stats]
+            self.assertIn("analytic", names)
+        profiler = Profiler(frames=1)
+        self.assertEqual(profiler.call(max, 1, 2), 2)
+        self.assertTrue(profiler.done)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import threading
+
+import cv2
+import numpy as np
+
+from . import analytic_pb2
+
+_PENDING = object()  # results of the last analyzed frame not passed to update() yet
+
+
+class MotionGate:
+    """ Decides whether a frame is worth analyzing by measuring how much of the scene changed.
+
+    Each frame is reduced to a small blurred grayscale copy about `width` pixels wide (sampled
+    with a stride first, so the cost barely depends on the resolution). With method "diff" it
+    is compared to the copy of the last analyzed frame of its source, so slow changes add up
+    until they trigger; with "background" an OpenCV MOG2 background subtractor per source marks
+    the moving pixels instead, which copes better with swaying trees and flicker. With "diff" a
+    pixel has changed when it differs by more than `pixel_threshold` gray levels. The frame is
+    analyzed when more than `threshold` of its pixels (a fraction) have changed or `max_skip`
+    frames in a row have been skipped.
+
+    Skipped frames get the last analyzed frame's FrameData with `carried_forward` set. """
+
+    def __init__(self, threshold=0.01, pixel_threshold=25, max_skip=30, width=160, method="diff"):
+        if method not in ("diff", "background"):
+            raise ValueError("Unknown motion method {!s}".format(method))
+        self.threshold = threshold
+        self.pixel_threshold = pixel_threshold
+        self.max_skip = max_skip
+        self.width = width
+        self.method = method
+        self._init_state()
+
+    def _init_state(self):
+        self.analyzed = 0
+        self.skipped = 0
+        self._sources = {}  # source_id -> [reference or subtractor, last FrameData or _PENDING, frames skipped]
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Worker processes keep references of their own
+        return {"threshold": self.threshold, "pixel_threshold": self.pixel_threshold, "max_skip": self.max_skip,
+                "width": self.width, "method": self.method}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_state()
+
+    def check(self, frame, source_id=""):
+        """ Returns None when the frame should be analyzed (pass its results to update()), or
+        else a FrameData carrying forward the results of the last analyzed frame. """
+        if self.changed(frame, source_id):
+            return None
+        return self.carry(source_id)
+
+    def changed(self, frame, source_id=""):
+        """ The first half of check(): True when the frame should be analyzed (pass its results
+        to update()). For the other frames call carry(), once pending() is False if the results
+        of the source's last analyzed frame are still on their way. """
+        small = self._downscale(frame)
+        with self._lock:
+            state = self._sources.get(source_id)
+            if state is None:
+                self._sources[source_id] = [self._model(small), _PENDING, 0]
+                self.analyzed += 1
+                return True
+            ratio = self._changed(state, small)
+            if state[1] is None or ratio > self.threshold or state[2] >= self.max_skip:
+                if self.method == "diff":
+                    state[0] = small
+                state[1] = _PENDING
+                state[2] = 0
+                self.analyzed += 1
+                return True
+            state[2] += 1
+            return False
+
+    def pending(self, source_id=""):
+        """ Whether the results of the source's last analyzed frame have yet to reach update() """
+        with self._lock:
+            state = self._sources.get(source_id)
+            return state is not None and state[1] is _PENDING
+
+    def carry(self, source_id=""):
+        """ The second half of check(): a FrameData carrying forward the results of the last
+        analyzed frame, or None when there are none (the frame should then be analyzed after all). """
+        with self._lock:
+            state = self._sources.get(source_id)
+            if state is None or state[1] is None or state[1] is _PENDING:
+                if state is not None:
+                    state[1] = _PENDING
+                    state[2] = 0
+                self.analyzed += 1
+                return None
+            self.skipped += 1
+            carried = analytic_pb2.FrameData()
+            carried.CopyFrom(state[1])
+            carried.carried_forward = True
+            return carried
+
+    def update(self, source_id, resp):
+        """ Remember an analyzed frame's results to carry forward. After a failure the next
+        frame is analyzed whatever it shows. """
+        with self._lock:
+            state = self._sources.get(source_id)
+            if state is not None:
+                state[1] = None if resp.status.code else analytic_pb2.FrameData(roi=resp.roi)
+
+    def stats(self):
+        """ A dict of frames analyzed and skipped """
+        with self._lock:
+            return {"analyzed": self.analyzed, "skipped": self.skipped}
+
+    def _changed(self, state, small):
+        # The fraction of pixels of a downscaled frame that changed
+        if self.method == "background":
+            mask = state[0].apply(small)
+        else:
+            reference = state[0]
+            if reference.shape != small.shape:
+                return 1.0
+            mask = cv2.absdiff(small, reference) > self.pixel_threshold
+        return np.count_nonzero(mask) / mask.size
+
+    def _downscale(self, frame):
+        step = max(1, frame.shape[1] // self.width)
+        small = np.ascontiguousarray(frame[::step, ::step])
+        if small.ndim == 3 and small.shape[2] == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        elif small.ndim == 3:
+            small = np.ascontiguousarray(small[..., 0])
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def _model(self, small):
+        if self.method == "diff":
+            return small
+        subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False)
+        subtractor.apply(small)
+        return subtractor
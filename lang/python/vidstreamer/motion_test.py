@@ -0,0 +1,155 @@
+import pickle
+import unittest
+
+import numpy as np
+from google.rpc import code_pb2
+from vidstreamer import analytic_pb2
+from .__init__ import Streamer
+from .motion import MotionGate
+
+
+def scene(box=None, noise=0, seed=0):
+    frame = np.full((240, 320, 3), 60, dtype=np.uint8)
+    frame[40:200, 20:100] = 180
+    if box is not None:
+        x, y = box
+        frame[y:y + 40, x:x + 40] = 250
+    if noise:
+        jitter = np.random.default_rng(seed).integers(-noise, noise + 1, frame.shape)
+        frame = np.clip(frame.astype(int) + jitter, 0, 255).astype(np.uint8)
+    return frame
+
+
+def frame_data(label, code=code_pb2.OK):
+    resp = analytic_pb2.FrameData()
+    resp.roi.add(classification=label)
+    resp.status.code = code
+    return resp
+
+
+class TestMotionGate(unittest.TestCase):
+
+    def test_diff(self):
+        gate = MotionGate(threshold=0.01, max_skip=100)
+        self.assertIsNone(gate.check(scene()))
+        gate.update("", frame_data("still"))
+        for i in range(5):
+            carried = gate.check(scene(noise=8, seed=i))
+            self.assertTrue(carried.carried_forward)
+            self.assertEqual(carried.roi[0].classification, "still")
+        self.assertIsNone(gate.check(scene(box=(200, 100))))
+        gate.update("", frame_data("moved"))
+        self.assertEqual(gate.check(scene(box=(200, 100))).roi[0].classification, "moved")
+        self.assertIsNone(gate.check(scene()))
+        self.assertEqual(gate.stats(), {"analyzed": 3, "skipped": 6})
+
+    def test_max_skip_and_sources(self):
+        gate = MotionGate(max_skip=2)
+        analyzed = []
+        for i in range(7):
+            for source in ("a", "b"):
+                if gate.check(scene(), source) is None:
+                    analyzed.append((i, source))
+                    gate.update(source, frame_data(source))
+        self.assertEqual(analyzed, [(i, s) for i in (0, 3, 6) for s in ("a", "b")])
+        self.assertEqual(gate.check(scene(), "b").roi[0].classification, "b")
+
+    def test_failures_not_carried(self):
+        gate = MotionGate()
+        gate.check(scene())
+        gate.update("", frame_data("x", code=code_pb2.INTERNAL))
+        self.assertIsNone(gate.check(scene()))
+        gate.update("", frame_data("x"))
+        self.assertIsNotNone(gate.check(scene()))
+
+    def test_results_pending(self):
+        gate = MotionGate()
+        self.assertTrue(gate.changed(scene(), "cam"))
+        self.assertFalse(gate.changed(scene(), "cam"))
+        self.assertTrue(gate.pending("cam"))
+        gate.update("cam", frame_data("late"))
+        self.assertFalse(gate.pending("cam"))
+        self.assertEqual(gate.carry("cam").roi[0].classification, "late")
+        self.assertEqual(gate.stats(), {"analyzed": 1, "skipped": 1})
+
+    def test_background(self):
+        gate = MotionGate(method="background", max_skip=100)
+        gate.check(scene())
+        gate.update("", frame_data("still"))
+        for _ in range(5):
+            self.assertIsNotNone(gate.check(scene()))
+        self.assertIsNone(gate.check(scene(box=(200, 100))))
+        with self.assertRaises(ValueError):
+            MotionGate(method="optical_flow")
+
+    def test_pickle(self):
+        gate = MotionGate(threshold=0.05)
+        gate.check(scene())
+        copy = pickle.loads(pickle.dumps(gate))
+        self.assertEqual((copy.threshold, copy.stats()), (0.05, {"analyzed": 0, "skipped": 0}))
+
+
+class TestStreamerMotion(unittest.TestCase):
+
+    def test_gated_stream(self):
+        calls = []
+
+        def analytic(frame, req, resp):
+            calls.append(req.frame_num)
+            resp.roi.add(classification="x", confidence=float(req.frame_num))
+
+        streamer = Streamer(func=analytic, motion_threshold=0.01, motion_max_skip=10)
+        resps = []
+        streamer.register_output_func(lambda frame, req, resp: resps.append(resp))
+        frames = [scene()] * 3 + [scene(box=(200, 100))] * 3
+        streamer.stream_frames((frame, 0.0, i, "cam") for i, frame in enumerate(frames))
+        self.assertEqual(calls, [0, 3])
+        self.assertEqual([r.carried_forward for r in resps], [False, True, True, False, True, True])
+        self.assertEqual([r.roi[0].confidence for r in resps], [0, 0, 0, 3, 3, 3])
+        self.assertEqual(streamer.stats()["motion"]["count"], 6)
+
+    def test_batched_stream(self):
+        calls = []
+
+        def batch_analytic(frames, reqs, resps):
+            calls.extend(req.frame_num for req in reqs)
+            for req, resp in zip(reqs, resps):
+                resp.roi.add(classification=req.source_id, confidence=float(req.frame_num))
+
+        streamer = Streamer(batch_func=batch_analytic, batch_size=4, max_wait_ms=5, motion_threshold=0.01)
+        resps = []
+        streamer.register_output_func(lambda frame, req, resp: resps.append((req.source_id, resp)))
+        frames = [scene()] * 3 + [scene(box=(200, 100))] * 3
+        streamer.stream_frames((frame, 0.0, i, source) for i, frame in enumerate(frames) for source in ("a", "b"))
+        self.assertEqual(sorted(calls), [0, 0, 3, 3])
+        self.assertEqual([resp.carried_forward for source, resp in resps if source == "a"],
+                         [False, True, True, False, True, True])
+        self.assertTrue(all(resp.roi[0].classification == source for source, resp in resps))
+        self.assertEqual([resp.roi[0].confidence for source, resp in resps if source == "b"], [0, 0, 0, 3, 3, 3])
+        self.assertEqual(streamer.stats()["motion"]["count"], 12)
+
+    def test_batches_fill_while_gated(self):
+        sizes = []
+
+        def batch_analytic(frames, reqs, resps):
+            sizes.append(len(frames))
+
+        streamer = Streamer(batch_func=batch_analytic, batch_size=4, max_wait_ms=50, motion_threshold=0.0)
+        streamer.register_output_func(None)
+        streamer.stream_frames((scene(box=(10 * i, 100)), 0.0, i, "cam") for i in range(12))
+        self.assertEqual(sizes, [4, 4, 4])
+
+    def test_with_cache(self):
+        def analytic(frame, req, resp):
+            resp.roi.add(classification="bright" if frame.flat[0] > 128 else "dark")
+
+        streamer = Streamer(func=analytic, cache_size=10, motion_threshold=0.1)
+        dark, bright = np.full((48, 64, 3), 10, dtype=np.uint8), np.full((48, 64, 3), 240, dtype=np.uint8)
+        resps = [streamer.process_frame(frame, frame_num=i)[1] for i, frame in enumerate([dark, bright, dark, dark])]
+        self.assertEqual([r.roi[0].classification for r in resps], ["dark", "bright", "dark", "dark"])
+        self.assertEqual([r.carried_forward for r in resps], [False, False, False, True])
+        self.assertEqual(streamer.cache.stats()["hits"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import collections
+import logging
+import threading
+
+import cv2
+import numpy as np
+
+from .masks import proto_to_mask
+
+
+class OverlayRenderer:
+    """ Draws the ROIs of a FrameData onto a frame.
+
+    All bounding boxes are drawn with a single cv2.polylines call, and each label is rendered
+    once per (classification, confidence bucket) into a cached sprite that is then stamped onto
+    the frame with NumPy, so the cost per ROI stays small as detection counts grow. Confidences
+    are shown rounded to `confidence_step`; at most `max_sprites` labels are cached. Masks are
+    blended in with `mask_alpha`. """
+
+    def __init__(self, box_color=(255, 0, 0), text_color=(255, 255, 0), thickness=2,
+                 font=cv2.FONT_HERSHEY_COMPLEX, font_scale=1.0, confidence_step=0.05,
+                 mask_alpha=0.4, max_sprites=1024):
+        self.box_color = box_color
+        self.text_color = text_color
+        self.thickness = thickness
+        self.font = font
+        self.font_scale = font_scale
+        self.confidence_step = confidence_step
+        self.mask_alpha = mask_alpha
+        self.max_sprites = max_sprites
+        self._sprites = collections.OrderedDict()
+
+    def draw(self, frame, resp, copy=True):
+        """ Returns the frame with the ROIs of `resp` drawn on it. With `copy` False the frame is
+        drawn on in place where possible (it is still copied if read-only or grayscale). """
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        elif copy or not frame.flags.writeable:
+            frame = frame.copy()
+        corners = []
+        labels = []
+        for roi in resp.roi:
+            if roi.HasField("box"):
+                box = roi.box
+                corners.append((box.corner1.x, box.corner1.y, box.corner2.x, box.corner2.y))
+                labels.append((roi.classification, roi.confidence, box.corner1.x, box.corner1.y))
+            elif roi.HasField("mask"):
+                self._blend_mask(frame, roi.mask)
+                labels.append((roi.classification, roi.confidence, roi.mask.x, roi.mask.y))
+        if corners:
+            c = np.array(corners, dtype=np.int32)
+            polys = np.stack([c[:, [0, 1]], c[:, [2, 1]], c[:, [2, 3]], c[:, [0, 3]]], axis=1)
+            cv2.polylines(frame, polys, True, self.box_color, self.thickness)
+        if labels:
+            self._stamp(frame, labels)
+        return frame
+
+    def sprite(self, classification, confidence):
+        """ The cached label for a classification and confidence, as the row and column offsets
+        of its text pixels relative to the left end of the baseline. """
+        if self.confidence_step:
+            confidence = round(confidence / self.confidence_step) * self.confidence_step
+        key = (classification, round(confidence, 4))
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            return sprite
+        text = "{!s} - {:.2f}".format(classification, confidence)
+        (width, height), baseline = cv2.getTextSize(text, self.font, self.font_scale, 1)
+        canvas = np.zeros((height + baseline + 1, width), dtype=np.uint8)
+        cv2.putText(canvas, text, (0, height), self.font, self.font_scale, 255)
+        rows, cols = np.nonzero(canvas)
+        sprite = (rows.astype(np.int32) - height, cols.astype(np.int32))
+        self._sprites[key] = sprite
+        if len(self._sprites) > self.max_sprites:
+            self._sprites.popitem(last=False)
+        return sprite
+
+    def _stamp(self, frame, labels):
+        # Like cv2.putText, each label is placed with the left end of its baseline at (x, y).
+        # The text pixels of every label are gathered and written with one assignment.
+        sprites = [self.sprite(classification, confidence) for classification, confidence, _, _ in labels]
+        rows = np.concatenate([sprite[0] + y for sprite, (_, _, _, y) in zip(sprites, labels)])
+        cols = np.concatenate([sprite[1] + x for sprite, (_, _, x, _) in zip(sprites, labels)])
+        inside = (rows >= 0) & (cols >= 0) & (rows < frame.shape[0]) & (cols < frame.shape[1])
+        frame[rows[inside], cols[inside]] = self.text_color[:frame.shape[2]]
+
+    def _blend_mask(self, frame, mask_msg):
+        mask = proto_to_mask(mask_msg)
+        region = frame[mask_msg.y:mask_msg.y + mask.shape[0], mask_msg.x:mask_msg.x + mask.shape[1]]
+        mask = mask[:region.shape[0], :region.shape[1]]
+        color = np.array(self.box_color[:frame.shape[2]], dtype=np.float32)
+        blended = region[mask] * (1 - self.mask_alpha) + color * self.mask_alpha
+        region[mask] = blended.astype(frame.dtype)
+
+
+class Display:
+    """ An output function that shows frames with their ROIs drawn on them, on its own thread.
+
+    Calling the display only hands it the newest frame; if it is still drawing the previous
+    one, the waiting frame is replaced and counted in `dropped`, so a slow window never holds up
+    the analytic. With `headless` nothing is shown: the last rendered frame is kept in an
+    off-screen buffer, returned by `latest()`, for servers without a display. """
+
+    def __init__(self, window_name="Output", renderer=None, headless=False):
+        self.window_name = window_name
+        self.renderer = renderer or OverlayRenderer()
+        self.headless = headless
+        self.dropped = 0
+        self.rendered = 0
+        self._init_state()
+
+    def _init_state(self):
+        self._pending = None
+        self._buffer = None
+        self._closed = False
+        self._thread = None
+        self._cond = threading.Condition()
+
+    def __getstate__(self):
+        # Worker processes get the settings, not the display thread
+        state = self.__dict__.copy()
+        for key in ["_pending", "_buffer", "_closed", "_thread", "_cond"]:
+            del state[key]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_state()
+
+    def __call__(self, frame, req, resp):
+        # The caller may reuse the frame's buffer (e.g. a shared-memory slot), so take a copy
+        item = (np.array(frame, copy=True), resp)
+        with self._cond:
+            if self._closed:
+                return
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="display", daemon=True)
+                self._thread.start()
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = item
+            self._cond.notify_all()
+
+    def latest(self):
+        """ The most recently rendered frame, or None if nothing has been rendered yet. """
+        with self._cond:
+            return self._buffer
+
+    def wait(self, count, timeout=None):
+        """ Wait until at least `count` frames have been rendered. Returns False on timeout. """
+        with self._cond:
+            return self._cond.wait_for(lambda: self.rendered >= count, timeout=timeout)
+
+    def close(self, timeout=None):
+        """ Render the frame still waiting, if any, and stop the display thread. """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+    def _run(self):
+        try:
+            while True:
+                with self._cond:
+                    while self._pending is None and not self._closed:
+                        self._cond.wait()
+                    if self._pending is None:
+                        break
+                    frame, resp = self._pending
+                    self._pending = None
+                try:
+                    image = self.renderer.draw(frame, resp, copy=False)
+                except Exception:
+                    logging.exception("Rendering a frame failed")
+                    continue
+                if not self.headless:
+                    cv2.imshow(self.window_name, image)
+                    cv2.waitKey(1)
+                with self._cond:
+                    self._buffer = image
+                    self.rendered += 1
+                    self._cond.notify_all()
+        finally:
+            if not self.headless and self.rendered:
+                cv2.destroyWindow(self.window_name)
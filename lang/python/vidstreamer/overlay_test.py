@@ -0,0 +1,69 @@
+import threading
+import unittest
+
+import numpy as np
+from vidstreamer import analytic_pb2
+from .masks import mask_to_proto
+from .overlay import Display, OverlayRenderer
+from .rois import add_detections
+
+
+class SlowRenderer(OverlayRenderer):
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def draw(self, frame, resp, copy=True):
+        self.release.wait(timeout=5)
+        return super().draw(frame, resp, copy=copy)
+
+
+class TestOverlay(unittest.TestCase):
+
+    def setUp(self):
+        self.frame = np.zeros((120, 160, 3), dtype=np.uint8)
+        self.resp = analytic_pb2.FrameData()
+        add_detections(self.resp, [[10, 40, 60, 100], [80, 30, 150, 110]], [0.91, 0.42], [0, 1], ["person", "car"])
+
+    def test_draw(self):
+        renderer = OverlayRenderer()
+        out = renderer.draw(self.frame, self.resp)
+        self.assertFalse(self.frame.any())
+        np.testing.assert_array_equal(out[70, 10], (255, 0, 0))
+        np.testing.assert_array_equal(out[70, 35], (0, 0, 0))
+        self.assertTrue((out[25:40, 10:60] == (255, 255, 0)).all(axis=2).any())
+        self.assertEqual(len(renderer._sprites), 2)
+        renderer.draw(self.frame, self.resp)
+        self.assertEqual(len(renderer._sprites), 2)
+        self.assertIs(renderer.sprite("person", 0.9), renderer.sprite("person", 0.91))
+
+    def test_draw_read_only_gray_and_mask(self):
+        renderer = OverlayRenderer(mask_alpha=1.0)
+        gray = np.zeros((120, 160), dtype=np.uint8)
+        gray.flags.writeable = False
+        mask = np.zeros((120, 160), dtype=bool)
+        mask[5:15, 100:120] = True
+        resp = analytic_pb2.FrameData()
+        resp.roi.add(classification="blob", mask=mask_to_proto(mask))
+        out = renderer.draw(gray, resp, copy=False)
+        self.assertEqual(out.shape, (120, 160, 3))
+        np.testing.assert_array_equal(out[10, 110], (255, 0, 0))
+        np.testing.assert_array_equal(out[10, 90], (0, 0, 0))
+
+    def test_headless_display_drops_stale_frames(self):
+        renderer = SlowRenderer()
+        display = Display(renderer=renderer, headless=True)
+        for i in range(5):
+            frame = np.full((120, 160, 3), i, dtype=np.uint8)
+            display(frame, None, self.resp)
+            frame[:] = 255  # the display must have taken its own copy
+        renderer.release.set()
+        display.close(timeout=5)
+        self.assertEqual(display.rendered + display.dropped, 5)
+        self.assertGreater(display.dropped, 0)
+        self.assertEqual(display.latest()[0, 0, 0], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import logging
+import queue
+import threading
+
+_DONE = object()
+
+
+class _StageError:
+    def __init__(self, exc):
+        self.exc = exc
+
+
+class Pipeline:
+    """ Runs a chain of stages on separate threads joined by bounded queues.
+
+    The source iterable is consumed on its own thread (e.g. the capture/decode loop) and every
+    stage function runs on its own thread, taking one item and returning the item handed to the
+    next stage. Results of the last stage are yielded to the caller in the order the source
+    produced them. A full queue blocks the stage feeding it, so at most `queue_size` items wait
+    between any two stages. """
+
+    def __init__(self, stages, queue_size=8, name="pipeline"):
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.name = name
+
+    def run(self, source):
+        stop = threading.Event()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(target=self._feed, args=(source, queues[0], stop),
+                                    name="{!s}-source".format(self.name), daemon=True)]
+        for i, stage in enumerate(self.stages):
+            threads.append(threading.Thread(target=self._work, args=(stage, queues[i], queues[i + 1], stop),
+                                            name="{!s}-stage{!s}".format(self.name, i), daemon=True))
+        for t in threads:
+            t.start()
+
+        try:
+            while True:
+                item = _get(queues[-1], stop)
+                if item is _DONE:
+                    break
+                if isinstance(item, _StageError):
+                    raise item.exc
+                yield item
+        finally:
+            stop.set()
+            for t in threads[1:]:
+                t.join()
+            # The source thread may be blocked inside the source iterator (e.g. waiting on a
+            # client), so don't wait on it indefinitely; it exits once its next put sees the flag.
+            threads[0].join(timeout=1.0)
+
+    def _feed(self, source, out_q, stop):
+        try:
+            for item in source:
+                if not _put(out_q, item, stop):
+                    return
+        except Exception as e:
+            logging.exception("Pipeline source failed")
+            _put(out_q, _StageError(e), stop)
+            return
+        _put(out_q, _DONE, stop)
+
+    def _work(self, stage, in_q, out_q, stop):
+        while True:
+            item = _get(in_q, stop)
+            if item is None and stop.is_set():
+                return
+            if item is _DONE or isinstance(item, _StageError):
+                _put(out_q, item, stop)
+                return
+            try:
+                result = stage(item)
+            except Exception as e:
+                logging.exception("Pipeline stage failed")
+                _put(out_q, _StageError(e), stop)
+                return
+            if not _put(out_q, result, stop):
+                return
+
+
+def _put(q, item, stop, poll=0.1):
+    """ Blocking put that gives up once the pipeline has been stopped. """
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=poll)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop, poll=0.1):
+    """ Blocking get that returns None once the pipeline has been stopped. """
+    while not stop.is_set():
+        try:
+            return q.get(timeout=poll)
+        except queue.Empty:
+            continue
+    return None
@@ -0,0 +1,94 @@
+import numpy as np
+
+from . import analytic_pb2
+
+BOX_FORMATS = ("xyxy", "xywh")
+
+
+def select_detections(scores, threshold=None, top_k=None):
+    """ Indices of the detections to keep: those scoring at least `threshold`, cut down to the
+    `top_k` best. With `top_k` the indices are ordered by descending score, otherwise they keep
+    the input order. """
+    scores = np.asarray(scores, dtype=np.float32).ravel()
+    keep = np.arange(scores.size)
+    if threshold is not None:
+        keep = np.flatnonzero(scores >= threshold)
+    if top_k is not None and keep.size:
+        kept = scores[keep]
+        if top_k < keep.size:
+            best = np.argpartition(-kept, top_k - 1)[:top_k]
+        else:
+            best = np.arange(keep.size)
+        keep = keep[best[np.argsort(-kept[best], kind="stable")]]
+    return keep
+
+
+def add_detections(resp, boxes, scores, class_ids=None, labels=None, threshold=None, top_k=None, box_format="xyxy"):
+    """ Append a RegionOfInterest with a bounding box to `resp.roi` for each detection.
+
+    `boxes` is an Nx4 array in pixels, either corners ("xyxy") or corner plus size ("xywh"),
+    `scores` holds the N confidences and `class_ids` the N integer classes, which are looked up
+    in `labels` (a list or dict) to get the classification; without labels the ID itself is
+    used. Thresholding, top-k and the conversion to ints all happen on the arrays, so the only
+    per-detection Python work is creating the messages. Returns the number of ROIs added. """
+    if box_format not in BOX_FORMATS:
+        raise ValueError("Unknown box format {!s}".format(box_format))
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    scores = np.asarray(scores, dtype=np.float32).ravel()
+    if scores.size != boxes.shape[0]:
+        raise ValueError("Got {!s} boxes but {!s} scores".format(boxes.shape[0], scores.size))
+    keep = select_detections(scores, threshold=threshold, top_k=top_k)
+    boxes = boxes[keep]
+    if box_format == "xywh":
+        boxes[:, 2:] += boxes[:, :2]
+    info = np.iinfo(np.int32)
+    corners = np.clip(np.rint(boxes), info.min, info.max).astype(np.int32).tolist()
+    confidences = scores[keep].tolist()
+    if class_ids is None:
+        names = [""] * keep.size
+    else:
+        ids = np.asarray(class_ids).ravel()[keep].astype(np.int64).tolist()
+        if labels is None:
+            names = [str(i) for i in ids]
+        else:
+            lookup = labels.get if isinstance(labels, dict) else (lambda i: labels[i] if 0 <= i < len(labels) else None)
+            names = [lookup(i) for i in ids]
+            names = [str(i) if name is None else name for i, name in zip(ids, names)]
+
+    add, Box, Point = resp.roi.add, analytic_pb2.BoundingBox, analytic_pb2.Point
+    for (x1, y1, x2, y2), confidence, name in zip(corners, confidences, names):
+        add(box=Box(corner1=Point(x=x1, y=y1), corner2=Point(x=x2, y=y2)),
+            classification=name, confidence=confidence)
+    return keep.size
+
+
+def rois_to_arrays(resp, labels=None):
+    """ The inverse of add_detections: returns (boxes, scores, classes) for the ROIs in a
+    FrameData (or any sequence of RegionOfInterest). boxes is an Nx4 int32 array of corners;
+    masks are given their bounding window and legacy pixel lists the box around their points.
+    classes is a list of classification strings, or with `labels` an int64 array of class IDs
+    (-1 for names not in labels). """
+    rois = resp.roi if isinstance(resp, analytic_pb2.FrameData) else resp
+    boxes = np.zeros((len(rois), 4), dtype=np.int32)
+    scores = np.fromiter((roi.confidence for roi in rois), dtype=np.float32, count=len(rois))
+    names = [roi.classification for roi in rois]
+    for i, roi in enumerate(rois):
+        if roi.HasField("box"):
+            box = roi.box
+            boxes[i] = (box.corner1.x, box.corner1.y, box.corner2.x, box.corner2.y)
+        elif roi.HasField("mask"):
+            boxes[i] = _mask_box(roi.mask)
+    if labels is None:
+        return boxes, scores, names
+    if not isinstance(labels, dict):
+        labels = dict(enumerate(labels))
+    ids = dict((name, i) for i, name in labels.items())
+    return boxes, scores, np.array([ids.get(name, -1) for name in names], dtype=np.int64)
+
+
+def _mask_box(mask):
+    if mask.pixel and not (mask.counts or mask.bitmap):
+        xs = [p.x for p in mask.pixel]
+        ys = [p.y for p in mask.pixel]
+        return min(xs), min(ys), max(xs) + 1, max(ys) + 1
+    return mask.x, mask.y, mask.x + mask.width, mask.y + mask.height
@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+from vidstreamer import analytic_pb2
+from .masks import mask_to_proto
+from .rois import add_detections, rois_to_arrays, select_detections
+
+
+class TestRois(unittest.TestCase):
+
+    def setUp(self):
+        self.boxes = np.array([[0, 0, 10, 10], [5, 5, 20.6, 30], [1, 2, 3, 4], [7, 8, 9, 10]], dtype=np.float32)
+        self.scores = np.array([0.9, 0.3, 0.6, 0.8], dtype=np.float32)
+        self.class_ids = np.array([0, 1, 2, 5])
+        self.labels = ["person", "car", "dog"]
+
+    def test_select(self):
+        self.assertEqual(select_detections(self.scores).tolist(), [0, 1, 2, 3])
+        self.assertEqual(select_detections(self.scores, threshold=0.5).tolist(), [0, 2, 3])
+        self.assertEqual(select_detections(self.scores, top_k=2).tolist(), [0, 3])
+        self.assertEqual(select_detections(self.scores, threshold=0.5, top_k=10).tolist(), [0, 3, 2])
+        self.assertEqual(select_detections([], top_k=3).tolist(), [])
+
+    def test_add_detections(self):
+        resp = analytic_pb2.FrameData()
+        added = add_detections(resp, self.boxes, self.scores, self.class_ids, self.labels, threshold=0.25)
+        self.assertEqual(added, 4)
+        self.assertEqual([roi.classification for roi in resp.roi], ["person", "car", "dog", "5"])
+        box = resp.roi[1].box
+        self.assertEqual((box.corner1.x, box.corner1.y, box.corner2.x, box.corner2.y), (5, 5, 21, 30))
+        self.assertAlmostEqual(resp.roi[0].confidence, 0.9, places=6)
+
+        boxes, scores, classes = rois_to_arrays(resp, labels=self.labels)
+        np.testing.assert_array_equal(boxes, np.rint(self.boxes))
+        np.testing.assert_array_equal(scores, self.scores)
+        self.assertEqual(classes.tolist(), [0, 1, 2, -1])
+
+    def test_xywh_top_k(self):
+        resp = analytic_pb2.FrameData()
+        add_detections(resp, [[10, 20, 5, 5], [0, 0, 1, 1]], [0.1, 0.2], top_k=1, box_format="xywh")
+        self.assertEqual(len(resp.roi), 1)
+        boxes, scores, classes = rois_to_arrays(resp)
+        self.assertEqual(boxes.tolist(), [[0, 0, 1, 1]])
+        self.assertEqual(classes, [""])
+        with self.assertRaises(ValueError):
+            add_detections(resp, self.boxes, self.scores[:2])
+
+    def test_mask_rois(self):
+        mask = np.zeros((10, 10), dtype=bool)
+        mask[2:5, 3:9] = True
+        resp = analytic_pb2.FrameData()
+        resp.roi.add(classification="blob", mask=mask_to_proto(mask))
+        boxes, _, classes = rois_to_arrays(resp.roi)
+        self.assertEqual(boxes.tolist(), [[3, 2, 9, 5]])
+        self.assertEqual(classes, ["blob"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import logging
+
+import cv2
+
+
+class FrameSampler:
+    """ Reads only selected frames of a video.
+
+    Frames are selected by a `stride` (every Nth frame), a `sample_fps` (frames per second of
+    video, converted to a stride using the video's frame rate) and optional `time_ranges`, a list
+    of (start, end) times in seconds; the stride applies within each range. Frames in between
+    are skipped with `grab()`, which demuxes without converting pixels, and gaps longer than
+    `seek_threshold` frames are skipped by seeking with CAP_PROP_POS_FRAMES instead. Yields
+    (frame, timestamp, frame_num, source_id) with the frame's true index in the video and its
+    media timestamp (CAP_PROP_POS_MSEC) in seconds. """
+
+    def __init__(self, stride=1, sample_fps=None, time_ranges=None, seek_threshold=30):
+        self.stride = max(1, int(stride or 1))
+        self.sample_fps = sample_fps
+        self.time_ranges = time_ranges
+        self.seek_threshold = seek_threshold
+
+    def read(self, cap, source_id=None):
+        pos = 0
+        for target in self.targets(cap.get(cv2.CAP_PROP_FPS)):
+            if target - pos > self.seek_threshold:
+                if cap.set(cv2.CAP_PROP_POS_FRAMES, target):
+                    pos = target
+            while pos < target:
+                if not cap.grab():
+                    return
+                pos += 1
+            ret, frame = cap.read()
+            if not ret:
+                logging.info("No frame available")
+                return
+            pos += 1
+            yield frame, cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0, target, source_id
+
+    def targets(self, fps):
+        """ Yield the indices of the frames to analyze, in increasing order. """
+        if (self.sample_fps or self.time_ranges) and not fps:
+            raise ValueError("Sampling by time needs a video with a known frame rate")
+        step = self.stride
+        if self.sample_fps:
+            step = max(step, int(round(fps / self.sample_fps)))
+        ranges = [(0, None)]
+        if self.time_ranges:
+            ranges = sorted((int(round(start * fps)), int(round(end * fps)) if end is not None else None)
+                            for start, end in self.time_ranges)
+        last = -1
+        for start, end in ranges:
+            frame_num = max(start, last + 1)
+            while end is None or frame_num < end:
+                yield frame_num
+                last = frame_num
+                frame_num += step
@@ -0,0 +1,178 @@
+import logging
+import threading
+
+import grpc
+from concurrent import futures
+from google.rpc import code_pb2
+
+from . import analytic_pb2, analytic_pb2_grpc
+from .frames import decode_frame
+from .pipeline import Pipeline
+
+ANALYTIC_SERVICE = analytic_pb2.DESCRIPTOR.services_by_name["Analytic"].full_name
+
+
+def status_frame_data(code, message):
+    """ A FrameData carrying only an error status (a google.rpc.code_pb2 value) """
+    resp = analytic_pb2.FrameData()
+    resp.status.code = code
+    resp.status.message = message
+    return resp
+
+
+def composite_frame(request, resp, analytic=None):
+    """ Package an analytic result as a CompositeFrame. The client already holds the pixels, so
+    the returned InputFrame carries only the request's metadata. """
+    result = analytic_pb2.CompositeFrame(data=resp, analytic=analytic)
+    result.frame.CopyFrom(request)
+    result.frame.ClearField("frame")
+    return result
+
+
+class StreamerServicer(analytic_pb2_grpc.AnalyticServicer):
+    """ Implements the Analytic gRPC service on top of a Streamer's submit_frame.
+
+    StreamVideoFrame decodes, analyzes and serializes frames on separate threads and keeps at
+    most `window` frames of each stream in flight. Frames are submitted to the streamer without
+    waiting for their results, so with `batch_func` the frames in flight share batches. Once
+    the window is full no more requests are read off the stream, so gRPC flow control pushes
+    back on the client instead of the server buffering frames without limit.
+
+    FanoutFrame sends the frame on to every analytic registered with `fanout` (a FanoutEngine)
+    and passes the gathered CompositeResults to `results_func`. With a `store` (a ResultStore)
+    every result is kept there as well, and GetFrame answers from it without running any
+    analytic again. """
+
+    def __init__(self, streamer, name="vidstreamer", addr="", window=8, fanout=None, results_func=None, store=None):
+        self.streamer = streamer
+        self.analytic = analytic_pb2.AnalyticData(name=name, addr=addr)
+        self.window = window
+        self.fanout = fanout
+        self.results_func = results_func
+        self.store = store
+
+    def ProcessVideoFrame(self, request, context):
+        with self.streamer.metrics.time("decode"):
+            frame = decode_frame(request.frame)
+        if frame is None:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "Could not decode frame {!s}".format(request.frame_num))
+        return self.process(frame, request)
+
+    def StreamVideoFrame(self, request_iterator, context):
+        """ Yields serialized CompositeFrames in request order; see `stream_handler`. A frame that
+        can't be decoded gets an INVALID_ARGUMENT status in its result instead of ending the stream. """
+        in_flight = threading.Semaphore(self.window)
+        finished = threading.Event()
+
+        def requests():
+            for request in request_iterator:
+                while not in_flight.acquire(timeout=0.1):
+                    if finished.is_set() or not context.is_active():
+                        return
+                yield request
+
+        metrics = self.streamer.metrics
+
+        def decode(request):
+            with metrics.time("decode"):
+                return decode_frame(request.frame), request
+
+        def submit(item):
+            frame, request = item
+            if frame is None:
+                return frame, request, None
+            return frame, request, self.streamer.submit_frame(frame, request)
+
+        def serialize(item):
+            frame, request, future = item
+            if future is None:
+                resp = status_frame_data(code_pb2.INVALID_ARGUMENT, "Could not decode frame {!s}".format(request.frame_num))
+                result = composite_frame(request, resp, self.analytic)
+            else:
+                result = self.finish(frame, request, future)
+            with metrics.time("serialize"):
+                return result.SerializeToString()
+
+        pipeline = Pipeline([decode, submit, serialize], queue_size=self.window, name="stream")
+        try:
+            for data in pipeline.run(requests()):
+                in_flight.release()
+                yield data
+        finally:
+            finished.set()
+
+    def FanoutFrame(self, request, context):
+        if self.fanout is None:
+            context.abort(grpc.StatusCode.UNIMPLEMENTED, "No analytics registered for fanout")
+        results = self.fanout.fanout(request)
+        if self.store is not None:
+            self.store.put_results(results)
+        if self.results_func:
+            self.results_func(request, results)
+        return analytic_pb2.Empty()
+
+    def GetFrame(self, request, context):
+        if self.store is None:
+            context.abort(grpc.StatusCode.UNIMPLEMENTED, "Results are not being stored")
+        return analytic_pb2.CompositeResults(results=self.store.query(request))
+
+    def CheckStatus(self, request, context):
+        return analytic_pb2.AnalyticStatus(status="SERVING")
+
+    def process(self, frame, request):
+        """ Run a decoded frame through the streamer and package the result as a CompositeFrame.
+        A failing analytic is reported in `data.status` rather than failing the call. """
+        return self.finish(frame, request, self.streamer.submit_frame(frame, request))
+
+    def finish(self, frame, request, future):
+        """ process() for a frame already handed to the streamer's submit_frame() """
+        try:
+            req, resp = self.streamer.finish_frame(frame, future)
+        except Exception as e:
+            logging.exception("Analytic failed on frame {!s}".format(request.frame_num))
+            resp = status_frame_data(code_pb2.INTERNAL, str(e))
+        result = composite_frame(request, resp, self.analytic)
+        if self.store is not None:
+            self.store.put(result)
+        return result
+
+
+def bind_address(host, port):
+    """ host:port, bracketing IPv6 hosts such as the default "::" """
+    if ":" in host:
+        return "[{!s}]:{!s}".format(host, port)
+    return "{!s}:{!s}".format(host, port)
+
+
+def stream_handler(servicer):
+    """ A StreamVideoFrame handler whose responses are already serialized by the servicer's
+    pipeline, so serialization overlaps the analytic instead of running on the gRPC thread. """
+    handler = grpc.stream_stream_rpc_method_handler(
+        servicer.StreamVideoFrame,
+        request_deserializer=analytic_pb2.InputFrame.FromString,
+        response_serializer=lambda data: data)
+    return grpc.method_handlers_generic_handler(ANALYTIC_SERVICE, {"StreamVideoFrame": handler})
+
+
+def create_grpc_server(streamer, host="::", port=50051, max_workers=10, window=8, fanout=None, results_func=None,
+                       store=None):
+    """ Build (but don't start) a gRPC server for the streamer. Returns the server and the bound
+    port, which differs from `port` when port 0 asks for any free port. Each StreamVideoFrame
+    call keeps up to `window` frames in flight and occupies one of the `max_workers` threads.
+    `fanout` and `results_func` serve FanoutFrame and `store` GetFrame; see StreamerServicer. """
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+    servicer = StreamerServicer(streamer, window=window, fanout=fanout, results_func=results_func, store=store)
+    # Registered first so it takes precedence over the generated StreamVideoFrame handler
+    server.add_generic_rpc_handlers((stream_handler(servicer),))
+    analytic_pb2_grpc.add_AnalyticServicer_to_server(servicer, server)
+    bound = server.add_insecure_port(bind_address(host, port))
+    return server, bound
+
+
+def serve_grpc(streamer, host="::", port=50051, max_workers=10, window=8, fanout=None, results_func=None, store=None):
+    """ Run the gRPC server until it is terminated. """
+    server, bound = create_grpc_server(streamer, host=host, port=port, max_workers=max_workers, window=window,
+                                       fanout=fanout, results_func=results_func, store=store)
+    server.start()
+    logging.info("gRPC server running on {!s}:{!s}".format(host, bound))
+    server.wait_for_termination()
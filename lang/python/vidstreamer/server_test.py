@@ -0,0 +1,126 @@
+import unittest
+
+import cv2
+import grpc
+import numpy as np
+from vidstreamer import analytic_pb2
+from .__init__ import Streamer
+from .client import AnalyticClient
+from .server import create_grpc_server
+
+
+def shape_analytic(frame, req, resp):
+    roi = resp.roi.add()
+    roi.classification = "{!s}x{!s}".format(frame.shape[0], frame.shape[1])
+    roi.confidence = float(req.frame_num)
+
+
+def failing_analytic(frame, req, resp):
+    raise ValueError("model not loaded")
+
+
+class FakeCapture:
+    def __init__(self, count, shape=(32, 48, 3)):
+        self.frames = [np.full(shape, i, dtype=np.uint8) for i in range(count)]
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if not self.frames:
+            return False, None
+        return True, self.frames.pop(0)
+
+
+def encoded_frame(frame_num, shape=(32, 48, 3)):
+    ok, img = cv2.imencode(".png", np.zeros(shape, dtype=np.uint8))
+    return analytic_pb2.InputFrame(frame=analytic_pb2.Frame(img=img.tobytes()), frame_num=frame_num, timestamp=1.5)
+
+
+def serve(test, func, streamer_args=None, **kwargs):
+    """Serve func on a local port until test finishes and return the server's address."""
+    streamer = Streamer(func=func, **(streamer_args or {}))
+    streamer.register_output_func(None)
+    server, port = create_grpc_server(streamer, host="localhost", port=0, max_workers=4, **kwargs)
+    server.start()
+    test.addCleanup(server.stop, None)
+    return "localhost:{!s}".format(port)
+
+
+def connect(test, target):
+    client = AnalyticClient(target)
+    test.addCleanup(client.close)
+    return client
+
+
+class TestGrpcServer(unittest.TestCase):
+
+    def start(self, func, window=8, **kwargs):
+        return connect(self, serve(self, func, streamer_args=kwargs, window=window))
+
+    def test_process_video_frame(self):
+        stub = self.start(shape_analytic).stub
+        result = stub.ProcessVideoFrame(encoded_frame(7))
+        self.assertEqual(result.frame.frame_num, 7)
+        self.assertFalse(result.frame.HasField("frame"))
+        self.assertEqual(result.data.roi[0].classification, "32x48")
+        self.assertEqual(result.data.roi[0].confidence, 7.0)
+
+    def test_stream_video_frame(self):
+        stub = self.start(shape_analytic).stub
+        frames = [encoded_frame(i) for i in range(5)]
+        frames.insert(2, analytic_pb2.InputFrame(frame_num=99))
+        results = list(stub.StreamVideoFrame(iter(frames)))
+        self.assertEqual([r.frame.frame_num for r in results], [0, 1, 99, 2, 3, 4])
+        self.assertEqual(results[2].data.status.code, grpc.StatusCode.INVALID_ARGUMENT.value[0])
+        self.assertEqual(results[3].data.roi[0].classification, "32x48")
+
+    def test_stream_shares_batches(self):
+        sizes = []
+
+        def batch_analytic(frames, reqs, resps):
+            sizes.append(len(frames))
+            for frame, req, resp in zip(frames, reqs, resps):
+                shape_analytic(frame, req, resp)
+
+        client = self.start(None, batch_func=batch_analytic, batch_size=8, max_wait_ms=50)
+        results = list(client.stream_capture(FakeCapture(40), window=16, encoding="raw"))
+        self.assertEqual([r.data.roi[0].confidence for r in results], list(range(40)))
+        self.assertEqual(sum(sizes), 40)
+        self.assertLess(len(sizes), 20)
+
+    def test_client_stream_capture(self):
+        client = self.start(shape_analytic, window=2)
+        results = list(client.stream_capture(FakeCapture(20), window=3, encoding="raw"))
+        self.assertEqual([r.frame.frame_num for r in results], list(range(20)))
+        self.assertEqual(results[-1].data.roi[0].confidence, 19.0)
+
+    def test_bad_frame_and_failing_analytic(self):
+        stub = self.start(failing_analytic).stub
+        with self.assertRaises(grpc.RpcError) as err:
+            stub.ProcessVideoFrame(analytic_pb2.InputFrame(frame_num=1))
+        self.assertEqual(err.exception.code(), grpc.StatusCode.INVALID_ARGUMENT)
+        result = stub.ProcessVideoFrame(encoded_frame(2))
+        self.assertNotEqual(result.data.status.code, 0)
+        self.assertIn("model not loaded", result.data.status.message)
+        self.assertEqual(stub.CheckStatus(analytic_pb2.Empty()).status, "SERVING")
+
+
+class TestHttpServer(unittest.TestCase):
+
+    def test_process(self):
+        streamer = Streamer(func=shape_analytic)
+        streamer.register_output_func(None)
+        client = streamer.http_server().app.test_client()
+        reply = client.post("/process", data=encoded_frame(3).SerializeToString())
+        self.assertEqual(reply.status_code, 200)
+        result = analytic_pb2.CompositeFrame.FromString(reply.data)
+        self.assertEqual((result.frame.frame_num, result.data.roi[0].classification), (3, "32x48"))
+        self.assertEqual(client.post("/process", data=b"\xff").status_code, 400)
+        empty = analytic_pb2.InputFrame(frame_num=4).SerializeToString()
+        self.assertEqual(client.post("/process", data=empty).status_code, 400)
+        self.assertIn(b"vidstreamer_stage_seconds_count", client.get("/metrics").data)
+
+
+if __name__ == "__main__":
+    unittest.main()
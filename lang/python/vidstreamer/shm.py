@@ -0,0 +1,133 @@
+import queue
+
+import numpy as np
+from multiprocessing import shared_memory
+
+
+class _SharedArray(np.ndarray):
+    """ An ndarray whose views keep the shared memory block they point into mapped. """
+
+    def __array_finalize__(self, obj):
+        self._shm = getattr(obj, "_shm", None)
+
+
+class FrameRing:
+    """ A fixed number of equally sized frame slots in one shared memory block.
+
+    The process that creates the ring owns the free list: it `acquire`s a slot, writes a frame
+    into it and hands the slot index to another process, which reads the frame through `view`
+    without copying. The owner `release`s the slot once it is done with the frame. Memory use
+    is fixed at `slots * frame size` regardless of how many frames are queued. A ring pickles
+    to its name and layout, so it can be passed to worker processes, which attach to the same
+    block. """
+
+    def __init__(self, slots, shape, dtype=np.uint8, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slot_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self._owner = name is None
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=max(1, self.slots * self.slot_bytes))
+        else:
+            self._shm = _attach(name)
+        self.name = self._shm.name
+        self._frames = np.ndarray((self.slots,) + self.shape, dtype=self.dtype, buffer=self._shm.buf).view(_SharedArray)
+        self._frames._shm = self._shm
+        self._free = None
+        if self._owner:
+            self._free = queue.Queue()
+            for i in range(self.slots):
+                self._free.put(i)
+
+    def __getstate__(self):
+        return {"slots": self.slots, "shape": self.shape, "dtype": self.dtype.str, "name": self.name}
+
+    def __setstate__(self, state):
+        self.__init__(state["slots"], state["shape"], dtype=state["dtype"], name=state["name"])
+
+    def fits(self, frame):
+        """ Returns True if `frame` can be stored in a slot of this ring. """
+        return frame.shape == self.shape and frame.dtype == self.dtype
+
+    def acquire(self, timeout=None):
+        """ Take a free slot, blocking until one is released. Only valid in the owning process. """
+        return self._free.get(timeout=timeout)
+
+    def release(self, slot):
+        """ Return a slot to the free list. Only valid in the owning process. """
+        self._free.put(slot)
+
+    def slot_of(self, frame):
+        """ The slot whose view `frame` is (as handed out by view()), or None. """
+        if self._frames is None or not isinstance(frame, np.ndarray):
+            return None
+        if not self.fits(frame) or not frame.flags.c_contiguous:
+            return None
+        offset = frame.__array_interface__["data"][0] - self._frames.__array_interface__["data"][0]
+        if offset < 0 or offset % self.slot_bytes or offset // self.slot_bytes >= self.slots:
+            return None
+        return offset // self.slot_bytes
+
+    def write(self, slot, frame):
+        """ Copy a frame into a slot and return the slot's view. """
+        view = self._frames[slot]
+        np.copyto(view, frame)
+        return view
+
+    def view(self, slot):
+        """ A NumPy view onto the frame stored in a slot; valid until the slot is reused. """
+        return self._frames[slot]
+
+    def close(self):
+        """ Detach from the shared block, and free it once unmapped if this process created it.
+
+        The mapping itself is released when the last view onto it is garbage collected, so
+        frames already handed out stay valid. """
+        self._frames = None
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+
+class RingBuffers:
+    """ Lends free slots of the FrameRing currently attached as `ring` (by a WorkerPool while it
+    runs) for a capture to decode frames straight into, so they needn't be copied into the ring
+    afterwards. The pool recognizes such frames with FrameRing.slot_of and releases their slot
+    as usual. Pickles without its ring. """
+
+    def __init__(self):
+        self.ring = None
+
+    def __getstate__(self):
+        return {}
+
+    def __setstate__(self, state):
+        self.ring = None
+
+    def take(self):
+        """ A free slot's view, waiting for one to be released, or None without a ring. """
+        ring = self.ring
+        while ring is not None:
+            try:
+                return ring.view(ring.acquire(timeout=0.1))
+            except queue.Empty:
+                if self.ring is not ring:
+                    return None
+        return None
+
+    def give_back(self, buffer):
+        """ Release a slot from take() that didn't receive a frame. """
+        ring = self.ring
+        slot = ring.slot_of(buffer) if ring is not None else None
+        if slot is not None:
+            ring.release(slot)
+
+
+def _attach(name):
+    # Workers share the parent's resource tracker, which already tracks the block; on
+    # Python 3.13+ skip tracking outright so an exiting worker can never unlink it.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
@@ -0,0 +1,451 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from . import analytic_pb2
+from .overlay import OverlayRenderer
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+_DONE = object()
+
+
+def segment_path(path, index):
+    """ The file name for segment `index` of a rotated output. If `path` contains "{segment}"
+    it is formatted with the index, otherwise the index is added before the file extension. """
+    if "{segment}" in path:
+        return path.format(segment=index)
+    root, ext = os.path.splitext(path)
+    return "{!s}_{:04d}{!s}".format(root, index, ext)
+
+
+class _QueuedSink:
+    """ Plumbing shared by the sinks: the output function puts items on a queue of at most
+    `queue_size` entries and a background thread consumes them. When the queue is full the
+    output function blocks, unless `block` is False, in which case the item is counted in
+    `dropped` and discarded. An error on the background thread is raised by the next call or
+    by close(). """
+
+    thread_name = "sink"
+
+    def __init__(self, queue_size, block=True):
+        self.queue_size = queue_size
+        self.block = block
+        self.dropped = 0
+        self._init_state()
+
+    def _init_state(self):
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._thread = None
+        self._error = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Worker processes get the settings, not the sink's thread
+        state = self.__dict__.copy()
+        for key in ["_queue", "_thread", "_error", "_closed", "_lock"]:
+            del state[key]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_state()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """ Finish writing everything queued and close the output. Raises any error that
+        stopped the background thread. """
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_DONE)
+            thread.join()
+        self._check()
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error
+
+    def _put(self, item):
+        self._check()
+        with self._lock:
+            if self._closed:
+                raise ValueError("{!s} is closed".format(type(self).__name__))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+                self._thread.start()
+        if self.block:
+            self._queue.put(item)
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def _items(self, timeout=None):
+        """ Yield queued items until the sink is closed. If nothing arrives within `timeout()`
+        seconds (when it returns a number), None is yielded instead. """
+        while True:
+            try:
+                item = self._queue.get(timeout=timeout() if timeout else None)
+            except queue.Empty:
+                yield None
+                continue
+            if item is _DONE:
+                return
+            yield item
+
+    def _batches(self, batch_size, flush_seconds):
+        """ Yield lists of queued items, each holding `batch_size` items or whatever arrived
+        within `flush_seconds` of the batch's first item. """
+        batch = []
+        deadline = None
+        for item in self._items(timeout=lambda: max(0.0, deadline - time.monotonic()) if batch else None):
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + flush_seconds
+                batch.append(item)
+            if batch and (item is None or len(batch) >= batch_size):
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _run(self):
+        try:
+            self._consume()
+        except Exception as e:
+            logging.exception("{!s} failed".format(type(self).__name__))
+            self._error = e
+            # Keep draining so a blocked output function can't hang
+            while self._queue.get() is not _DONE:
+                pass
+
+    def _consume(self):
+        """ Process the items from _items() on the background thread """
+        raise NotImplementedError
+
+
+class VideoWriter(_QueuedSink):
+    """ An output function that saves frames, with their ROIs drawn on them, to a video file.
+
+    Drawing and encoding happen on a background thread fed by a queue of at most `queue_size`
+    frames. When the queue is full the output function blocks, so no frame is lost, unless
+    `block` is False, in which case the frame is skipped and counted in `dropped`. `codec` is a
+    FourCC code such as "mp4v", "XVID" or "avc1" (whichever the local OpenCV build supports).
+
+    Set `segment_frames` or `segment_seconds` to start a new file after that much video; see
+    segment_path() for how the files are named. A change of frame size also starts a new
+    segment. Pass `renderer=False` to save the frames without annotations. Call close() when
+    done. """
+
+    thread_name = "video-writer"
+
+    def __init__(self, path, fps=30.0, codec="mp4v", renderer=None, queue_size=32, block=True,
+                 segment_frames=None, segment_seconds=None):
+        super().__init__(queue_size, block=block)
+        self.path = path
+        self.fps = fps
+        self.codec = codec
+        self.renderer = OverlayRenderer() if renderer is None else renderer
+        self.segment_frames = segment_frames
+        if segment_seconds:
+            self.segment_frames = max(1, int(round(segment_seconds * fps)))
+        self.paths = []
+        self.written = 0
+
+    def __call__(self, frame, req, resp):
+        # The caller may reuse the frame's buffer, and the overlay is drawn in place
+        self._put((np.array(frame, copy=True), resp))
+
+    def segment_path(self, index):
+        """ The file name used for the segment with the given index. """
+        if not self.segment_frames:
+            return self.path
+        return segment_path(self.path, index)
+
+    def _consume(self):
+        writer = None
+        size = None
+        count = 0
+        try:
+            for frame, resp in self._items():
+                if self.renderer:
+                    frame = self.renderer.draw(frame, resp, copy=False)
+                elif frame.ndim == 2:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+                if frame.dtype != np.uint8:
+                    frame = cv2.convertScaleAbs(frame)
+                new_size = (frame.shape[1], frame.shape[0])
+                if writer is None or new_size != size or (self.segment_frames and count >= self.segment_frames):
+                    if writer is not None:
+                        writer.release()
+                    size = new_size
+                    writer = self._open(size)
+                    count = 0
+                writer.write(frame)
+                count += 1
+                self.written += 1
+        finally:
+            if writer is not None:
+                writer.release()
+
+    def _open(self, size):
+        path = self.segment_path(len(self.paths))
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*self.codec), self.fps, size)
+        if not writer.isOpened():
+            raise IOError("Could not open {!s} for writing with codec {!s}".format(path, self.codec))
+        self.paths.append(path)
+        logging.info("Writing video to {!s}".format(path))
+        return writer
+
+
+class ResultWriter(_QueuedSink):
+    """ Base class for output functions that save the analytic results (not the frames).
+
+    Results are handed to a background thread and written in batches of up to `batch_size`
+    frames, or whatever has arrived after `flush_seconds`. With `rotate_frames` set a new file
+    is started after that many frames; see segment_path() for how the files are named.
+    Subclasses implement _open(path), _write(batch) and _close(), where each batch entry is
+    (source_id, frame_num, timestamp, resp). Call close() when done. """
+
+    thread_name = "result-writer"
+
+    def __init__(self, path, batch_size=1000, flush_seconds=1.0, rotate_frames=None, queue_size=10000, block=True):
+        super().__init__(queue_size, block=block)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.rotate_frames = rotate_frames
+        self.paths = []
+        self.written = 0
+
+    def __call__(self, frame, req, resp):
+        # Only the request's metadata is kept, not the frame it may carry
+        self._put((req.source_id, req.frame_num, req.timestamp, resp))
+
+    def _consume(self):
+        self._file_frames = 0
+        try:
+            for batch in self._batches(self.batch_size, self.flush_seconds):
+                self._flush(batch)
+        finally:
+            if self.paths:
+                self._close()
+
+    def _flush(self, batch):
+        while batch:
+            if not self.paths or (self.rotate_frames and self._file_frames >= self.rotate_frames):
+                if self.paths:
+                    self._close()
+                path = segment_path(self.path, len(self.paths)) if self.rotate_frames else self.path
+                self._open(path)
+                self.paths.append(path)
+                self._file_frames = 0
+            count = len(batch)
+            if self.rotate_frames:
+                count = min(count, self.rotate_frames - self._file_frames)
+            self._write(batch[:count])
+            self._file_frames += count
+            self.written += count
+            batch = batch[count:]
+
+    def _open(self, path):
+        raise NotImplementedError
+
+    def _write(self, batch):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+
+def _roi_record(roi):
+    record = {"classification": roi.classification, "confidence": roi.confidence}
+    if roi.HasField("box"):
+        box = roi.box
+        record["box"] = [box.corner1.x, box.corner1.y, box.corner2.x, box.corner2.y]
+    elif roi.HasField("mask"):
+        mask = roi.mask
+        record["box"] = [mask.x, mask.y, mask.x + mask.width, mask.y + mask.height]
+    if roi.supplement:
+        record["supplement"] = roi.supplement
+    if roi.track_id:
+        record["track_id"] = roi.track_id
+    return record
+
+
+class JsonLinesWriter(ResultWriter):
+    """ Writes one JSON object per frame with its source_id, frame_num, timestamp, analytic
+    start/end times, dropped_frames, the tracked and carried_forward flags and a list of ROIs
+    (classification, confidence, box as [x1, y1, x2, y2] and track_id when tracking; masks are
+    given their bounding window). """
+
+    def _open(self, path):
+        self._file = open(path, "w")
+
+    def _write(self, batch):
+        lines = []
+        for source_id, frame_num, timestamp, resp in batch:
+            record = {
+                "source_id": source_id,
+                "frame_num": frame_num,
+                "timestamp": timestamp,
+                "start_time_millis": resp.start_time_millis,
+                "end_time_millis": resp.end_time_millis,
+                "dropped_frames": resp.dropped_frames,
+                "tracked": resp.tracked,
+                "carried_forward": resp.carried_forward,
+                "rois": [_roi_record(roi) for roi in resp.roi],
+            }
+            lines.append(json.dumps(record, separators=(",", ":")))
+        lines.append("")
+        self._file.write("\n".join(lines))
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+def _varint(value):
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+class ProtoWriter(ResultWriter):
+    """ Writes a CompositeFrame per frame (the InputFrame without its image, and the FrameData),
+    each prefixed with its length as a varint, the framing used by protobuf's
+    writeDelimitedTo/parseDelimitedFrom. read_delimited() reads the file back. """
+
+    def _open(self, path):
+        self._file = open(path, "wb")
+
+    def _write(self, batch):
+        chunks = []
+        for source_id, frame_num, timestamp, resp in batch:
+            msg = analytic_pb2.CompositeFrame(data=resp)
+            msg.frame.source_id = source_id
+            msg.frame.frame_num = frame_num
+            msg.frame.timestamp = timestamp
+            data = msg.SerializeToString()
+            chunks.append(_varint(len(data)))
+            chunks.append(data)
+        self._file.write(b"".join(chunks))
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+def read_delimited(path, message_type=analytic_pb2.CompositeFrame):
+    """ Yield the messages in a file of length-delimited protobufs, such as a ProtoWriter's. """
+    with open(path, "rb") as f:
+        data = f.read()
+    pos = 0
+    while pos < len(data):
+        size = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            size |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        if pos + size > len(data):
+            raise ValueError("Truncated message at byte {!s} of {!s}".format(pos, path))
+        yield message_type.FromString(data[pos:pos + size])
+        pos += size
+
+
+class ParquetWriter(ResultWriter):
+    """ Writes one row per detection to Parquet, with columns source_id, frame_num, timestamp,
+    classification, confidence, x1, y1, x2, y2 (masks are given their bounding window),
+    track_id (0 when not tracking) and the frame's tracked and carried_forward flags.
+    Each batch becomes a row group. Frames without detections add no rows. Requires pyarrow. """
+
+    schema = None if pa is None else pa.schema([
+        ("source_id", pa.string()),
+        ("frame_num", pa.int64()),
+        ("timestamp", pa.float32()),
+        ("classification", pa.string()),
+        ("confidence", pa.float32()),
+        ("x1", pa.int32()),
+        ("y1", pa.int32()),
+        ("x2", pa.int32()),
+        ("y2", pa.int32()),
+        ("track_id", pa.int64()),
+        ("tracked", pa.bool_()),
+        ("carried_forward", pa.bool_()),
+    ])
+
+    def __init__(self, path, compression="zstd", **kwargs):
+        if pa is None:
+            raise ImportError("ParquetWriter requires pyarrow (pip install pyarrow)")
+        super().__init__(path, **kwargs)
+        self.compression = compression
+
+    def _open(self, path):
+        self._file = pq.ParquetWriter(path, self.schema, compression=self.compression)
+
+    def _write(self, batch):
+        columns = dict((name, []) for name in self.schema.names)
+        for source_id, frame_num, timestamp, resp in batch:
+            for roi in resp.roi:
+                record = _roi_record(roi)
+                box = record.get("box", [0, 0, 0, 0])
+                columns["source_id"].append(source_id)
+                columns["frame_num"].append(frame_num)
+                columns["timestamp"].append(timestamp)
+                columns["classification"].append(roi.classification)
+                columns["confidence"].append(roi.confidence)
+                for name, value in zip(["x1", "y1", "x2", "y2"], box):
+                    columns[name].append(value)
+                columns["track_id"].append(roi.track_id)
+                columns["tracked"].append(resp.tracked)
+                columns["carried_forward"].append(resp.carried_forward)
+        if columns["frame_num"]:
+            self._file.write_table(pa.table(columns, schema=self.schema))
+
+    def _close(self):
+        self._file.close()
+
+
+RESULT_WRITERS = {
+    ".jsonl": JsonLinesWriter,
+    ".json": JsonLinesWriter,
+    ".pb": ProtoWriter,
+    ".bin": ProtoWriter,
+    ".parquet": ParquetWriter,
+}
+
+
+def result_writer(path, **kwargs):
+    """ A ResultWriter for `path`, picked by its extension (see RESULT_WRITERS). """
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        writer = RESULT_WRITERS[ext]
+    except KeyError:
+        raise ValueError("No result writer for {!s} files".format(ext or path))
+    return writer(path, **kwargs)
@@ -0,0 +1,158 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import cv2
+import numpy as np
+from vidstreamer import analytic_pb2
+from .__init__ import Streamer
+from .rois import add_detections
+from .sinks import JsonLinesWriter, ParquetWriter, ProtoWriter, VideoWriter, pa, read_delimited, result_writer
+from .streamer_test import write_video
+
+
+def count_frames(path):
+    cap = cv2.VideoCapture(path)
+    count = 0
+    while cap.read()[0]:
+        count += 1
+    cap.release()
+    return count
+
+
+def box_analytic(frame, req, resp):
+    roi = resp.roi.add(classification="thing", confidence=0.5)
+    roi.box.corner1.x, roi.box.corner1.y = 8, 16
+    roi.box.corner2.x, roi.box.corner2.y = 40, 40
+
+
+class TestVideoWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_stream_to_file(self):
+        src = write_video(os.path.join(self.tmp.name, "in.avi"), 12)
+        out = os.path.join(self.tmp.name, "out.avi")
+        streamer = Streamer(func=box_analytic)
+        with VideoWriter(out, fps=10, codec="MJPG", queue_size=2) as writer:
+            streamer.register_output_func(writer)
+            streamer.stream_video(src)
+        self.assertEqual(writer.paths, [out])
+        self.assertEqual(writer.written, 12)
+        self.assertEqual(count_frames(out), 12)
+        cap = cv2.VideoCapture(out)
+        ret, frame = cap.read()
+        cap.release()
+        # The box outline was drawn in blue
+        self.assertGreater(int(frame[30, 8, 0]), 200)
+        self.assertLess(int(frame[30, 8, 2]), 60)
+
+    def test_segments(self):
+        path = os.path.join(self.tmp.name, "seg-{segment}.avi")
+        writer = VideoWriter(path, fps=10, codec="MJPG", segment_seconds=0.5, renderer=False)
+        resp = analytic_pb2.FrameData()
+        for i in range(12):
+            writer(np.full((24, 32), i, dtype=np.uint8), None, resp)
+        writer(np.zeros((16, 16, 3), dtype=np.uint8), None, resp)
+        writer.close()
+        self.assertEqual(writer.paths, [os.path.join(self.tmp.name, "seg-{!s}.avi".format(i)) for i in range(4)])
+        self.assertEqual([count_frames(p) for p in writer.paths], [5, 5, 2, 1])
+        self.assertEqual(VideoWriter("out.mp4", segment_frames=3).segment_path(2), "out_0002.mp4")
+        with self.assertRaises(ValueError):
+            writer(np.zeros((16, 16, 3), dtype=np.uint8), None, resp)
+
+    def test_open_failure(self):
+        writer = VideoWriter(os.path.join(self.tmp.name, "missing", "out.avi"), codec="MJPG")
+        writer(np.zeros((16, 16, 3), dtype=np.uint8), None, analytic_pb2.FrameData())
+        with self.assertRaises(IOError):
+            writer.close()
+
+
+def results(count):
+    for i in range(count):
+        req = analytic_pb2.InputFrame(frame_num=i, timestamp=i / 10.0, source_id="cam")
+        resp = analytic_pb2.FrameData(start_time_millis=1000 + i)
+        add_detections(resp, [[i, i, i + 5, i + 5]] * (i % 3), [0.5] * (i % 3), [1] * (i % 3), ["a", "b"])
+        if i == 8:
+            resp.tracked = True
+            resp.roi[1].track_id = 3
+        yield None, req, resp
+
+
+class TestResultWriters(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_jsonl_rotation(self):
+        writer = JsonLinesWriter(os.path.join(self.tmp.name, "out.jsonl"), batch_size=4, rotate_frames=5)
+        for item in results(12):
+            writer(*item)
+        writer.close()
+        self.assertEqual([os.path.basename(p) for p in writer.paths], ["out_0000.jsonl", "out_0001.jsonl", "out_0002.jsonl"])
+        records = []
+        for path in writer.paths:
+            with open(path) as f:
+                records.append([json.loads(line) for line in f])
+        self.assertEqual([len(r) for r in records], [5, 5, 2])
+        record = records[1][2]
+        self.assertEqual((record["source_id"], record["frame_num"], record["start_time_millis"]), ("cam", 7, 1007))
+        self.assertEqual(record["rois"], [{"classification": "b", "confidence": 0.5, "box": [7, 7, 12, 12]}])
+        self.assertEqual((record["tracked"], record["carried_forward"]), (False, False))
+        record = records[1][3]
+        self.assertTrue(record["tracked"])
+        self.assertEqual([roi.get("track_id") for roi in record["rois"]], [None, 3])
+
+    def test_flush_on_time(self):
+        path = os.path.join(self.tmp.name, "out.jsonl")
+        writer = JsonLinesWriter(path, batch_size=100, flush_seconds=0.05)
+        for item in results(3):
+            writer(*item)
+        deadline = time.time() + 5
+        while writer.written < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        with open(path) as f:
+            self.assertEqual(len(f.readlines()), 3)
+        writer.close()
+
+    def test_proto(self):
+        path = os.path.join(self.tmp.name, "out.pb")
+        with result_writer(path, batch_size=2) as writer:
+            self.assertIsInstance(writer, ProtoWriter)
+            for item in results(5):
+                writer(*item)
+        frames = list(read_delimited(path))
+        self.assertEqual([f.frame.frame_num for f in frames], [0, 1, 2, 3, 4])
+        self.assertEqual(len(frames[2].data.roi), 2)
+        self.assertEqual(frames[4].data.roi[0].box.corner2.x, 9)
+        self.assertFalse(frames[0].frame.HasField("frame"))
+        with self.assertRaises(ValueError):
+            result_writer("out.csv")
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+        path = os.path.join(self.tmp.name, "out.parquet")
+        with ParquetWriter(path, batch_size=4) as writer:
+            for item in results(9):
+                writer(*item)
+        table = pq.read_table(path)
+        self.assertEqual(table.num_rows, sum(i % 3 for i in range(9)))
+        self.assertEqual(table.column("frame_num").to_pylist()[:3], [1, 2, 2])
+        self.assertEqual(table.column("x2").to_pylist()[0], 6)
+        self.assertEqual(table.column("track_id").to_pylist()[-2:], [0, 3])
+        self.assertEqual(table.column("tracked").to_pylist()[-3:], [False, True, True])
+        self.assertFalse(any(table.column("carried_forward").to_pylist()))
+
+
+if __name__ == "__main__":
+    unittest.main()
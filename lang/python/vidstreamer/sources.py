@@ -0,0 +1,170 @@
+import collections
+import logging
+import queue
+import threading
+import time
+
+import cv2
+
+_DONE = object()
+
+
+def open_capture(source):
+    """ Open a cv2.VideoCapture for a camera ID (an int or a string of digits), a video file or a
+    stream URL such as rtsp://... """
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return cv2.VideoCapture(int(source))
+    return cv2.VideoCapture(source)
+
+
+def read_capture(cap, source_id=None, buffers=None):
+    """ Yield (frame, timestamp, frame_num, source_id) for each frame read from an opened capture.
+    With `buffers` (a RingBuffers) frames are decoded straight into the slots it lends. """
+    frame_num = 0
+    while cap.isOpened():
+        buffer = buffers.take() if buffers is not None else None
+        if buffer is None:
+            ret, frame = cap.read()
+        else:
+            ret, frame = cap.read(buffer)
+            if not ret or frame is not buffer:
+                buffers.give_back(buffer)
+        if not ret:
+            logging.info("No frame available from {!s}".format(source_id if source_id is not None else "capture"))
+            break
+        yield frame, time.time(), frame_num, source_id
+        frame_num += 1
+
+
+class MultiSource:
+    """ Reads several sources concurrently and interleaves their frames into one stream.
+
+    `sources` is a list of camera IDs, files or URLs (each tagged with its own string as the
+    source_id, so each may appear only once) or a dict mapping source_id to source. Every
+    source is read on its own thread into a shared queue of at most `queue_size` frames;
+    frame_num counts frames within each source. Iteration ends once every source is
+    exhausted. """
+
+    def __init__(self, sources, queue_size=8):
+        if isinstance(sources, dict):
+            self.sources = dict((str(k), v) for k, v in sources.items())
+        else:
+            self.sources = dict((str(s), s) for s in sources)
+            if len(self.sources) < len(sources):
+                counts = collections.Counter(str(s) for s in sources)
+                duplicates = sorted(source_id for source_id, count in counts.items() if count > 1)
+                raise ValueError("Sources given more than once: {!s} (pass a dict to give each its own source_id)"
+                                 .format(", ".join(duplicates)))
+        self.queue_size = queue_size
+
+    def __iter__(self):
+        frames = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        threads = []
+        for source_id, source in self.sources.items():
+            t = threading.Thread(target=self._read, args=(source_id, source, frames, stop),
+                                 name="source-{!s}".format(source_id), daemon=True)
+            t.start()
+            threads.append(t)
+
+        remaining = len(threads)
+        try:
+            while remaining:
+                item = frames.get()
+                if item is _DONE:
+                    remaining -= 1
+                    continue
+                yield item
+        finally:
+            stop.set()
+            for t in threads:
+                t.join(timeout=1.0)
+
+    def _read(self, source_id, source, frames, stop):
+        cap = open_capture(source)
+        try:
+            if not cap.isOpened():
+                logging.error("Could not open source {!s}".format(source_id))
+            for item in read_capture(cap, source_id=source_id):
+                while not stop.is_set():
+                    try:
+                        frames.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+        except Exception:
+            logging.exception("Reading source {!s} failed".format(source_id))
+        finally:
+            cap.release()
+            if not stop.is_set():
+                frames.put(_DONE)
+
+
+class LatestFrameGrabber:
+    """ Reads a live capture on a background thread and keeps only the newest frame.
+
+    Iterating yields (frame, timestamp, frame_num, source_id) for the most recent frame each time
+    the consumer asks for one, so a slow analytic always works on the latest frame instead of a
+    backlog of stale ones. frame_num counts every frame read from the capture, so skipped frames
+    show up as gaps; their total is kept in `dropped`. `target_fps` caps how often a frame is
+    handed out, and frames older than `max_latency_ms` when handed out are skipped in favour
+    of a newer one. """
+
+    def __init__(self, cap, source_id=None, target_fps=None, max_latency_ms=None):
+        self.cap = cap
+        self.source_id = source_id
+        self.interval = 1.0 / target_fps if target_fps else 0
+        self.max_latency = max_latency_ms / 1000.0 if max_latency_ms else None
+        self.dropped = 0
+        self._latest = None
+        self._finished = False
+        self._cond = threading.Condition()
+
+    def __iter__(self):
+        stop = threading.Event()
+        reader = threading.Thread(target=self._read, args=(stop,), name="grabber", daemon=True)
+        reader.start()
+        last_num = -1  # newest frame handed out
+        seen = -1  # newest frame taken from the reader, including stale ones skipped
+        next_time = 0
+        try:
+            while True:
+                if self.interval:
+                    delay = next_time - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                with self._cond:
+                    while not self._finished and (self._latest is None or self._latest[2] <= seen):
+                        self._cond.wait(timeout=0.1)
+                    if self._latest is None or self._latest[2] <= seen:
+                        return
+                    item = self._latest
+                seen = item[2]
+                if self.max_latency is not None and time.time() - item[1] > self.max_latency and not self._finished:
+                    continue
+                self.dropped += item[2] - last_num - 1
+                last_num = item[2]
+                next_time = time.monotonic() + self.interval
+                yield item
+        finally:
+            stop.set()
+            reader.join(timeout=1.0)
+
+    def _read(self, stop):
+        frame_num = 0
+        try:
+            while not stop.is_set() and self.cap.isOpened():
+                ret, frame = self.cap.read()
+                if not ret:
+                    logging.info("No frame available from {!s}".format(self.source_id if self.source_id is not None else "capture"))
+                    break
+                with self._cond:
+                    self._latest = (frame, time.time(), frame_num, self.source_id)
+                    self._cond.notify()
+                frame_num += 1
+        finally:
+            with self._cond:
+                self._finished = True
+                self._cond.notify()
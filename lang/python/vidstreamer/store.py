@@ -0,0 +1,179 @@
+import collections
+import threading
+import time
+
+from . import analytic_pb2
+
+
+class ResultStore:
+    """ A bounded in-memory store of CompositeFrames for answering GetFrame.
+
+    Results are keyed by (source_id, frame_num, analytic name) and evicted least recently used
+    first once there are more than `max_entries` or they take more than `max_bytes` (measured
+    as serialized size). With `ttl` set, results older than that many seconds are dropped.
+    Besides the key, results can be found by analytic name, by the filters of the analytic
+    that produced them, and as the latest frame of each source or the most recently stored
+    latest frame of any source (frame numbers of different sources don't compare). Stored
+    results never carry pixels. """
+
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.nbytes = 0
+        self._entries = collections.OrderedDict()  # key -> (result, size, expires)
+        self._analytics = {}  # name -> AnalyticData of its latest result
+        self._filters = collections.defaultdict(set)  # (key, value) -> analytic names
+        self._latest = {}  # (source_id, name) -> (frame_num, sequence number of its put)
+        self._sources = collections.defaultdict(collections.Counter)  # name -> source_id -> entries
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def put(self, result):
+        """ Store a CompositeFrame under its frame's source_id and frame_num and its analytic's name """
+        if result.frame.HasField("frame"):
+            stripped = analytic_pb2.CompositeFrame()
+            stripped.CopyFrom(result)
+            stripped.frame.ClearField("frame")
+            result = stripped
+        name = result.analytic.name
+        source_id, frame_num = result.frame.source_id, result.frame.frame_num
+        key = (source_id, frame_num, name)
+        size = result.ByteSize()
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            else:
+                self._sources[name][source_id] += 1
+            self._entries[key] = (result, size, expires)
+            self.nbytes += size
+            self._index(result.analytic)
+            self._sequence += 1
+            latest = self._latest.get((source_id, name))
+            if latest is None or frame_num >= latest[0]:
+                self._latest[(source_id, name)] = (frame_num, self._sequence)
+            self._evict()
+
+    def put_results(self, results):
+        """ Store every CompositeFrame of a CompositeResults """
+        for result in results.results:
+            self.put(result)
+
+    def get(self, source_id, frame_num, name):
+        """ The result stored for a frame and analytic, or None """
+        with self._lock:
+            return self._get((source_id, frame_num, name))
+
+    def latest(self, name, source_id=None):
+        """ The most recent frame's result from an analytic, for one source or (with source_id
+        None) from whichever source's latest frame was stored last. """
+        with self._lock:
+            return self._latest_result(name, source_id)
+
+    def query(self, request):
+        """ The results selected by a FrameRequest, as a list of CompositeFrames. Listed frames
+        of every source are returned when the request has no source_id. """
+        source_id = request.source_id or None
+        with self._lock:
+            names = self._select(request.analytics)
+            results = []
+            for name in names:
+                if request.frame_num:
+                    sources = [source_id] if source_id is not None else sorted(self._sources.get(name, ()))
+                    for frame_num in request.frame_num:
+                        for source in sources:
+                            result = self._get((source, frame_num, name))
+                            if result is not None:
+                                results.append(result)
+                else:
+                    result = self._latest_result(name, source_id)
+                    if result is not None:
+                        results.append(result)
+            return results
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._analytics.clear()
+            self._filters.clear()
+            self._latest.clear()
+            self._sources.clear()
+            self._sequence = 0
+            self.nbytes = 0
+
+    def _index(self, analytic):
+        old = self._analytics.get(analytic.name)
+        if old is not None and dict(old.filters) == dict(analytic.filters):
+            return
+        if old is not None:
+            for item in old.filters.items():
+                self._filters[item].discard(analytic.name)
+        stored = analytic_pb2.AnalyticData()
+        stored.CopyFrom(analytic)
+        self._analytics[analytic.name] = stored
+        for item in analytic.filters.items():
+            self._filters[item].add(analytic.name)
+
+    def _select(self, analytics):
+        """ Names of the analytics matching a list of AnalyticData selectors, in a stable order """
+        if not analytics:
+            return sorted(self._analytics)
+        names = []
+        for selector in analytics:
+            if selector.name:
+                matches = [selector.name]
+            elif selector.filters:
+                sets = [self._filters.get(item, set()) for item in selector.filters.items()]
+                matches = sorted(set.intersection(*sets))
+            else:
+                matches = sorted(self._analytics)
+            names.extend(name for name in matches if name not in names)
+        return names
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[2] is not None and entry[2] < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _latest_result(self, name, source_id):
+        if source_id is not None:
+            latest = self._latest.get((source_id, name))
+            return None if latest is None else self._get((source_id, latest[0], name))
+        best = None
+        for (source, analytic), (frame_num, sequence) in list(self._latest.items()):
+            if analytic == name and (best is None or sequence > best[1]):
+                result = self._get((source, frame_num, name))
+                if result is not None:
+                    best = (result, sequence)
+        return best[0] if best else None
+
+    def _remove(self, key):
+        result, size, _ = self._entries.pop(key)
+        self.nbytes -= size
+        source_id, frame_num, name = key
+        self._sources[name][source_id] -= 1
+        if not self._sources[name][source_id]:
+            del self._sources[name][source_id]
+        latest = self._latest.get((source_id, name))
+        if latest is not None and latest[0] == frame_num:
+            del self._latest[(source_id, name)]
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._entries:
+            key, (_, _, expires) = next(iter(self._entries.items()))
+            if len(self._entries) > self.max_entries or self.nbytes > self.max_bytes or (expires is not None and expires < now):
+                self._remove(key)
+            else:
+                break
@@ -0,0 +1,124 @@
+import time
+import unittest
+
+import grpc
+import numpy as np
+from vidstreamer import analytic_pb2
+from .frames import frame_to_proto
+from .server_test import connect, serve
+from .store import ResultStore
+
+
+def result(frame_num, name="a", source_id="cam", filters=None, confidence=1.0, pixels=False):
+    frame = frame_to_proto(np.zeros((4, 4), dtype=np.uint8), frame_num=frame_num, source_id=source_id)
+    if not pixels:
+        frame.ClearField("frame")
+    msg = analytic_pb2.CompositeFrame(frame=frame, analytic=analytic_pb2.AnalyticData(name=name))
+    msg.analytic.filters.update(filters or {})
+    msg.data.roi.add(classification=name, confidence=confidence)
+    return msg
+
+
+def request(names=(), source_id="", frame_num=(), **filters):
+    req = analytic_pb2.FrameRequest(source_id=source_id, frame_num=frame_num)
+    for name in names:
+        req.analytics.add(name=name)
+    if filters:
+        req.analytics.add().filters.update(filters)
+    return req
+
+
+class TestResultStore(unittest.TestCase):
+
+    def test_get_and_strip_pixels(self):
+        store = ResultStore()
+        store.put(result(1, pixels=True))
+        stored = store.get("cam", 1, "a")
+        self.assertFalse(stored.frame.HasField("frame"))
+        self.assertEqual(stored.data.roi[0].classification, "a")
+        self.assertIsNone(store.get("cam", 2, "a"))
+        store.put(result(1, confidence=2.0))
+        self.assertEqual(len(store), 1)
+        self.assertEqual(store.get("cam", 1, "a").data.roi[0].confidence, 2.0)
+
+    def test_lru_and_byte_limits(self):
+        store = ResultStore(max_entries=3)
+        for i in range(3):
+            store.put(result(i))
+        store.get("cam", 0, "a")
+        store.put(result(3))
+        self.assertEqual(len(store), 3)
+        self.assertIsNone(store.get("cam", 1, "a"))
+        self.assertIsNotNone(store.get("cam", 0, "a"))
+
+        size = result(4).ByteSize()
+        store = ResultStore(max_bytes=size * 2)
+        for i in range(5):
+            store.put(result(i))
+        self.assertEqual(len(store), 2)
+        self.assertLessEqual(store.nbytes, size * 2)
+        store.clear()
+        self.assertEqual((len(store), store.nbytes), (0, 0))
+
+    def test_ttl(self):
+        store = ResultStore(ttl=0.05)
+        store.put(result(1))
+        self.assertIsNotNone(store.get("cam", 1, "a"))
+        time.sleep(0.1)
+        self.assertIsNone(store.get("cam", 1, "a"))
+        self.assertEqual(store.query(request()), [])
+        store.put(result(2))
+        self.assertEqual(len(store), 1)
+
+    def test_query(self):
+        store = ResultStore()
+        for i in range(3):
+            store.put(result(i, "det", filters={"kind": "box"}))
+            store.put(result(i, "seg", filters={"kind": "mask"}))
+        store.put(result(9, "det", source_id="other"))
+
+        latest = store.query(request(["det"], source_id="cam"))
+        self.assertEqual([(r.analytic.name, r.frame.frame_num) for r in latest], [("det", 2)])
+        self.assertEqual(store.latest("det").frame.source_id, "other")
+        # Stored after frame 9 of "other", so more recent despite the lower frame_num
+        store.put(result(3, "det"))
+        self.assertEqual(store.latest("det").frame.frame_num, 3)
+        self.assertEqual([r.analytic.name for r in store.query(request(source_id="cam"))], ["det", "seg"])
+
+        frames = store.query(request(["seg"], source_id="cam", frame_num=[0, 1, 5]))
+        self.assertEqual([r.frame.frame_num for r in frames], [0, 1])
+        store.put(result(1, "det", source_id="cam1"))
+        frames = store.query(request(["det"], frame_num=[1, 9]))
+        self.assertEqual([(r.frame.source_id, r.frame.frame_num) for r in frames], [("cam", 1), ("cam1", 1), ("other", 9)])
+        masks = store.query(request(source_id="cam", frame_num=[1], kind="mask"))
+        self.assertEqual([r.analytic.name for r in masks], ["seg"])
+        self.assertEqual(store.query(request(kind="nothing")), [])
+
+
+class TestGetFrame(unittest.TestCase):
+
+    def start(self, store):
+        def analytic(frame, req, resp):
+            resp.roi.add(classification="x", confidence=float(req.frame_num))
+        return connect(self, serve(self, analytic, store=store))
+
+    def test_get_frame(self):
+        client = self.start(ResultStore())
+        for i in range(3):
+            client.process(np.zeros((8, 8, 3), dtype=np.uint8), frame_num=i, encoding="raw")
+        results = client.stub.GetFrame(request(frame_num=[1])).results
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].data.roi[0].confidence, 1.0)
+        self.assertFalse(results[0].frame.HasField("frame"))
+        latest = client.stub.GetFrame(request()).results
+        self.assertEqual([r.frame.frame_num for r in latest], [2])
+
+    def test_without_store(self):
+        client = self.start(None)
+        with self.assertRaises(grpc.RpcError) as ctx:
+            client.stub.GetFrame(request())
+        self.assertEqual(ctx.exception.code(), grpc.StatusCode.UNIMPLEMENTED)
+
+
+if __name__ == '__main__':
+    unittest.main()
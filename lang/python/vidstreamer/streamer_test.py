@@ -1,7 +1,13 @@
+import os
+import tempfile
+import time
 import unittest
+from unittest import mock
+import cv2
 import numpy as np
 from vidstreamer import analytic_pb2
 from .__init__ import Streamer
+from .shm import FrameRing
 
 
 def analytic_test_func(frame, req, resp):
@@ -15,8 +21,51 @@ def analytic_test_func(frame, req, resp):
     roi = analytic_pb2.RegionOfInterest()
     roi.classification = "TestObject"
     roi.confidence = 0.506
+    resp.roi.append(roi)
 
 
+_worker_state = {}
+
+
+def worker_init(streamer):
+    _worker_state["pid"] = os.getpid()
+
+
+def worker_analytic(frame, req, resp):
+    roi = resp.roi.add()
+    roi.classification = str(int(frame.flat[0]))
+    roi.supplement = str(_worker_state.get("pid"))
+
+
+class SlowCamera:
+    """ A capture producing `count` frames at a fixed rate, like a live camera """
+    def __init__(self, count, fps=200):
+        self.count = count
+        self.interval = 1.0 / fps
+        self.read_count = 0
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        time.sleep(self.interval)
+        if self.read_count >= self.count:
+            return False, None
+        self.read_count += 1
+        return True, np.full((4, 4), self.read_count - 1, dtype=np.uint8)
+
+    def release(self):
+        pass
+
+
+def write_video(path, count, shape=(48, 64), fps=10):
+    """ Write a small MJPG video whose frame i is filled with the value 8 * i (mod 256) """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (shape[1], shape[0]))
+    for i in range(count):
+        writer.write(np.full(shape + (3,), (8 * i) % 256, dtype=np.uint8))
+    writer.release()
+    return path
+
 
 class TestStreamer(unittest.TestCase):
 
@@ -26,7 +75,183 @@ class TestStreamer(unittest.TestCase):
         streamer = Streamer(func=analytic_test_func)
         
         req, resp = streamer.process_frame(frame, timestamp=506, frame_num=16)
-        self.assertEqual()
+        self.assertEqual((req.frame_num, req.timestamp), (16, 506))
+        self.assertEqual(len(resp.roi), 1)
+        self.assertEqual(resp.roi[0].classification, "TestObject")
+        self.assertAlmostEqual(resp.roi[0].confidence, 0.506, places=6)
+        self.assertLessEqual(resp.start_time_millis, resp.end_time_millis)
+
+    def test_pipelined_preserves_order(self):
+        frames = [(np.full((8, 8), i, dtype=np.uint8), float(i), i) for i in range(50)]
+        seen = []
+
+        def analytic(frame, req, resp):
+            roi = resp.roi.add()
+            roi.classification = str(int(frame[0, 0]))
+
+        def output(frame, req, resp):
+            seen.append((req.frame_num, resp.roi[0].classification))
+
+        streamer = Streamer(func=analytic, pipelined=True, queue_size=2)
+        streamer.register_output_func(output)
+        streamer.stream_frames(iter(frames))
+        self.assertEqual(seen, [(i, str(i)) for i in range(50)])
+
+    def test_pipelined_raises_analytic_error(self):
+        def analytic(frame, req, resp):
+            if req.frame_num == 3:
+                raise ValueError("bad frame")
+
+        streamer = Streamer(func=analytic, pipelined=True)
+        streamer.register_output_func(None)
+        frames = ((np.zeros((4, 4)), 0.0, i) for i in range(10))
+        with self.assertRaises(ValueError):
+            streamer.stream_frames(frames)
+
+    def test_batched_stream(self):
+        sizes = []
+        seen = []
+
+        def batch_analytic(frames, reqs, resps):
+            sizes.append(frames.shape[0])
+            for frame, resp in zip(frames, resps):
+                resp.roi.add().classification = str(int(frame[0, 0]))
+
+        def output(frame, req, resp):
+            seen.append((req.frame_num, resp.roi[0].classification))
+
+        streamer = Streamer(batch_func=batch_analytic, batch_size=4, max_wait_ms=200)
+        streamer.register_output_func(output)
+        streamer.stream_frames((np.full((8, 8), i, dtype=np.uint8), float(i), i) for i in range(10))
+        self.assertEqual(seen, [(i, str(i)) for i in range(10)])
+        self.assertEqual(sum(sizes), 10)
+        self.assertEqual(max(sizes), 4)
+
+    def test_batch_timeout_flushes_partial_batch(self):
+        sizes = []
+
+        def batch_analytic(frames, reqs, resps):
+            sizes.append(frames.shape[0])
+
+        streamer = Streamer(batch_func=batch_analytic, batch_size=16, max_wait_ms=10)
+        req, resp = streamer.analyze_frame(np.zeros((4, 4)), timestamp=1, frame_num=7)
+        self.assertEqual(sizes, [1])
+        self.assertEqual(req.frame_num, 7)
+
+    def test_worker_pool_order(self):
+        seen = []
+
+        def output(frame, req, resp):
+            seen.append((req.frame_num, resp.roi[0].classification, resp.roi[0].supplement))
+
+        streamer = Streamer(func=worker_analytic, workers=3)
+        streamer.init_func = worker_init
+        streamer.register_output_func(output)
+        streamer.stream_frames((np.full((8, 8), i, dtype=np.uint8), float(i), i) for i in range(30))
+        self.assertEqual([(n, c) for n, c, _ in seen], [(i, str(i)) for i in range(30)])
+        pids = set(pid for _, _, pid in seen)
+        self.assertNotIn(str(os.getpid()), pids)
+        self.assertNotIn("None", pids)
+
+    def test_worker_pool_shared_memory(self):
+        seen = []
+
+        def output(frame, req, resp):
+            seen.append((req.frame_num, int(frame[0, 0, 0]), resp.roi[0].classification))
+
+        streamer = Streamer(func=worker_analytic, workers=2, shared_memory=True)
+        streamer.register_output_func(output)
+        frames = [(np.full((6, 8, 3), i, dtype=np.uint8), float(i), i) for i in range(20)]
+        frames.append((np.full((4, 4, 3), 20, dtype=np.uint8), 20.0, 20))
+        streamer.stream_frames(iter(frames))
+        self.assertEqual(seen, [(i, i, str(i)) for i in range(21)])
+
+    def test_worker_pool_reads_into_ring(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = write_video(os.path.join(tmp.name, "ring.avi"), 12)
+        seen = []
+
+        def output(frame, req, resp):
+            seen.append((req.frame_num, int(frame[0, 0, 0]), int(resp.roi[0].classification)))
+
+        streamer = Streamer(func=worker_analytic, workers=2, shared_memory=True)
+        streamer.register_output_func(output)
+        with mock.patch.object(FrameRing, "write", autospec=True, side_effect=FrameRing.write) as write:
+            streamer.stream_video(path)
+        # Only the first frame, read before the ring existed, is copied into it
+        self.assertEqual(write.call_count, 1)
+        self.assertEqual([n for n, _, _ in seen], list(range(12)))
+        self.assertTrue(all(parent == worker and abs(parent - 8 * n) <= 4 for n, parent, worker in seen))
+
+    def test_queue_depth(self):
+        depths = []
+        streamer = Streamer(batch_func=lambda frames, reqs, resps: None, batch_size=4, max_wait_ms=5)
+        streamer.register_output_func(lambda frame, req, resp: depths.append(streamer.queue_depth()))
+        streamer.stream_frames((np.zeros((4, 4, 3), dtype=np.uint8), 0.0, i) for i in range(12))
+        self.assertEqual(len(depths), 12)
+        self.assertGreater(max(depths), 0)
+        self.assertEqual(depths[-1], 0)
+        self.assertEqual(streamer.queue_depth(), 0)
+
+    def test_stream_sources(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        a = write_video(os.path.join(tmp.name, "a.avi"), 5)
+        b = write_video(os.path.join(tmp.name, "b.avi"), 8)
+        seen = []
+
+        def output(frame, req, resp):
+            seen.append((req.source_id, req.frame_num))
+
+        streamer = Streamer(func=lambda frame, req, resp: None)
+        streamer.register_output_func(output)
+        streamer.stream_sources({"a": a, "b": b, "missing": os.path.join(tmp.name, "missing.avi")})
+        self.assertEqual([n for s, n in seen if s == "a"], list(range(5)))
+        self.assertEqual([n for s, n in seen if s == "b"], list(range(8)))
+        self.assertEqual(len(seen), 13)
+        with self.assertRaises(ValueError):
+            streamer.stream_sources([a, b, a])
+
+    def test_realtime_drops_stale_frames(self):
+        seen = []
+
+        def slow_analytic(frame, req, resp):
+            time.sleep(0.02)
+
+        def output(frame, req, resp):
+            seen.append((req.frame_num, resp.dropped_frames))
+
+        streamer = Streamer(func=slow_analytic, realtime=True)
+        streamer.register_output_func(output)
+        streamer.stream_capture(SlowCamera(60))
+        nums = [n for n, _ in seen]
+        self.assertEqual(nums, sorted(nums))
+        self.assertLess(len(seen), 40)
+        self.assertGreater(streamer.dropped_frames, 0)
+        self.assertEqual(streamer.dropped_frames + len(seen), nums[-1] + 1)
+        self.assertEqual(sum(d for _, d in seen), streamer.dropped_frames)
+
+    def test_sampled_video(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = write_video(os.path.join(tmp.name, "v.avi"), 30, fps=10)
+        seen = []
+
+        def output(frame, req, resp):
+            seen.append((req.frame_num, round(req.timestamp, 3), int(round(frame[0, 0, 0] / 8.0))))
+
+        streamer = Streamer(func=lambda frame, req, resp: None, stride=4)
+        streamer.register_output_func(output)
+        streamer.stream_video(path)
+        self.assertEqual(seen, [(n, n / 10.0, n) for n in range(0, 30, 4)])
+
+        seen[:] = []
+        streamer = Streamer(func=lambda frame, req, resp: None, sample_fps=2, time_ranges=[(0.5, 1.0), (2.5, None)])
+        streamer.register_output_func(output)
+        streamer.stream_video(path)
+        self.assertEqual([n for n, _, _ in seen], [5, 25])
+        self.assertEqual([v for _, _, v in seen], [5, 25])
 
 
 if __name__ == "__main__":
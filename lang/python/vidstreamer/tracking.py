@@ -0,0 +1,244 @@
+import threading
+
+import cv2
+import numpy as np
+
+from . import analytic_pb2
+from .rois import rois_to_arrays
+
+LK_PARAMS = dict(winSize=(15, 15), maxLevel=3,
+                 criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+
+
+def box_iou(a, b):
+    """ The IoU of every box in Nx4 array `a` (corners) with every box in Mx4 array `b`, as an
+    NxM array """
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def match_boxes(iou, threshold):
+    """ Greedily pair rows with columns of an IoU matrix, best overlap first, ignoring pairs
+    below `threshold`. Returns a list of (row, col). """
+    iou = iou.copy()
+    pairs = []
+    while iou.size:
+        row, col = np.unravel_index(np.argmax(iou), iou.shape)
+        if iou[row, col] < threshold:
+            break
+        pairs.append((int(row), int(col)))
+        iou[row, :] = -1
+        iou[:, col] = -1
+    return pairs
+
+
+class _Source:
+    """ Tracks of one source: their boxes now, at the last keyframe and their velocity """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.gray = None
+        self.pending = None  # gray copy of a frame sent to the analytic, for update()
+        self.rois = []
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.boxes = np.zeros((0, 4))
+        self.key_boxes = self.boxes
+        self.velocity = self.boxes
+        self.since = 0
+        self.redetect = True
+
+
+class Tracker:
+    """ Runs the analytic on every `interval`th frame of each source only and moves the ROIs it
+    found along in between, assigning each object a stable `RegionOfInterest.track_id`.
+
+    At a keyframe the analytic's ROIs are matched to the current tracks by IoU (with the same
+    classification); matches keep their track ID and the rest start new tracks. Between
+    keyframes the "flow" method follows a grid of `points` x `points` points in each box with
+    pyramidal Lucas-Kanade optical flow on a grayscale copy about `width` pixels wide, moving
+    and scaling the box by the median motion of the points that pass a forward-backward check.
+    When fewer than `min_confidence` of a box's points can be followed, or a box leaves the
+    frame, the frame goes to the analytic instead. The "iou" method needs no pixels: boxes move
+    at the velocity measured between their last two keyframes.
+
+    Tracked frames get a FrameData with `tracked` set. Masks are moved with their box but not
+    resized. Each source's frames must arrive in order, so tracking does not work with worker
+    processes, which each see only some of the frames. """
+
+    def __init__(self, interval=5, method="flow", min_confidence=0.5, iou_threshold=0.3, width=640, points=4):
+        if method not in ("flow", "iou"):
+            raise ValueError("Unknown tracking method {!s}".format(method))
+        self.interval = interval
+        self.method = method
+        self.min_confidence = min_confidence
+        self.iou_threshold = iou_threshold
+        self.width = width
+        self.points = points
+        self._init_state()
+
+    def _init_state(self):
+        self.detected = 0
+        self.tracked = 0
+        self._next_id = 1
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"interval": self.interval, "method": self.method, "min_confidence": self.min_confidence,
+                "iou_threshold": self.iou_threshold, "width": self.width, "points": self.points}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_state()
+
+    def track(self, frame, source_id=""):
+        """ Returns None when the frame should go to the analytic (pass its results to
+        update()), or else a FrameData with the ROIs of the last keyframe moved to this frame. """
+        with self._lock:
+            state = self._sources.get(source_id)
+            if state is None:
+                state = self._sources[source_id] = _Source()
+        with state.lock:
+            gray, scale = self._gray(frame) if self.method == "flow" else (None, 1.0)
+            boxes = None
+            if not state.redetect and state.since + 1 < self.interval:
+                if self.method == "iou":
+                    boxes = state.boxes + state.velocity
+                elif state.gray is not None and state.gray.shape == gray.shape:
+                    boxes = self._flow(state, gray, scale)
+            if boxes is not None:
+                height, width = frame.shape[:2]
+                centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+                if np.any((centers < 0) | (centers >= (width, height))):
+                    boxes = None
+            if boxes is None:
+                state.pending = gray
+                with self._lock:
+                    self.detected += 1
+                return None
+            state.boxes = boxes
+            state.gray = gray
+            state.since += 1
+            with self._lock:
+                self.tracked += 1
+            return self._frame_data(state)
+
+    def update(self, frame, source_id, resp):
+        """ Start or continue tracks from the analytic's results for a frame that track()
+        returned None for, setting the track_id of each ROI in `resp`. """
+        with self._lock:
+            state = self._sources.get(source_id)
+            if state is None:
+                state = self._sources[source_id] = _Source()
+        with state.lock:
+            gray = state.pending
+            state.pending = None
+            if self.method == "flow" and gray is None:
+                gray, _ = self._gray(frame)
+            if resp.status.code:
+                state.redetect = True
+                return
+            boxes, _, names = rois_to_arrays(resp)
+            boxes = boxes.astype(np.float64)
+            iou = box_iou(state.boxes, boxes)
+            old_names = np.array([roi.classification for roi in state.rois], dtype=object)
+            iou[old_names[:, None] != np.array(names, dtype=object)[None, :]] = 0
+            ids = np.zeros(len(boxes), dtype=np.int64)
+            velocity = np.zeros_like(boxes)
+            frames = state.since + 1
+            for old, new in match_boxes(iou, self.iou_threshold):
+                ids[new] = state.ids[old]
+                velocity[new] = (boxes[new] - state.key_boxes[old]) / frames
+            with self._lock:
+                for i in np.flatnonzero(ids == 0):
+                    ids[i] = self._next_id
+                    self._next_id += 1
+            for roi, track_id in zip(resp.roi, ids.tolist()):
+                roi.track_id = track_id
+            state.rois = [analytic_pb2.RegionOfInterest() for _ in resp.roi]
+            for stored, roi in zip(state.rois, resp.roi):
+                stored.CopyFrom(roi)
+            state.ids = ids
+            state.boxes = boxes
+            state.key_boxes = boxes
+            state.velocity = velocity
+            state.gray = gray
+            state.since = 0
+            state.redetect = False
+
+    def stats(self):
+        """ A dict of frames detected (sent to the analytic) and tracked """
+        with self._lock:
+            return {"detected": self.detected, "tracked": self.tracked}
+
+    def _gray(self, frame):
+        # Shrinking first leaves less to convert; the flow's own image pyramid smooths out the
+        # aliasing of a linear resize, which is several times cheaper than INTER_AREA
+        scale = min(1.0, self.width / float(frame.shape[1]))
+        if scale < 1.0:
+            size = (max(1, int(round(frame.shape[1] * scale))), max(1, int(round(frame.shape[0] * scale))))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR)
+        if frame.ndim == 3 and frame.shape[2] == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        elif frame.ndim == 3:
+            frame = np.ascontiguousarray(frame[..., 0])
+        return frame, scale
+
+    def _flow(self, state, gray, scale):
+        # Move every box by the optical flow of a grid of points inside it; None if tracking failed
+        count = len(state.boxes)
+        if not count:
+            return state.boxes
+        boxes = state.boxes * scale
+        steps = (np.arange(self.points) + 0.5) / self.points * 0.8 + 0.1
+        gx, gy = np.meshgrid(steps, steps)
+        size = boxes[:, 2:] - boxes[:, :2]
+        xs = boxes[:, None, 0] + gx.ravel()[None, :] * size[:, None, 0]
+        ys = boxes[:, None, 1] + gy.ravel()[None, :] * size[:, None, 1]
+        start = np.stack([xs, ys], axis=-1).reshape(-1, 1, 2).astype(np.float32)
+        end, found, _ = cv2.calcOpticalFlowPyrLK(state.gray, gray, start, None, **LK_PARAMS)
+        back, found_back, _ = cv2.calcOpticalFlowPyrLK(gray, state.gray, end, None, **LK_PARAMS)
+        error = np.linalg.norm((back - start).reshape(-1, 2), axis=1)
+        good = (found.ravel() == 1) & (found_back.ravel() == 1) & (error < 1.0)
+        good = good.reshape(count, -1)
+        if np.any(good.mean(axis=1) < self.min_confidence):
+            return None
+        start = start.reshape(count, -1, 2)
+        end = end.reshape(count, -1, 2)
+        moved = np.empty_like(boxes)
+        for i in range(count):
+            before, after = start[i][good[i]], end[i][good[i]]
+            shift = np.median(after - before, axis=0)
+            spread_before = np.linalg.norm(before - before.mean(axis=0), axis=1)
+            spread_after = np.linalg.norm(after - after.mean(axis=0), axis=1)
+            valid = spread_before > 0
+            ratio = float(np.median(spread_after[valid] / spread_before[valid])) if valid.any() else 1.0
+            center = (boxes[i, :2] + boxes[i, 2:]) / 2 + shift
+            half = size[i] / 2 * ratio
+            moved[i, :2] = center - half
+            moved[i, 2:] = center + half
+        return moved / scale
+
+    def _frame_data(self, state):
+        resp = analytic_pb2.FrameData(tracked=True)
+        corners = np.rint(state.boxes).astype(np.int64).tolist()
+        shifts = np.rint(state.boxes[:, :2] - state.key_boxes[:, :2]).astype(np.int64).tolist()
+        for roi, (x1, y1, x2, y2), (dx, dy) in zip(state.rois, corners, shifts):
+            moved = resp.roi.add()
+            moved.CopyFrom(roi)
+            if roi.HasField("box"):
+                moved.box.corner1.x, moved.box.corner1.y = x1, y1
+                moved.box.corner2.x, moved.box.corner2.y = x2, y2
+            elif roi.HasField("mask") and not roi.mask.pixel:
+                moved.mask.x += dx
+                moved.mask.y += dy
+        return resp
@@ -0,0 +1,161 @@
+import pickle
+import unittest
+
+import numpy as np
+from google.rpc import code_pb2
+from vidstreamer import analytic_pb2
+from .__init__ import Streamer
+from .masks import mask_to_proto
+from .rois import add_detections, rois_to_arrays
+from .tracking import Tracker, box_iou, match_boxes
+
+RNG = np.random.default_rng(0)
+BACKGROUND = (RNG.integers(0, 60, (240, 320)) + 40).astype(np.uint8)
+PATCH = RNG.integers(0, 256, (40, 40)).astype(np.uint8)
+
+
+def scene(x, y):
+    frame = BACKGROUND.copy()
+    frame[y:y + 40, x:x + 40] = PATCH
+    return np.dstack([frame] * 3)
+
+
+def position(i):
+    return 40 + 4 * i, 60 + 2 * i
+
+
+def detect(frame_num, label="thing"):
+    x, y = position(frame_num)
+    resp = analytic_pb2.FrameData()
+    add_detections(resp, [[x, y, x + 40, y + 40]], [0.9], class_ids=[0], labels=[label])
+    return resp
+
+
+class TestBoxes(unittest.TestCase):
+
+    def test_iou_and_matching(self):
+        a = [[0, 0, 10, 10], [20, 20, 30, 30]]
+        b = [[20, 20, 30, 30], [5, 0, 15, 10], [100, 100, 100, 100]]
+        iou = box_iou(a, b)
+        np.testing.assert_allclose(iou, [[0, 1 / 3.0, 0], [1, 0, 0]])
+        self.assertEqual(sorted(match_boxes(iou, 0.3)), [(0, 1), (1, 0)])
+        self.assertEqual(match_boxes(iou, 0.5), [(1, 0)])
+        self.assertEqual(match_boxes(box_iou([], b), 0.3), [])
+
+
+class TestTracker(unittest.TestCase):
+
+    def run_tracker(self, tracker, frames=11, label=lambda i: "thing"):
+        detected, results = [], []
+        for i in range(frames):
+            frame = scene(*position(i))
+            resp = tracker.track(frame)
+            if resp is None:
+                detected.append(i)
+                resp = detect(i, label(i))
+                tracker.update(frame, "", resp)
+            results.append(resp)
+        return detected, results
+
+    def test_flow(self):
+        tracker = Tracker(interval=5)
+        detected, results = self.run_tracker(tracker)
+        self.assertEqual(detected, [0, 5, 10])
+        self.assertEqual([r.tracked for r in results], [i % 5 != 0 for i in range(11)])
+        self.assertEqual(set(r.roi[0].track_id for r in results), {1})
+        for i, resp in enumerate(results):
+            x, y = position(i)
+            boxes, scores, names = rois_to_arrays(resp)
+            np.testing.assert_allclose(boxes[0], [x, y, x + 40, y + 40], atol=2)
+            self.assertEqual((names, scores[0]), (["thing"], np.float32(0.9)))
+        self.assertEqual(tracker.stats(), {"detected": 3, "tracked": 8})
+
+    def test_new_track_for_new_class(self):
+        tracker = Tracker(interval=5)
+        _, results = self.run_tracker(tracker, label=lambda i: "thing" if i < 5 else "other")
+        self.assertEqual([r.roi[0].track_id for r in results], [1] * 5 + [2] * 6)
+
+    def test_redetect_when_lost(self):
+        tracker = Tracker(interval=10)
+        frame = scene(*position(0))
+        tracker.track(frame)
+        tracker.update(frame, "", detect(0))
+        self.assertIsNone(tracker.track(np.dstack([BACKGROUND[::-1]] * 3)))
+
+        failed = analytic_pb2.FrameData()
+        failed.status.code = code_pb2.INTERNAL
+        tracker.update(frame, "", failed)
+        self.assertIsNone(tracker.track(frame))
+        tracker.update(frame, "", detect(0))
+        self.assertIsNotNone(tracker.track(frame))
+
+    def test_iou_velocity_and_masks(self):
+        tracker = Tracker(interval=3, method="iou")
+        blank = np.zeros((240, 320, 3), dtype=np.uint8)
+        for i in (0, 3):
+            self.assertIsNone(tracker.track(blank, "cam"))
+            resp = detect(i)
+            mask = np.zeros((240, 320), dtype=bool)
+            x, y = position(i)
+            mask[y:y + 40, x:x + 40] = True
+            mask_to_proto(mask, resp.roi.add(classification="blob").mask)
+            tracker.update(blank, "cam", resp)
+            if i == 0:
+                self.assertIsNotNone(tracker.track(blank, "cam"))
+                self.assertIsNotNone(tracker.track(blank, "cam"))
+        moved = tracker.track(blank, "cam")
+        x, y = position(4)
+        boxes, _, names = rois_to_arrays(moved)
+        self.assertEqual(names, ["thing", "blob"])
+        np.testing.assert_array_equal(boxes, [[x, y, x + 40, y + 40]] * 2)
+        self.assertEqual([roi.track_id for roi in moved.roi], [1, 2])
+        with self.assertRaises(ValueError):
+            Tracker(method="kalman")
+
+    def test_pickle(self):
+        tracker = Tracker(interval=7, method="iou")
+        copy = pickle.loads(pickle.dumps(tracker))
+        self.assertEqual((copy.interval, copy.method, copy.stats()), (7, "iou", {"detected": 0, "tracked": 0}))
+
+
+class TestStreamerTracking(unittest.TestCase):
+
+    def test_tracked_stream(self):
+        calls = []
+
+        def analytic(frame, req, resp):
+            calls.append(req.frame_num)
+            resp.MergeFrom(detect(req.frame_num))
+
+        streamer = Streamer(func=analytic, track_interval=4)
+        resps = []
+        streamer.register_output_func(lambda frame, req, resp: resps.append(resp))
+        streamer.stream_frames((scene(*position(i)), 0.0, i, "cam") for i in range(9))
+        self.assertEqual(calls, [0, 4, 8])
+        self.assertEqual([r.roi[0].track_id for r in resps], [1] * 9)
+        self.assertEqual(sum(r.tracked for r in resps), 6)
+        self.assertEqual(streamer.stats()["track"]["count"], 9)
+
+    def test_batched_stream(self):
+        calls = []
+
+        def batch_analytic(frames, reqs, resps):
+            for req, resp in zip(reqs, resps):
+                calls.append((req.source_id, req.frame_num))
+                resp.MergeFrom(detect(req.frame_num, label=req.source_id))
+
+        streamer = Streamer(batch_func=batch_analytic, batch_size=4, max_wait_ms=5, track_interval=4)
+        resps = []
+        streamer.register_output_func(lambda frame, req, resp: resps.append((req.source_id, resp)))
+        streamer.stream_frames((scene(*position(i)), 0.0, i, source) for i in range(9) for source in ("a", "b"))
+        self.assertEqual(sorted(calls), [(s, i) for s in ("a", "b") for i in (0, 4, 8)])
+        ids = dict((source, set(resp.roi[0].track_id for s, resp in resps if s == source)) for source in ("a", "b"))
+        self.assertEqual(len(ids["a"]), 1)
+        self.assertEqual(len(ids["b"]), 1)
+        self.assertNotEqual(ids["a"], ids["b"])
+        self.assertEqual(sum(resp.tracked for _, resp in resps), 12)
+        self.assertEqual(streamer.stats()["track"]["count"], 18)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import itertools
+import logging
+import multiprocessing
+import queue
+import traceback
+
+from . import analytic_pb2
+from .shm import FrameRing
+
+
+class WorkerError(RuntimeError):
+    """ Raised in the parent when the analytic fails inside a worker process. """
+    pass
+
+
+def _worker_main(streamer, init_func, tasks, results, ring=None):
+    # A forked copy of the parent's batching thread does not survive the fork
+    streamer._batcher = None
+    if init_func:
+        init_func(streamer)
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        seq, slot, frame, timestamp, frame_num, source_id = task
+        if slot is not None:
+            frame = ring.view(slot)
+        try:
+            req, resp = streamer.analyze_frame(frame, timestamp=timestamp, frame_num=frame_num, source_id=source_id)
+        except Exception:
+            results.put((seq, None, traceback.format_exc()))
+            continue
+        results.put((seq, resp.SerializeToString(), None))
+
+
+class WorkerPool:
+    """ Spreads frames across a pool of processes, each running the streamer's analytic.
+
+    Every worker calls `init_func(streamer)` once at start-up so it can load its own copy of the
+    model. Only the analytic results (serialized FrameData) travel back to the parent; the frame
+    itself is kept in the parent for the output function. At most `max_in_flight` frames are
+    outstanding at any time and results are yielded in the order the frames were read.
+
+    With `shared_memory` set, frames travel through a FrameRing sized from the first frame
+    instead of being pickled: the parent copies each frame into a free slot, workers read it in
+    place and the slot is reused once the output function has returned. Given `buffers`, a
+    RingBuffers the capture reads through, frames are decoded into a slot to begin with and
+    the copy is skipped. The frame handed to the output function is then a view onto the slot,
+    so copy it if it must outlive that call. Frames whose shape or dtype differ from the first
+    frame, or that find no free slot, fall back to pickling. """
+
+    def __init__(self, streamer, workers, init_func=None, max_in_flight=None, start_method=None,
+                 shared_memory=False, buffers=None):
+        self.streamer = streamer
+        self.workers = workers
+        self.init_func = init_func
+        self.max_in_flight = max_in_flight or 2 * workers
+        self.ctx = multiprocessing.get_context(start_method)
+        self.shared_memory = shared_memory
+        self.buffers = buffers
+
+    def run(self, frames):
+        """ Yield (frame, req, resp) for each (frame, timestamp, frame_num, source_id) in `frames`. """
+        frames = iter(frames)
+        first = next(frames, None)
+        if first is None:
+            return
+        frames = itertools.chain([first], frames)
+
+        ring = None
+        if self.shared_memory:
+            # One slot per frame in flight plus the one held by the output function
+            ring = FrameRing(self.max_in_flight + 1, first[0].shape, dtype=first[0].dtype)
+            if self.buffers is not None:
+                self.buffers.ring = ring
+        tasks = self.ctx.Queue(maxsize=self.max_in_flight)
+        results = self.ctx.Queue()
+        procs = [self.ctx.Process(target=_worker_main, args=(self.streamer, self.init_func, tasks, results, ring),
+                                  name="vidstreamer-worker-{!s}".format(i), daemon=True)
+                 for i in range(self.workers)]
+        for p in procs:
+            p.start()
+
+        in_flight = {}
+        done = {}
+        next_seq = 0
+        try:
+            for seq, (frame, timestamp, frame_num, source_id) in enumerate(frames):
+                while len(in_flight) >= self.max_in_flight:
+                    self._collect(results, procs, done)
+                    ready = self._drain(in_flight, done, next_seq)
+                    next_seq += len(ready)
+                    yield from self._emit(ready, ring)
+                req, _ = self.streamer.new_request(timestamp=timestamp, frame_num=frame_num, source_id=source_id)
+                # Frames the capture decoded into a slot lent by `buffers` are already in place.
+                # Other frames never wait for a slot: the capture may hold the free ones for
+                # frames it read ahead, which only get here after this one.
+                slot = ring.slot_of(frame) if ring is not None else None
+                if slot is None and ring is not None and ring.fits(frame):
+                    try:
+                        slot = ring.acquire(timeout=0)
+                        frame = ring.write(slot, frame)
+                    except queue.Empty:
+                        slot = None
+                in_flight[seq] = (frame, req, slot)
+                tasks.put((seq, slot, None if slot is not None else frame, timestamp, frame_num, source_id))
+            while in_flight:
+                self._collect(results, procs, done)
+                ready = self._drain(in_flight, done, next_seq)
+                next_seq += len(ready)
+                yield from self._emit(ready, ring)
+        finally:
+            # One sentinel per worker, dead or alive: checking first races with a worker that
+            # already took an earlier sentinel and exited, leaving another without one
+            for _ in procs:
+                try:
+                    tasks.put(None, timeout=1)
+                except queue.Full:
+                    break
+            for p in procs:
+                p.join(timeout=5)
+                if p.is_alive():
+                    p.terminate()
+            tasks.cancel_join_thread()
+            if ring is not None:
+                if self.buffers is not None:
+                    self.buffers.ring = None
+                ring.close()
+
+    def _emit(self, ready, ring):
+        """ Yield results, releasing each frame's ring slot once the consumer resumes. """
+        for frame, req, resp, slot in ready:
+            try:
+                yield frame, req, resp
+            finally:
+                if slot is not None:
+                    ring.release(slot)
+
+    def _collect(self, results, procs, done):
+        """ Block until one worker result arrives, checking that the workers are still alive. """
+        while True:
+            try:
+                seq, data, error = results.get(timeout=1)
+            except queue.Empty:
+                dead = [p.name for p in procs if not p.is_alive()]
+                if dead:
+                    raise WorkerError("Worker process exited unexpectedly: {!s}".format(", ".join(dead)))
+                continue
+            done[seq] = (data, error)
+            return
+
+    def _drain(self, in_flight, done, next_seq):
+        """ Returns the completed results that are next in order. """
+        ready = []
+        while next_seq in done:
+            data, error = done.pop(next_seq)
+            frame, req, slot = in_flight.pop(next_seq)
+            if error:
+                logging.error("Analytic failed in worker for frame_num {!s}".format(req.frame_num))
+                raise WorkerError(error)
+            ready.append((frame, req, analytic_pb2.FrameData.FromString(data), slot))
+            next_seq += 1
+        return ready
@@ -25,7 +25,7 @@ setup(name=pkg_name,
         packages=["vidstreamer"],
         install_requires=[
           'setuptools>=41.0.0',
-          'protobuf>=3.6.1',
+          'protobuf>=3.20.0',
           'googleapis-common-protos>=1.6.0',
           'Click>=7.0',
           'dataclasses>=0.6',
@@ -33,9 +33,13 @@ setup(name=pkg_name,
           'requests>=2.0.0',
           'flask>=1.0.0',
           'influxdb~=5.2.3',
-          'opencv-python>=4.2.0.0'
-          'numpy>=1.18.0'
+          'opencv-python>=4.2.0.0',
+          'numpy>=1.18.0',
+          'grpcio>=1.32.0'
             ],
+        extras_require={
+          'parquet': ['pyarrow>=4.0.0'],
+            },
         data_files=list(iter_protos(pkg_name)),
         py_modules = [
             'vidstreamer.analytic_pb2',